@@ -5,8 +5,12 @@ and add the images to the posts.
 """
 
 import re
+from functools import partial
 from pathlib import Path
 
+from batch_runner import find_posts, run_batch
+from post_sections import PostSections
+
 def get_post_slug(filename):
     """Extract slug from HTML filename."""
     return filename.replace('.html', '')
@@ -26,16 +30,10 @@ def post_has_images(filepath):
     except UnicodeDecodeError:
         return True  # Skip files with encoding errors
 
-    content_match = re.search(
-        r'<div class="post-content">(.*?)</div>\s*<a [^>]*class="back-link"',
-        content,
-        re.DOTALL
-    )
-
-    if not content_match:
+    post_content = PostSections(content).text('content')
+    if post_content is None:
         return False
 
-    post_content = content_match.group(1)
     return '<img' in post_content
 
 def add_images_to_post(filepath, images):
@@ -46,18 +44,13 @@ def add_images_to_post(filepath, images):
         content = f.read()
 
     # Find post-content div
-    content_match = re.search(
-        r'<div class="post-content">(.*?)</div>\s*<a [^>]*class="back-link"',
-        content,
-        re.DOTALL
-    )
+    sections = PostSections(content)
+    old_content = sections.text('content')
 
-    if not content_match:
+    if old_content is None:
         print(f"  ⚠️  Could not find post-content div")
         return False
 
-    old_content = content_match.group(1)
-
     # Split into paragraphs
     paragraphs = re.findall(r'<p>.*?</p>', old_content, re.DOTALL)
 
@@ -86,8 +79,8 @@ def add_images_to_post(filepath, images):
 
     new_content = '\n            '.join(new_paragraphs)
 
-    # Replace content
-    new_full = content.replace(old_content, new_content)
+    # Replace content (by offset, so nothing outside post-content can change)
+    new_full = sections.splice('content', new_content)
 
     with open(filepath, 'w', encoding='utf-8') as f:
         f.write(new_full)
@@ -95,28 +88,29 @@ def add_images_to_post(filepath, images):
     print(f"  ✅ Added {len(images)} images")
     return True
 
-def main():
-    posts_dir = Path('/Volumes/LaCie/CLAUDE/posts')
-    blog_images_dir = Path('/Volumes/LaCie/CLAUDE/blog-images')
+def fix_post(post_file, blog_images_dir):
+    """Add the post's images from blog-images if it has none; True if it was fixed."""
+    slug = get_post_slug(post_file.name)
 
-    posts_fixed = []
+    # Check if images exist for this post
+    images = find_images_for_post(slug, blog_images_dir)
 
-    for post_file in sorted(posts_dir.glob('*.html')):
-        slug = get_post_slug(post_file.name)
+    if not images:
+        return False
 
-        # Check if images exist for this post
-        images = find_images_for_post(slug, blog_images_dir)
+    # Check if post already has images
+    if post_has_images(post_file):
+        return False
 
-        if not images:
-            continue
+    # Add images to post
+    return add_images_to_post(post_file, images)
 
-        # Check if post already has images
-        if post_has_images(post_file):
-            continue
+def main():
+    posts_dir = Path('/Volumes/LaCie/CLAUDE/posts')
+    blog_images_dir = Path('/Volumes/LaCie/CLAUDE/blog-images')
 
-        # Add images to post
-        if add_images_to_post(post_file, images):
-            posts_fixed.append(post_file.name)
+    fix = partial(fix_post, blog_images_dir=blog_images_dir)
+    posts_fixed = [post_file.name for post_file, fixed in run_batch(fix, find_posts(posts_dir)) if fixed]
 
     if posts_fixed:
         print(f"\n✅ Fixed {len(posts_fixed)} posts:")
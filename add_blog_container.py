@@ -1,25 +1,14 @@
 #!/usr/bin/env python3
 import os
 import re
+import sys
+
+from build_manifest import BuildStep
 
 # Directory containing blog posts
 posts_dir = 'posts'
 
-# Get all HTML files
-html_files = [f for f in os.listdir(posts_dir) if f.endswith('.html') and not f.startswith('._')]
-
-print(f'Adding styled container to {len(html_files)} blog posts...\n')
-
-for filename in html_files:
-    filepath = os.path.join(posts_dir, filename)
-
-    try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-    except Exception as e:
-        print(f'✗ Error reading {filename}: {e}')
-        continue
-
+def add_container(content, path=None):
     # Update the post-container style to add background, padding, and rounded edges
     content = re.sub(
         r'(\.post-container\s*\{[^}]*?max-width:\s*800px;[^}]*?margin:\s*0 auto;[^}]*?)padding:\s*60px 20px;',
@@ -69,9 +58,20 @@ for filename in html_files:
         content
     )
 
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
+
+def main():
+    # Get all HTML files
+    html_files = [f for f in os.listdir(posts_dir) if f.endswith('.html') and not f.startswith('._')]
+
+    print(f'Adding styled container to {len(html_files)} blog posts...\n')
+
+    # Only posts changed since the last run (or run with a changed script) are rewritten
+    step = BuildStep('add-blog-container', [__file__])
+    step.run([os.path.join(posts_dir, f) for f in sorted(html_files)], add_container,
+             force='--force' in sys.argv, dry_run='--dirty' in sys.argv)
 
-    print(f'✓ Updated {filename}')
+    print(f'\n✅ Blog posts have the styled container')
 
-print(f'\n✅ Successfully added styled container to {len(html_files)} blog posts')
+if __name__ == '__main__':
+    main()
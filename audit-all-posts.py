@@ -10,9 +10,11 @@ Audit all blog posts for common issues encountered during recent fixes:
 
 import os
 import sys
-from bs4 import BeautifulSoup
 from pathlib import Path
 
+from batch_runner import find_posts, run_batch
+from post_document import get_post_cache, load_post
+
 POSTS_DIR = Path(__file__).parent / "posts"
 
 def audit_post(html_file):
@@ -20,68 +22,48 @@ def audit_post(html_file):
     issues = []
 
     try:
-        with open(html_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        doc = load_post(html_file)
     except (UnicodeDecodeError, OSError):
         # Skip files that can't be read as UTF-8 (binary files, etc.)
         return ["❌ Unable to read file (encoding error)"]
 
-    soup = BeautifulSoup(content, 'html.parser')
-
     # Check 1: SEODEEP template headers
-    h1_with_class = soup.find('h1', class_='post-title')
-    h3_with_class = soup.find('h3', class_='post-subtitle')
-
-    if not h1_with_class:
+    if doc.h1 is None:
         issues.append("❌ Missing H1 with class='post-title'")
-    if not h3_with_class:
+    if doc.subtitle is None:
         issues.append("❌ Missing H3 with class='post-subtitle'")
 
     # Check 2: Section headers using <em> instead of <strong>
     # Look for patterns like <p><em>text</em></p> that might be section headers
-    italic_paragraphs = []
-    for p in soup.find_all('p'):
-        em_tag = p.find('em')
-        if em_tag and len(p.find_all()) == 1:  # Only contains the em tag
-            text = em_tag.get_text().strip()
-            if len(text) < 100 and not text.endswith('.'):  # Likely a header, not body text
-                italic_paragraphs.append(text)
+    italic_paragraphs = [text for text, _ in doc.italic_paragraphs
+                         if len(text) < 100 and not text.endswith('.')]  # Likely a header, not body text
 
     if italic_paragraphs:
         issues.append(f"⚠️  Found {len(italic_paragraphs)} potential section headers using <em>: {', '.join(italic_paragraphs[:3])}")
 
     # Check 3: Grey <hr> lines
-    hr_tags = soup.find_all('hr')
-    if hr_tags:
-        issues.append(f"⚠️  Found {len(hr_tags)} <hr> tag(s) (grey lines)")
+    if doc.count('hr'):
+        issues.append(f"⚠️  Found {doc.count('hr')} <hr> tag(s) (grey lines)")
 
     # Check 4: Substack audio/video players
-    audio_embeds = soup.find_all('div', {'data-component-name': 'AudioEmbedPlayer'})
-    if audio_embeds:
-        issues.append(f"⚠️  Found {len(audio_embeds)} Substack audio player(s)")
+    if doc.audio_embeds:
+        issues.append(f"⚠️  Found {doc.audio_embeds} Substack audio player(s)")
 
-    video_embeds = soup.find_all('div', class_=lambda x: x and 'video-embed' in x if x else False)
-    substack_videos = [v for v in video_embeds if v.find('iframe') and 'substack' in str(v.find('iframe').get('src', ''))]
+    substack_videos = [src for src in doc.video_embeds if src is not None and 'substack' in src]
     if substack_videos:
         issues.append(f"⚠️  Found {len(substack_videos)} Substack video embed(s)")
 
     # Check 5: Images with Substack CDN URLs
-    substack_images = []
-    for img in soup.find_all('img'):
-        src = img.get('src', '')
-        if 'substackcdn.com' in src or 'substack-post-media.s3.amazonaws.com' in src:
-            substack_images.append(src)
+    substack_images = [img['src'] for img in doc.images
+                       if 'substackcdn.com' in img['src'] or 'substack-post-media.s3.amazonaws.com' in img['src']]
 
     if substack_images:
         issues.append(f"⚠️  Found {len(substack_images)} image(s) still using Substack CDN URLs")
 
     # Check 6: Posts with no meaningful text content
-    post_content_div = soup.find('div', class_='post-content')
-    if post_content_div:
-        # Get all paragraph text, excluding figure captions
-        paragraphs = post_content_div.find_all('p')
-        text_content = ' '.join([p.get_text().strip() for p in paragraphs if not p.find_parent('figcaption')])
-        word_count = len(text_content.split())
+    if doc.content_root == 'post-content':
+        # All paragraph text, excluding figure captions
+        word_count = doc.word_count(include_captions=False)
 
         if word_count < 50:  # Less than 50 words means essentially empty
             issues.append(f"❌ POST HAS NO CONTENT - only {word_count} words of text")
@@ -91,12 +73,11 @@ def audit_post(html_file):
 def main():
     print("🔍 Auditing all blog posts for common issues...\n")
 
-    all_posts = sorted([f for f in POSTS_DIR.glob("*.html") if not f.name.startswith("._")])
+    all_posts = find_posts(POSTS_DIR)
     posts_with_issues = []
     total_issues = 0
 
-    for post_file in all_posts:
-        issues = audit_post(post_file)
+    for post_file, issues in run_batch(audit_post, all_posts):
 
         if issues:
             posts_with_issues.append((post_file.name, issues))
@@ -114,6 +95,7 @@ def main():
     print(f"   Posts with issues: {len(posts_with_issues)}")
     print(f"   Posts clean: {len(all_posts) - len(posts_with_issues)}")
     print(f"   Total issues found: {total_issues}")
+    print(f"   Posts parsed: {get_post_cache().summary()}")
 
     if posts_with_issues:
         print("\n📋 Posts needing attention:")
@@ -1,6 +1,8 @@
 #!/bin/bash
 # Batch SEODEEP processing script
 # Processes all posts with Substack bloat and tracks age-restricted ones
+# Extra arguments are passed to the converter, e.g. --resume or --only-failed
+# to continue an interrupted run from migration-journal.jsonl
 
 cd /Volumes/LaCie/CLAUDE
 
@@ -16,17 +18,19 @@ current=0
 echo "Found $total posts needing SEODEEP"
 echo ""
 
-for html_file in $posts_with_bloat; do
-  current=$((current + 1))
-  slug=$(basename "$html_file" .html)
+# Run SEODEEP for every post in one process (fetches run concurrently)
+slugs=$(for html_file in $posts_with_bloat; do basename "$html_file" .html; done)
+python3 convert-blog-post-full.py --batch --concurrency "${SEODEEP_CONCURRENCY:-8}" --log-dir /tmp "$@" $slugs
+
+echo ""
 
-  echo "[$current/$total] Processing: $slug"
+for slug in $slugs; do
+  current=$((current + 1))
 
-  # Run SEODEEP
-  python3 convert-blog-post-full.py "https://forbiddenyoga.substack.com/p/$slug" > "/tmp/seodeep-${slug}.log" 2>&1
+  echo "[$current/$total] Checking: $slug"
 
   # Check if age-restricted
-  if grep -q "Podcast post with no article content" "/tmp/seodeep-${slug}.log"; then
+  if [ -f "/tmp/seodeep-${slug}.log" ] && grep -q "Podcast post with no article content" "/tmp/seodeep-${slug}.log"; then
     echo "  → Age-restricted (needs manual content)"
     # Add to age-restricted list if not already there
     if ! grep -q "^- $slug$" age-restricted-posts.txt; then
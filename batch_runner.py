@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Batch runner shared by the per-post scripts
+- find_posts() lists a posts directory in order, without macOS ._ resource
+  forks
+- run_batch() calls a function on every post over a process pool sized to
+  the core count (BATCH_WORKERS to override, 1 runs in-process) and yields
+  (post, result) in input order
+- What a call prints is captured in its worker and replayed in input order,
+  so reports read the same as a serial run
+- Post cache counters (parsed / from cache) and image stats (images, time,
+  processes spawned) of the workers are added to this process's, so the
+  scripts' summaries still count every post
+- Post cache index entries the workers computed are handed to this
+  process, which saves the index once when the batch ends
+
+The function must be defined at module level (functools.partial of one is
+fine) so it can be sent to the workers.
+
+Usage:
+    from batch_runner import find_posts, run_batch
+    for post_file, issues in run_batch(audit_post, find_posts(POSTS_DIR)):
+        ...
+"""
+
+import contextlib
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+def find_posts(posts_dir, pattern='*.html'):
+    """Sorted post files in posts_dir, skipping ._ resource forks"""
+    return sorted(p for p in Path(posts_dir).glob(pattern) if not p.name.startswith('._'))
+
+def worker_count(workers=None):
+    if workers is None:
+        workers = int(os.environ.get('BATCH_WORKERS', 0)) or os.cpu_count() or 1
+    return max(1, workers)
+
+def _counters():
+    """Counters of this process's post cache (parsed, hits) and image stats
+    (images, seconds, slowest, spawned), for the modules in use"""
+    post_document = sys.modules.get('post_document')
+    cache = post_document and post_document._default_cache
+    image_pipeline = sys.modules.get('image_pipeline')
+    stats = image_pipeline and image_pipeline._stats
+    return ((cache.parsed, cache.hits) if cache else (0, 0),
+            stats.counters() if stats else (0, 0.0, 0.0, 0))
+
+def _index_updates():
+    """Post cache index entries this process computed since the last call"""
+    post_document = sys.modules.get('post_document')
+    cache = post_document and post_document._default_cache
+    return cache.take_updates() if cache else {}
+
+def _call(func, item):
+    """Run func(item) in a worker: (result, error, printed output, counters added by the call,
+    post cache index updates)"""
+    (parsed, hits), (images, seconds, _, spawned) = _counters()
+    output = io.StringIO()
+    result = error = None
+    with contextlib.redirect_stdout(output):
+        try:
+            result = func(item)
+        except Exception as e:
+            error = e
+    after_cache, after_images = _counters()
+    counters = ((after_cache[0] - parsed, after_cache[1] - hits),
+                (after_images[0] - images, after_images[1] - seconds, after_images[2],
+                 after_images[3] - spawned))
+    return result, error, output.getvalue(), counters, _index_updates()
+
+def _merge_counters(cache_counters, image_counters, index_updates):
+    if any(cache_counters) or index_updates:
+        from post_document import get_post_cache
+        get_post_cache().add_counters(*cache_counters)
+        get_post_cache().add_updates(index_updates)
+    if any(image_counters):
+        from image_pipeline import get_image_stats
+        get_image_stats().add(*image_counters)
+
+def run_batch(func, items, workers=None):
+    """Yield (item, func(item)) for every item, in order, computed on a process pool
+
+    An exception raised by func is re-raised here, after the output the call
+    printed.
+    """
+    items = list(items)
+    workers = min(worker_count(workers), len(items))
+    try:
+        if workers <= 1:
+            for item in items:
+                yield item, func(item)
+            return
+
+        chunksize = max(1, len(items) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            calls = pool.map(_call, [func] * len(items), items, chunksize=chunksize)
+            for item, (result, error, output, counters, index_updates) in zip(items, calls):
+                sys.stdout.write(output)
+                _merge_counters(*counters, index_updates)
+                if error is not None:
+                    raise error
+                yield item, result
+    finally:
+        _save_index()
+
+def _save_index():
+    """Write the post cache index once per batch"""
+    post_document = sys.modules.get('post_document')
+    cache = post_document and post_document._default_cache
+    if cache:
+        cache.save()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Verify and benchmark the streaming Substack cleaner against the regex one
+- Runs clean_substack_html (HTMLParser, one pass) and clean_substack_html_regex
+  on the Substack page of every post in posts/
+- Compares title, subtitle, date, podcast fallback, and the body's text,
+  image sources and embeds
+- Times both (best of --repeat runs) and, with --scale, shows how each one
+  grows when a page body is repeated 1x..16x
+
+Pages come from .migration-journal/ when a batch run saved them, otherwise
+through the HTTP cache (--offline: cache only).
+
+Usage:
+    python3 bench-substack-cleaner.py [--offline] [--repeat N] [--scale] [slug ...]
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import re
+import time
+from html import unescape
+from pathlib import Path
+
+from http_cache import cached_fetch_text, set_offline
+from migration_journal import MigrationJournal
+
+REPO_ROOT = Path(__file__).resolve().parent
+POSTS_DIR = REPO_ROOT / 'posts'
+SCALES = [1, 2, 4, 8, 16]
+
+def load_converter():
+    """Import convert-blog-post-full.py (hyphenated, so not importable by name)"""
+    path = REPO_ROOT / 'convert-blog-post-full.py'
+    spec = importlib.util.spec_from_file_location('convert_blog_post_full', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def load_page(converter, journal, slug):
+    """Saved journal copy of the Substack page, or fetch it through the cache"""
+    html = journal.load_page(slug)
+    if html is None:
+        html = cached_fetch_text(converter.normalize_post_url(slug))
+    return html
+
+def body_text(html):
+    text = re.sub(r'<(script|style)\b.*?</\1>', ' ', html, flags=re.DOTALL)
+    text = unescape(re.sub(r'<[^>]+>', ' ', text))
+    return ' '.join(text.split())
+
+def body_images(html):
+    return re.findall(r'<img src="([^"]+)"', html)
+
+def body_embeds(html):
+    return re.findall(r'<(?:iframe|video)[^>]*\ssrc="([^"]+)"', html)
+
+def compare(old, new):
+    """List of field names that differ between two cleaner results"""
+    diffs = [field for field in ('title', 'subtitle', 'date_display', 'podcast_fallback')
+             if old[field] != new[field]]
+    if body_text(old['content']) != body_text(new['content']):
+        diffs.append('text')
+    if body_images(old['content']) != body_images(new['content']):
+        diffs.append('images')
+    if body_embeds(old['content']) != body_embeds(new['content']):
+        diffs.append('embeds')
+    return diffs
+
+def first_difference(old, new, width=60):
+    """Short excerpt around the first place the two body texts diverge"""
+    a, b = body_text(old), body_text(new)
+    i = next((i for i, (x, y) in enumerate(zip(a, b)) if x != y), min(len(a), len(b)))
+    start = max(0, i - 20)
+    return a[start:start + width], b[start:start + width]
+
+def best_time(func, html, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def quiet(func):
+    """Run a cleaner without its podcast-fallback prints"""
+    def run(html):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func(html)
+    return run
+
+def scaled_page(html, factor):
+    """Page whose available-content body is repeated factor times"""
+    match = re.search(r'<div class="available-content"[^>]*>', html)
+    if not match:
+        return html
+    # Find the matching </div> by counting nested divs
+    depth = 1
+    for tag in re.finditer(r'<div\b|</div>', html[match.end():]):
+        depth += 1 if tag.group(0) == '<div' else -1
+        if depth == 0:
+            break
+    else:
+        return html
+    start, end = match.end(), match.end() + tag.start()
+    return html[:start] + html[start:end] * factor + html[end:]
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify and benchmark the Substack cleaners')
+    parser.add_argument('slugs', nargs='*', help='Post slugs (default: every post in posts/)')
+    parser.add_argument('--offline', action='store_true', help='Only use cached pages')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs per post (best is kept)')
+    parser.add_argument('--scale', action='store_true', help='Also time the largest page repeated 1x..16x')
+    args = parser.parse_args()
+
+    if args.offline:
+        set_offline()
+
+    converter = load_converter()
+    journal = MigrationJournal()
+    streaming = quiet(converter.clean_substack_html)
+    regex = quiet(converter.clean_substack_html_regex)
+
+    slugs = args.slugs or sorted(f.stem for f in POSTS_DIR.glob('*.html') if not f.name.startswith('._'))
+    print(f"Comparing cleaners on {len(slugs)} posts\n")
+
+    pages = {}
+    matched = 0
+    differing = []
+    total_regex = total_streaming = 0.0
+
+    for slug in slugs:
+        try:
+            html = load_page(converter, journal, slug)
+        except Exception as e:
+            print(f"  ⏭️  {slug}: page unavailable ({e})")
+            continue
+        pages[slug] = html
+
+        old = regex(html)
+        new = streaming(html)
+        diffs = compare(old, new)
+
+        t_regex = best_time(regex, html, args.repeat)
+        t_streaming = best_time(streaming, html, args.repeat)
+        total_regex += t_regex
+        total_streaming += t_streaming
+        timing = f"{len(html) // 1024:>5} KB  regex {t_regex * 1000:7.2f} ms  streaming {t_streaming * 1000:7.2f} ms"
+
+        if diffs:
+            differing.append(slug)
+            print(f"  ✗ {slug:<50} {timing}  differs: {', '.join(diffs)}")
+            if 'text' in diffs:
+                before, after = first_difference(old['content'], new['content'])
+                print(f"      regex:     ...{before}...")
+                print(f"      streaming: ...{after}...")
+        else:
+            matched += 1
+            print(f"  ✓ {slug:<50} {timing}")
+
+    print(f"\n{'='*60}")
+    print(f"Identical output: {matched}/{len(pages)}")
+    if differing:
+        print(f"Differences to review ({len(differing)}): {', '.join(differing)}")
+    if pages:
+        print(f"Total time: regex {total_regex * 1000:.1f} ms, streaming {total_streaming * 1000:.1f} ms "
+              f"({total_regex / total_streaming:.1f}x)")
+
+    if args.scale and pages:
+        slug, html = max(pages.items(), key=lambda item: len(item[1]))
+        print(f"\nScaling on {slug}:")
+        for factor in SCALES:
+            page = scaled_page(html, factor)
+            t_regex = best_time(regex, page, args.repeat)
+            t_streaming = best_time(streaming, page, args.repeat)
+            print(f"  {factor:>2}x {len(page) // 1024:>6} KB  regex {t_regex * 1000:9.2f} ms  "
+                  f"streaming {t_streaming * 1000:9.2f} ms")
+
+if __name__ == '__main__':
+    main()
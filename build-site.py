@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Incremental site build: runs the post-rewriting steps in order, each one
+only on the posts whose inputs changed since that step last ran
+- standardize-posts re-renders through the post template (inputs: page,
+  template, keyword map entry, posts-data.json entry)
+- cleanup_blog_spacing, reduce_heading_spacing patch the pages' spacing
+  (inputs: page, script)
+- stamp_image_dimensions adds width/height/loading/decoding to the content
+  images (inputs: page, script, the images' size and mtime)
+- Posts nothing changed for are not rewritten, so a deploy only uploads
+  what really changed
+- --dirty prints what each step would rebuild and why, without building
+
+add_blog_container.py (not idempotent) and update_blog_fonts.py (drops the
+Roboto 100 weight the template and styles.css use) are one-off migrations
+for the old inline-style pages, not build steps.
+
+Usage:
+    python3 build-site.py [--dirty] [--force] [--posts DIR]
+"""
+
+import argparse
+import importlib.util
+from pathlib import Path
+
+from batch_runner import find_posts
+from build_manifest import BuildStep
+from image_index import get_image_index
+
+REPO_ROOT = Path(__file__).resolve().parent
+
+# (scripts, build step name, transform function, inputs), run after standardize-posts;
+# the first script defines the transform
+STYLE_STEPS = [
+    (['cleanup_blog_spacing.py'], 'cleanup-blog-spacing', 'cleanup_spacing', ()),
+    (['reduce_heading_spacing.py'], 'reduce-heading-spacing', 'reduce_heading_spacing', ()),
+    (['stamp_image_dimensions.py', 'image_index.py'], 'stamp-image-dimensions', 'stamp_post', ('images',)),
+]
+
+def load_script(name):
+    """Import a script by file name (hyphenated names are not importable)"""
+    path = REPO_ROOT / name
+    spec = importlib.util.spec_from_file_location(path.stem.replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild only the posts whose inputs changed')
+    parser.add_argument('--posts', default=str(REPO_ROOT / 'posts'), help='Posts directory (default: posts/)')
+    parser.add_argument('--dirty', action='store_true', help='Report dirty posts and why, build nothing')
+    parser.add_argument('--force', action='store_true', help='Rebuild every post')
+    args = parser.parse_args()
+    posts_dir = Path(args.posts)
+
+    print(f"\n{'='*60}\n🔧 standardize-posts\n{'='*60}")
+    load_script('standardize-posts.py').standardize_all(posts_dir, force=args.force, dry_run=args.dirty)
+
+    post_files = find_posts(posts_dir)
+    for scripts, name, function, depends in STYLE_STEPS:
+        print(f"\n{'='*60}\n🔧 {name}\n{'='*60}")
+        step = BuildStep(name, [REPO_ROOT / script for script in scripts], depends=depends)
+        step.run(post_files, getattr(load_script(scripts[0]), function), force=args.force, dry_run=args.dirty)
+    get_image_index().save()
+
+if __name__ == '__main__':
+    main()
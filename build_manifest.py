@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Incremental build manifest for the scripts that rewrite posts
+- Records, per build step and output file, the hashes of the inputs the
+  output was built from and of the output as written
+- An output is dirty when the step never built it, the file changed since
+  (source), or one of its inputs changed; check() says which
+- Inputs a step can depend on, besides its own script: the post template,
+  the post's keyword map entry (keyword-index.json), its image set (size
+  and mtime of every local image it references) and its posts-data.json
+  entry
+- Clean outputs are skipped without running the step; dirty ones are only
+  written back if the step actually changed them
+- Kept in .build-manifest.json (BUILD_MANIFEST to override)
+
+Usage:
+    from build_manifest import BuildStep
+    step = BuildStep('cleanup-spacing', [__file__])
+    step.run(post_files, transform, force='--force' in sys.argv, dry_run='--dirty' in sys.argv)
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent
+MANIFEST_PATH = Path(os.environ.get('BUILD_MANIFEST', REPO_ROOT / '.build-manifest.json'))
+MANIFEST_VERSION = 1
+INPUT_KINDS = ('template', 'keywords', 'images', 'posts_data')
+LOCAL_IMAGE_RE = re.compile(r'(?<=["\s,(])/(?:blog-images|images|blog-thumbnails)/[^"\'\s,?#)]+')
+
+def _atomic_write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def hash_text(text):
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+def hash_json(value):
+    return hash_text(json.dumps(value, sort_keys=True, ensure_ascii=False))
+
+def hash_file(path):
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except OSError:
+        return 'missing'
+
+class SiteInputs:
+    """Site-wide inputs of a build (keyword map, posts-data.json, template), loaded once"""
+
+    def __init__(self, root=REPO_ROOT):
+        self.root = Path(root)
+        self._posts_data = None
+        self._keywords = None
+        self._template = None
+
+    def _load_json(self, name, default):
+        try:
+            return json.loads((self.root / name).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return default
+
+    def posts_data_entry(self, slug):
+        """The post's posts-data.json entry, or None"""
+        if self._posts_data is None:
+            self._posts_data = {}
+            for entry in self._load_json('posts-data.json', []):
+                key = entry.get('slug') or Path(entry.get('url', '')).stem
+                self._posts_data.setdefault(key, entry)
+        return self._posts_data.get(slug)
+
+    def keyword_entry(self, slug):
+        """The post's keyword-index.json entry, or None"""
+        if self._keywords is None:
+            self._keywords = self._load_json('keyword-index.json', {}).get('posts', {})
+        return self._keywords.get(f'{slug}.html')
+
+    def template_hash(self):
+        if self._template is None:
+            self._template = hash_file(self.root / 'post_template.py')
+        return self._template
+
+    def image_set(self, html):
+        """(path, size, mtime) of every local image the page references"""
+        images = []
+        for url in sorted(set(LOCAL_IMAGE_RE.findall(html))):
+            try:
+                stat = (self.root / url.lstrip('/')).stat()
+                images.append((url, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                images.append((url, None, None))
+        return images
+
+    def hashes(self, kinds, slug, html):
+        """Input hashes of one post for the given input kinds"""
+        hashes = {}
+        for kind in kinds:
+            if kind == 'template':
+                hashes[kind] = self.template_hash()
+            elif kind == 'keywords':
+                hashes[kind] = hash_json(self.keyword_entry(slug))
+            elif kind == 'images':
+                hashes[kind] = hash_json(self.image_set(html))
+            elif kind == 'posts_data':
+                hashes[kind] = hash_json(self.posts_data_entry(slug))
+            else:
+                raise ValueError(f"Unknown build input {kind!r} (choose from {', '.join(INPUT_KINDS)})")
+        return hashes
+
+class BuildManifest:
+    """Per-step record of the inputs and output hash of every built file"""
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            data = {}
+        self.steps = data.get('steps', {}) if data.get('version') == MANIFEST_VERSION else {}
+
+    @staticmethod
+    def key(path):
+        path = Path(path).resolve()
+        try:
+            return str(path.relative_to(REPO_ROOT))
+        except ValueError:
+            return str(path)
+
+    def entry(self, step, path):
+        with self._lock:
+            return self.steps.get(step, {}).get(self.key(path))
+
+    def record(self, step, path, inputs, output_hash):
+        with self._lock:
+            self.steps.setdefault(step, {})[self.key(path)] = {'inputs': inputs, 'output': output_hash}
+
+    def save(self):
+        with self._lock:
+            text = json.dumps({'version': MANIFEST_VERSION, 'steps': self.steps}, indent=2, sort_keys=True)
+        _atomic_write(self.path, text)
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+def get_manifest():
+    """Return the process-wide BuildManifest"""
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            _manifest = BuildManifest()
+        return _manifest
+
+class BuildStep:
+    """One step that rewrites posts in place, skipped for posts whose inputs did not change"""
+
+    def __init__(self, name, scripts, depends=(), manifest=None, site=None):
+        self.name = name
+        self.depends = tuple(depends)
+        self.manifest = manifest or get_manifest()
+        self.site = site or SiteInputs()
+        self.script_hash = hash_text(''.join(hash_file(script) for script in scripts))
+
+    def inputs(self, path, text):
+        inputs = {'script': self.script_hash}
+        inputs.update(self.site.hashes(self.depends, Path(path).stem, text))
+        return inputs
+
+    def check(self, path, text):
+        """(reasons the output is dirty, current inputs); no reasons means clean"""
+        inputs = self.inputs(path, text)
+        entry = self.manifest.entry(self.name, path)
+        if entry is None:
+            return ['new'], inputs
+        reasons = []
+        if entry['output'] != hash_text(text):
+            reasons.append('source')
+        reasons += [name for name, digest in inputs.items() if entry['inputs'].get(name) != digest]
+        return reasons, inputs
+
+    def record(self, path, inputs, output_text):
+        self.manifest.record(self.name, path, inputs, hash_text(output_text))
+
+    def save(self):
+        self.manifest.save()
+
+    def run(self, paths, transform, force=False, dry_run=False):
+        """Rebuild the dirty posts with transform(text, path) -> text
+
+        Prints what is dirty and why; returns (rebuilt, unchanged, clean) path lists.
+        With dry_run only the report is printed.
+        """
+        rebuilt, unchanged, clean = [], [], []
+        for path in paths:
+            path = Path(path)
+            try:
+                text = path.read_text(encoding='utf-8', errors='ignore')
+            except OSError as e:
+                print(f'✗ Error reading {path.name}: {e}')
+                continue
+            reasons, inputs = self.check(path, text)
+            if force and not reasons:
+                reasons = ['forced']
+            if not reasons:
+                clean.append(path)
+                continue
+            if dry_run:
+                print(f'• {path.name}: {", ".join(reasons)}')
+                rebuilt.append(path)
+                continue
+
+            output = transform(text, path)
+            if output != text:
+                _atomic_write(path, output)
+                rebuilt.append(path)
+                print(f'✓ {path.name} ({", ".join(reasons)})')
+            else:
+                unchanged.append(path)
+            # Inputs read from the page (its images) are those of the page as written
+            self.record(path, self.inputs(path, output) if output != text else inputs, output)
+
+        if not dry_run:
+            self.save()
+            print(f'\n{self.name}: {len(rebuilt)} rewritten, {len(unchanged)} rebuilt with no change, '
+                  f'{len(clean)} clean (skipped)')
+        else:
+            print(f'\n{self.name}: {len(rebuilt)} dirty, {len(clean)} clean')
+        return rebuilt, unchanged, clean
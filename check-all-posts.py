@@ -9,6 +9,9 @@ Check all blog posts for content issues:
 import re
 from pathlib import Path
 
+from batch_runner import find_posts, run_batch
+from post_sections import PostSections
+
 def check_post(filepath):
     """Check a post for issues."""
     try:
@@ -20,18 +23,12 @@ def check_post(filepath):
     issues = []
 
     # Find post-content div
-    content_match = re.search(
-        r'<div class="post-content">(.*?)</div>\s*<a [^>]*class="back-link"',
-        content,
-        re.DOTALL
-    )
+    post_content = PostSections(content).text('content')
 
-    if not content_match:
+    if post_content is None:
         issues.append("No post-content div found")
         return issues
 
-    post_content = content_match.group(1)
-
     # Check for text paragraphs
     paragraphs = re.findall(r'<p>(?!<img)(.*?)</p>', post_content, re.DOTALL)
     text_paragraphs = [p for p in paragraphs if p.strip() and not p.strip().startswith('<img')]
@@ -59,8 +56,7 @@ def main():
 
     all_issues = {}
 
-    for post_file in sorted(posts_dir.glob('*.html')):
-        issues = check_post(post_file)
+    for post_file, issues in run_batch(check_post, find_posts(posts_dir)):
         if issues:
             all_issues[post_file.name] = issues
 
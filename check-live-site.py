@@ -3,39 +3,29 @@
 Check live Netlify site for broken posts (no images, no headlines, no content)
 """
 
-import urllib.request
-import ssl
 from pathlib import Path
-from bs4 import BeautifulSoup
 
-ssl_context = ssl.create_default_context()
-ssl_context.check_hostname = False
-ssl_context.verify_mode = ssl.CERT_NONE
+from http_client import fetch_text, get_client
+from post_document import post_from_html
 
 def check_live_post(slug):
     """Check if live post has headline, images, and content"""
     url = f"https://forbidden-yoga.com/posts/{slug}.html"
 
     try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, context=ssl_context, timeout=10) as response:
-            html = response.read().decode('utf-8')
+        html = fetch_text(url)
 
-        soup = BeautifulSoup(html, 'html.parser')
+        doc = post_from_html(html)
 
         # Check for headline
-        h1 = soup.find('h1', class_='post-title')
-        has_headline = bool(h1 and h1.get_text().strip())
+        has_headline = bool(doc.h1)
 
         # Check for images in content
-        content = soup.find('div', class_='post-content')
-        images = content.find_all('img') if content else []
+        images = doc.content_images()
         has_images = len(images) > 0
 
         # Check for text content
-        paragraphs = content.find_all('p') if content else []
-        text = ' '.join([p.get_text() for p in paragraphs])
-        word_count = len(text.split())
+        word_count = doc.word_count() if doc.content_root == 'post-content' else 0
         has_content = word_count > 50
 
         issues = []
@@ -77,6 +67,9 @@ def main():
     print(f"   Broken posts: {len(broken)}")
     print(f"   Working posts: {len(posts) - len(broken)}")
 
+    client = get_client()
+    print(f"   Connections: {client.connections_opened} for {client.requests_sent} requests")
+
     if broken:
         print(f"\n🔧 POSTS NEEDING FIXES:")
         for slug, issues in broken:
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Conformance check and benchmark for the html_parser backends
+- Document model: PostDocument of every post under each backend, compared
+  field by field with html.parser
+- Scripts: runs the audit and fix scripts on a copy of posts/ once per
+  backend (HTML_PARSER=...) and compares their output and the rewritten
+  posts with the html.parser run: byte-identical, or semantically equal
+  (same PostDocument when the result is re-read with html.parser)
+- Benchmark: per-post parse time (soup only, and parse + PostDocument)
+
+Only installed backends are checked.
+
+Usage:
+    python3 check-parser-backends.py [--backends lxml,selectolax] [--posts DIR] [--repeat N] [--no-scripts]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from html_parser import BACKENDS, DEFAULT_BACKEND, available_backends, make_soup
+from post_document import PostDocument
+
+REPO_ROOT = Path(__file__).resolve().parent
+POSTS_DIR = REPO_ROOT / 'posts'
+
+# Run in this order on the same copy of posts/, like a normal cleanup session
+SCRIPTS = [
+    ('seo-audit.py', []),
+    ('audit-all-posts.py', []),
+    ('fix-missing-h3.py', ['POSTS']),
+    ('fix-seo-tags.py', []),
+    ('deep-clean-posts.py', []),
+    ('seo-audit.py', []),
+]
+
+def post_files(posts_dir):
+    return sorted(f for f in Path(posts_dir).glob('*.html') if not f.name.startswith('._'))
+
+def read_post(path):
+    return path.read_text(encoding='utf-8')
+
+def model_diffs(reference, other):
+    """Names of the PostDocument fields that differ"""
+    ref, new = reference.to_dict(), other.to_dict()
+    return [name for name in PostDocument.FIELDS if ref[name] != new[name]]
+
+def check_models(posts, backends):
+    print(f"\n📄 Document model ({len(posts)} posts)")
+    reference = {post: PostDocument.from_html(read_post(post), DEFAULT_BACKEND) for post in posts}
+    ok = True
+    for backend in backends:
+        differing = {}
+        for post in posts:
+            diffs = model_diffs(reference[post], PostDocument.from_html(read_post(post), backend))
+            if diffs:
+                differing[post.name] = diffs
+        if differing:
+            ok = False
+            print(f"  ✗ {backend}: {len(posts) - len(differing)}/{len(posts)} equal")
+            for name, diffs in differing.items():
+                print(f"      {name}: {', '.join(diffs)}")
+        else:
+            print(f"  ✓ {backend}: {len(posts)}/{len(posts)} equal")
+    return ok
+
+def run_scripts(backend, posts_dir, workdir):
+    """Run SCRIPTS with one backend on a fresh copy of posts; returns their outputs"""
+    shutil.copytree(posts_dir, workdir / 'posts')
+    # The scripts are copied (they find posts/ next to themselves); the shared
+    # modules they import are loaded from the repo
+    for name in {script for script, _ in SCRIPTS}:
+        shutil.copy2(REPO_ROOT / name, workdir / name)
+    env = dict(os.environ, HTML_PARSER=backend, POST_CACHE_DIR=str(workdir / '.post-cache'),
+               PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get('PYTHONPATH')])))
+    posts = [str(f.relative_to(workdir)) for f in post_files(workdir / 'posts')]
+
+    outputs = []
+    for script, args in SCRIPTS:
+        args = [arg for template in args for arg in (posts if template == 'POSTS' else [template])]
+        result = subprocess.run([sys.executable, script] + args, cwd=workdir, env=env,
+                                capture_output=True, text=True)
+        outputs.append(result.stdout + result.stderr)
+    return outputs
+
+def compare_posts(reference_dir, other_dir):
+    """(identical, equivalent, differing names) for the rewritten posts"""
+    identical = equivalent = 0
+    differing = []
+    for ref in post_files(reference_dir):
+        other = other_dir / ref.name
+        if ref.read_bytes() == other.read_bytes():
+            identical += 1
+        elif not model_diffs(PostDocument.from_html(read_post(ref), DEFAULT_BACKEND),
+                             PostDocument.from_html(read_post(other), DEFAULT_BACKEND)):
+            equivalent += 1
+        else:
+            differing.append(ref.name)
+    return identical, equivalent, differing
+
+def check_scripts(posts_dir, backends):
+    print(f"\n🔧 Scripts on a copy of {posts_dir}")
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        runs = {}
+        for backend in [DEFAULT_BACKEND] + [b for b in backends if b != DEFAULT_BACKEND]:
+            runs[backend] = run_scripts(backend, posts_dir, tmp / backend)
+
+        for backend in backends:
+            if backend == DEFAULT_BACKEND:
+                continue
+            same_output = [script for (script, _), ref, out in zip(SCRIPTS, runs[DEFAULT_BACKEND], runs[backend])
+                           if ref == out]
+            identical, equivalent, differing = compare_posts(tmp / DEFAULT_BACKEND / 'posts', tmp / backend / 'posts')
+            ok = ok and len(same_output) == len(SCRIPTS) and not differing
+            mark = '✓' if len(same_output) == len(SCRIPTS) and not differing else '✗'
+            print(f"  {mark} {backend}: output identical for {len(same_output)}/{len(SCRIPTS)} runs, "
+                  f"posts {identical} identical / {equivalent} equivalent / {len(differing)} different")
+            for (script, _), ref, out in zip(SCRIPTS, runs[DEFAULT_BACKEND], runs[backend]):
+                if ref != out:
+                    print(f"      output differs: {script}")
+            for name in differing:
+                print(f"      post differs: {name}")
+    return ok
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def benchmark(posts, backends, repeat):
+    print(f"\n⏱️  Parse time per post (mean of best-of-{repeat}, {len(posts)} posts)")
+    pages = [read_post(post) for post in posts]
+    for backend in backends:
+        model = sum(best_time(lambda: PostDocument.from_html(html, backend), repeat) for html in pages)
+        if backend == 'selectolax':
+            soup = f"{'(no soup)':>10}"
+        else:
+            soup = f"{sum(best_time(lambda: make_soup(html, backend), repeat) for html in pages) / len(pages) * 1000:7.2f} ms"
+        print(f"  {backend:<12} soup {soup}   parse + model {model / len(pages) * 1000:7.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Check HTML parser backends against html.parser')
+    parser.add_argument('--backends', help=f"Comma-separated backends (default: every installed one of {', '.join(BACKENDS)})")
+    parser.add_argument('--posts', default=str(POSTS_DIR), help='Posts directory (default: posts/)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per post (best is kept)')
+    parser.add_argument('--no-scripts', action='store_true', help='Skip running the scripts')
+    args = parser.parse_args()
+
+    installed = available_backends()
+    backends = args.backends.split(',') if args.backends else installed
+    missing = [b for b in backends if b not in installed]
+    if missing:
+        print(f"⏭️  Not installed: {', '.join(missing)}")
+    backends = [b for b in backends if b in installed]
+
+    posts = post_files(args.posts)
+    print(f"Backends: {', '.join(backends)} (reference: {DEFAULT_BACKEND})")
+
+    ok = check_models(posts, backends)
+    if not args.no_scripts:
+        ok = check_scripts(Path(args.posts), backends) and ok
+    benchmark(posts, backends, args.repeat)
+
+    print(f"\n{'='*60}")
+    print("✅ All backends conform" if ok else "⚠️  Some backends differ from html.parser (see above)")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 """
 Check which Substack posts have Spotify audio
+Pages are revalidated through the on-disk HTTP cache (--offline: cache only)
 """
 
 import json
-import requests
-from bs4 import BeautifulSoup
-import time
+import sys
+
+from html_parser import make_soup
+from http_cache import cached_fetch, get_cache, set_offline
+
+if '--offline' in sys.argv:
+    set_offline()
 
 # Load Substack URL mapping
 with open('substack-url-mapping.json', 'r') as f:
@@ -28,9 +33,9 @@ for local_path, substack_url in mapping.items():
     print(f'Checking: {filename}...')
 
     try:
-        response = requests.get(substack_url, timeout=10)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
+        response = cached_fetch(substack_url)
+        if response.status == 200:
+            soup = make_soup(response.text())
 
             # Check for Spotify iframes
             spotify_iframes = soup.find_all('iframe', src=lambda x: x and 'spotify' in x.lower())
@@ -61,9 +66,9 @@ for local_path, substack_url in mapping.items():
             results['errors'].append({
                 'filename': filename,
                 'url': substack_url,
-                'error': f'HTTP {response.status_code}'
+                'error': f'HTTP {response.status}'
             })
-            print(f'  ⚠️  Error: HTTP {response.status_code}')
+            print(f'  ⚠️  Error: HTTP {response.status}')
 
     except Exception as e:
         results['errors'].append({
@@ -73,8 +78,6 @@ for local_path, substack_url in mapping.items():
         })
         print(f'  ⚠️  Error: {e}')
 
-    # Be nice to Substack servers
-    time.sleep(1)
     print()
 
 # Print summary
@@ -86,6 +89,7 @@ print(f'Total Substack posts checked: {results["total"]}')
 print(f'Posts WITH Spotify on Substack: {len(results["with_spotify"])}')
 print(f'Posts WITHOUT Spotify on Substack: {len(results["without_spotify"])}')
 print(f'Errors: {len(results["errors"])}')
+print(f'Cache: {get_cache().summary()}')
 print()
 
 if results['with_spotify']:
@@ -8,6 +8,9 @@ import re
 import subprocess
 from pathlib import Path
 from datetime import datetime
+from html import escape, unescape
+
+from post_template import SITE_URL, render_post
 
 def get_original_substack_html(slug):
     """Get original HTML from git history (first import)."""
@@ -89,7 +92,7 @@ def extract_clean_content(html):
         # Remove HTML tags
         p_clean = re.sub(r'<[^>]+>', '', p)
         # Decode entities
-        p_clean = p_clean.replace('&quot;', '"').replace('&amp;', '&').replace('&#39;', "'")
+        p_clean = unescape(p_clean)
         p_clean = p_clean.strip()
 
         # Skip very short or empty paragraphs
@@ -139,7 +142,7 @@ def build_clean_html(slug, title, subtitle, date, paragraphs, images):
 
         img_idx = 0
         for i, para in enumerate(paragraphs):
-            content_parts.append(f'            <p>{para}</p>')
+            content_parts.append(f'            <p>{escape(para, quote=False)}</p>')
 
             # Add image every N paragraphs
             if img_idx < len(remaining_images) and (i + 1) % img_interval == 0 and i < len(paragraphs) - 2:
@@ -153,78 +156,14 @@ def build_clean_html(slug, title, subtitle, date, paragraphs, images):
 
     content_html = '\n'.join(content_parts)
 
-    # Build full HTML
-    html = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title} | Forbidden Yoga</title>
-    <meta name="description" content="{subtitle[:160]}">
-    <meta name="keywords" content="tantra yoga, kundalini awakening, tantric healing, sacred sexuality, spiritual awakening, {slug.replace('-', ' ')}, forbidden yoga">
-    <link rel="stylesheet" href="/styles.css">
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link rel="stylesheet" href="/blog-post.css">
-    <link rel="canonical" href="https://forbidden-yoga.com/posts/{slug}.html">
-    <meta property="og:type" content="article">
-    <meta property="og:url" content="https://forbidden-yoga.com/posts/{slug}.html">
-    <meta property="og:title" content="{title} | Forbidden Yoga">
-    <meta property="og:description" content="{subtitle[:160]}">
-    <meta property="og:image" content="https://forbidden-yoga.com/images/{slug}-featured.jpg">
-    <meta property="og:site_name" content="Forbidden Yoga">
-    <meta property="article:author" content="Michael Perin Wogenburg">
-    <meta name="twitter:card" content="summary_large_image">
-    <meta name="twitter:title" content="{title}">
-    <meta name="twitter:description" content="{subtitle[:160]}">
-    <meta name="twitter:image" content="https://forbidden-yoga.com/images/{slug}-featured.jpg">
-    <script type="application/ld+json">
-{{
-  "@context": "https://schema.org",
-  "@type": "BlogPosting",
-  "headline": "{title}",
-  "description": "{subtitle[:160]}",
-  "image": "https://forbidden-yoga.com/blog-thumbnails/{slug}.png",
-  "author": {{
-    "@type": "Person",
-    "name": "Michael Perin Wogenburg"
-  }},
-  "publisher": {{
-    "@type": "Organization",
-    "name": "Forbidden Yoga"
-  }}
-}}
-    </script>
-    <link rel="icon" type="image/png" href="/favicon.png">
-</head>
-<body>
-    <article class="post-container">
-        <a href="/#blog-section" class="top-back-link">← Back to all posts</a>
-        <h1 class="post-title">{title}</h1>
-        <h3 class="post-subtitle">{subtitle}</h3>
-        <div class="post-meta">
-            <time>{date}</time>
-        </div>
-        <div class="post-content">
-{content_html}
-        </div>
-        <a href="/#blog-section" class="back-link">← Back to all posts</a>
-    </article>
-    <footer class="footer">
-        <div class="footer-email">love<span style="display:none">nospam</span>@<span style="display:none">antispam</span>forbidden-yoga.com</div>
-        <div class="footer-links">
-            <a href="/privacy.html">Privacy Policy</a>
-            <span>•</span>
-            <a href="/terms.html">Terms & Conditions</a>
-        </div>
-        <div class="footer-copyright">Spiritual Art Performance Project</div>
-    </footer>
-    <script src="/keyword-navigation.js"></script>
-</body>
-</html>
-'''
-
-    return html
+    return render_post({
+        'slug': slug,
+        'title': unescape(title),
+        'subtitle': unescape(subtitle),
+        'date_display': unescape(date),
+        'content': content_html,
+        'schema_image': f'{SITE_URL}/blog-thumbnails/{slug}.png',
+    })
 
 def migrate_post(slug, posts_dir, blog_images_dir):
     """Migrate a single post."""
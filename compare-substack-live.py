@@ -2,26 +2,22 @@
 """
 Compare content between Substack and live website for all 43 blog posts.
 Reports any discrepancies in content length.
+
+Substack pages go through the on-disk HTTP cache; pass --offline to
+compare against the cached copies without touching the network.
 """
 
-import urllib.request
-import ssl
 import json
+import sys
 from pathlib import Path
-from bs4 import BeautifulSoup
-import time
-
-# SSL context for Substack (bypasses age gate)
-ssl_context = ssl.create_default_context()
-ssl_context.check_hostname = False
-ssl_context.verify_mode = ssl.CERT_NONE
+from http_cache import cached_fetch_text, get_cache, set_offline
+from http_client import get_client
+from post_document import post_from_html
 
 def fetch_url(url):
-    """Fetch URL with User-Agent spoofing"""
-    req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+    """Fetch URL with User-Agent spoofing (cached, pooled keep-alive connection)"""
     try:
-        with urllib.request.urlopen(req, context=ssl_context, timeout=10) as response:
-            return response.read().decode('utf-8')
+        return cached_fetch_text(url)
     except Exception as e:
         return None
 
@@ -29,21 +25,17 @@ def count_words_from_html(html):
     """Extract text from HTML and count words"""
     if not html:
         return 0
-    soup = BeautifulSoup(html, 'html.parser')
+    doc = post_from_html(html)
 
-    # Find main content
-    content = soup.find('div', class_='post-content')
-    if not content:
-        content = soup.find('article')
-    if not content:
+    # Main content: div.post-content, else <article>
+    if not doc.content_root:
         return 0
-
-    # Get all paragraphs
-    paragraphs = content.find_all('p')
-    text = ' '.join([p.get_text() for p in paragraphs])
-    return len(text.split())
+    return doc.word_count()
 
 def main():
+    if '--offline' in sys.argv:
+        set_offline()
+
     posts_dir = Path('/Volumes/LaCie/CLAUDE/posts')
     # Filter out macOS hidden files
     posts = sorted([p for p in posts_dir.glob('*.html') if not p.name.startswith('._')])
@@ -87,8 +79,6 @@ def main():
             'status': status
         })
 
-        time.sleep(0.5)  # Rate limiting
-
     print("\r" + " " * 80 + "\r")  # Clear progress line
 
     # Print results
@@ -109,5 +99,10 @@ def main():
     print(f"   ❌ Missing/Incomplete: {missing}")
     print(f"   📝 Total: {len(results)}")
 
+    client = get_client()
+    print(f"\n🔌 {client.requests_sent} requests over {client.connections_opened} connections, {client.retries} retries")
+    print(f"⏱️  Rate: {client.rate_limiter.summary()}")
+    print(f"🗄️  Cache: {get_cache().summary()}")
+
 if __name__ == '__main__':
     main()
@@ -9,31 +9,86 @@ Complete blog post conversion script (SEODEEP)
 - Applies blog-post.css styling
 - Adds keyword section
 - Updates OG tags with correct featured image
+- Batch mode: converts many posts concurrently in one process, journaling
+  each stage so an interrupted run can be resumed (--resume / --only-failed)
 """
 
-import urllib.request
-import urllib.parse
 import re
 import json
 import os
 import sys
-import subprocess
-import ssl
+import io
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
 from html import unescape
+from html.parser import HTMLParser
 from datetime import datetime
 
-# Create SSL context that doesn't verify certificates
-ssl_context = ssl.create_default_context()
-ssl_context.check_hostname = False
-ssl_context.verify_mode = ssl.CERT_NONE
+from http_client import download_to_file, fetch_text
+from image_index import stamp_images
+from image_pipeline import open_image
+from image_store import get_store
+from migration_journal import MigrationJournal
+from page_metadata import page_metadata
+from post_template import render_post
+from url_rewriter import URLRewriter, parse_srcset, substack_image_key
+
+SUBSTACK_BASE_URL = 'https://forbiddenyoga.substack.com'
+DEFAULT_CONCURRENCY = 8
+IMAGE_WORKERS = 6
+POSTER_QUALITY = 95  # JPEG quality of the JW Player featured image / thumbnail (ffmpeg -q:v 2)
+
+class ThreadLogRouter:
+    """Stand-in for sys.stdout that gives each batch worker its own log buffer
+
+    Threads without an active capture write straight through to the real
+    stream, so single-post runs behave exactly as before.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            return buffer.write(text)
+        with self._lock:
+            return self._stream.write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def emit(self, text):
+        """Write a finished block to the real stream without interleaving"""
+        with self._lock:
+            self._stream.write(text)
+            self._stream.flush()
+
+    @contextmanager
+    def capture(self):
+        self._local.buffer = io.StringIO()
+        try:
+            yield self._local.buffer
+        finally:
+            self._local.buffer = None
 
 def fetch_post_html(url):
     """Fetch individual post HTML from Substack"""
     print(f"Fetching post from: {url}")
-    req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-    with urllib.request.urlopen(req, context=ssl_context) as response:
-        return response.read().decode('utf-8')
+    return fetch_text(url)
+
+def normalize_post_url(target):
+    """Accept a Substack post URL or a bare slug and return the post URL"""
+    target = target.strip()
+    if target.startswith('http'):
+        return target
+    return f"{SUBSTACK_BASE_URL}/p/{target.strip('/')}"
 
 def extract_slug_from_url(url):
     """Extract slug from Substack URL"""
@@ -44,12 +99,8 @@ def extract_slug_from_url(url):
         return slug
     return None
 
-def download_image(image_url, slug, img_index):
-    """Download image and save locally"""
-    blog_images_dir = Path('/Volumes/LaCie/CLAUDE/blog-images')
-    blog_images_dir.mkdir(exist_ok=True)
-
-    # Create filename
+def image_filename(image_url, slug, img_index):
+    """Local filename for the Nth image of a post"""
     ext = '.jpg'  # Default to jpg
     if image_url.endswith('.png'):
         ext = '.png'
@@ -58,23 +109,45 @@ def download_image(image_url, slug, img_index):
     elif image_url.endswith('.gif'):
         ext = '.gif'
 
-    local_filename = f"{slug}-img-{img_index}{ext}"
-    local_path = blog_images_dir / local_filename
-
-    try:
-        print(f"  Downloading image {img_index}: {image_url[:80]}...")
-        req = urllib.request.Request(image_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, context=ssl_context) as response:
-            image_data = response.read()
+    return f"{slug}-img-{img_index}{ext}"
+
+def download_images(jobs, slug, max_workers=IMAGE_WORKERS):
+    """Download (image_url, img_index) jobs through a bounded worker pool
+
+    Images go through the shared content-addressed store, so URLs and
+    bytes it already holds are not downloaded or written again. Workers
+    only fetch and write; all printing happens here, in job order, so logs
+    and image_map are deterministic regardless of which download finishes
+    first. Returns (image_map, failures) where failures maps image_url ->
+    error message. Failed URLs map to themselves, as before.
+    """
+    store = get_store()
+
+    def worker(job):
+        image_url, img_index = job
+        try:
+            local_url, _, downloaded = store.fetch(image_url, image_filename(image_url, slug, img_index), slug)
+            return local_url, downloaded, None
+        except Exception as e:
+            return None, False, e
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        outcomes = list(executor.map(worker, jobs))
+
+    image_map = {}
+    failures = {}
+    for (image_url, img_index), (local_url, downloaded, error) in zip(jobs, outcomes):
+        if error is None:
+            note = '' if downloaded else ' (already stored)'
+            print(f"  ✓ Image {img_index}: {local_url}{note}")
+            image_map[image_url] = local_url
+        else:
+            print(f"  ✗ Image {img_index} failed: {image_url[:80]} ({error})")
+            image_map[image_url] = image_url  # Keep original URL if download fails
+            failures[image_url] = str(error)
 
-        with open(local_path, 'wb') as f:
-            f.write(image_data)
-
-        print(f"  ✓ Saved to: {local_filename}")
-        return f"/blog-images/{local_filename}"
-    except Exception as e:
-        print(f"  ✗ Error downloading image: {e}")
-        return image_url  # Return original URL if download fails
+    store.save()
+    return image_map, failures
 
 def detect_jwplayer_video(html_content):
     """Detect JW Player video links at end of Substack post"""
@@ -97,50 +170,33 @@ def download_jwplayer_poster(media_id, slug):
 
     # Fetch JW Player metadata
     metadata_url = f"https://cdn.jwplayer.com/v2/media/{media_id}"
-    req = urllib.request.Request(metadata_url, headers={'User-Agent': 'Mozilla/5.0'})
 
     try:
-        with urllib.request.urlopen(req, context=ssl_context) as response:
-            metadata = json.loads(response.read().decode('utf-8'))
+        metadata = json.loads(fetch_text(metadata_url))
 
         # Get highest quality poster image
         poster_url = f"https://cdn.jwplayer.com/v2/media/{media_id}/poster.jpg?width=1920"
         print(f"  Downloading JW Player poster: {poster_url}")
 
-        # Download to temp file
-        temp_poster = '/tmp/jwplayer-poster.jpg'
-        req = urllib.request.Request(poster_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, context=ssl_context) as response:
-            poster_data = response.read()
-
-        with open(temp_poster, 'wb') as f:
-            f.write(poster_data)
-
-        print(f"  ✓ Downloaded poster: {len(poster_data)} bytes")
-
-        # Create featured image (1000px max)
-        featured_path = f'/Volumes/LaCie/CLAUDE/images/{slug}-featured.jpg'
-        subprocess.run([
-            'ffmpeg', '-i', temp_poster,
-            '-vf', "scale='min(1000,iw)':'min(1000*ih/iw,ih)':force_original_aspect_ratio=decrease",
-            '-q:v', '2',
-            '-update', '1',
-            featured_path, '-y'
-        ], capture_output=True, check=True)
-
-        print(f"  ✓ Created featured image: {featured_path}")
-
-        # Create thumbnail (600px max)
-        thumbnail_path = f'/Volumes/LaCie/CLAUDE/blog-thumbnails/{slug}.jpg'
-        subprocess.run([
-            'ffmpeg', '-i', temp_poster,
-            '-vf', 'scale=600:600:force_original_aspect_ratio=decrease',
-            '-q:v', '2',
-            '-update', '1',
-            thumbnail_path, '-y'
-        ], capture_output=True, check=True)
-
-        print(f"  ✓ Created thumbnail: {thumbnail_path}")
+        # Download to temp file (one per slug so batch workers don't collide)
+        temp_poster = f'/tmp/jwplayer-poster-{slug}.jpg'
+        poster = download_to_file(poster_url, temp_poster)
+
+        print(f"  ✓ Downloaded poster: {poster.size} bytes")
+
+        # Decode the poster once for both sizes
+        with open_image(temp_poster) as poster_image:
+            # Create featured image (1000px max)
+            featured_path = f'/Volumes/LaCie/CLAUDE/images/{slug}-featured.jpg'
+            poster_image.save(featured_path, max_width=1000, quality=POSTER_QUALITY)
+
+            print(f"  ✓ Created featured image: {featured_path}")
+
+            # Create thumbnail (fit into 600x600)
+            thumbnail_path = f'/Volumes/LaCie/CLAUDE/blog-thumbnails/{slug}.jpg'
+            poster_image.save(thumbnail_path, max_dim=600, quality=POSTER_QUALITY, upscale=True)
+
+            print(f"  ✓ Created thumbnail: {thumbnail_path}")
 
         # Delete temp file
         os.remove(temp_poster)
@@ -153,10 +209,11 @@ def download_jwplayer_poster(media_id, slug):
         return None
 
 def extract_and_download_images(html_content, slug):
-    """Extract all images from HTML and download them locally"""
-    image_map = {}  # Original URL -> Local URL
-    img_counter = 0
+    """Extract all images from HTML and download them locally
 
+    Returns (image_map, featured_image_url); image_map maps original URL ->
+    local URL in document order.
+    """
     # Check for JW Player video first
     jw_media_id = detect_jwplayer_video(html_content)
     featured_image_url = None
@@ -165,45 +222,303 @@ def extract_and_download_images(html_content, slug):
         print("\n--- JW Player Video Detected ---")
         featured_image_url = download_jwplayer_poster(jw_media_id, slug)
 
+    # Collect image URLs in document order; indices match the old serial numbering
+    jobs = []
+    seen = set()
+
     # Find all image URLs in src attributes
     img_pattern = r'<img[^>]+src="([^"]+)"[^>]*>'
     for match in re.finditer(img_pattern, html_content):
         img_url = match.group(1)
 
         # Skip if already processed
-        if img_url in image_map:
+        if img_url in seen:
             continue
 
-        # Skip tiny images (avatars, icons)
-        if 'w_32' in img_url or 'w_36' in img_url or 'w_48' in img_url:
-            local_path = download_image(img_url, slug, img_counter)
-            image_map[img_url] = local_path
-            img_counter += 1
-            continue
-
-        # Download and map
-        if img_url.startswith('http'):
-            local_path = download_image(img_url, slug, img_counter)
-            image_map[img_url] = local_path
-            img_counter += 1
+        # Tiny images (avatars, icons) are still downloaded so their URLs get rewritten
+        if 'w_32' in img_url or 'w_36' in img_url or 'w_48' in img_url or img_url.startswith('http'):
+            seen.add(img_url)
+            jobs.append((img_url, len(jobs)))
 
     # Also check picture/source tags
     source_pattern = r'<source[^>]+srcset="([^"]+)"[^>]*>'
     for match in re.finditer(source_pattern, html_content):
-        srcset = match.group(1)
-        # Extract first URL from srcset
-        urls = re.findall(r'(https?://[^\s,]+)', srcset)
-        for url in urls:
-            if url not in image_map and url.startswith('http'):
-                local_path = download_image(url, slug, img_counter)
-                image_map[url] = local_path
-                img_counter += 1
+        # Extract first URL from srcset (Substack URLs contain commas, so parse it properly)
+        for url, _ in parse_srcset(match.group(1)):
+            if url not in seen and url.startswith('http'):
+                seen.add(url)
+                jobs.append((url, len(jobs)))
                 break  # Only download first quality variant
 
+    print(f"  Downloading {len(jobs)} images ({IMAGE_WORKERS} at a time)...")
+    image_map, failures = download_images(jobs, slug)
+
+    if failures:
+        print(f"  ! {len(failures)} of {len(jobs)} images failed and keep their Substack URLs")
+
     return image_map, featured_image_url
 
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+                 'param', 'source', 'track', 'wbr'}
+CONTENT_ROOT_CLASSES = ('available-content', 'body markup')
+DROP_DIV_CLASSES = ('visibility-check', 'pencraft', 'byline', 'post-ufi', 'subscription-widget')
+BARE_TAGS = {'p', 'h1', 'h2', 'h3', 'h4', 'div', 'span'}
+EMPTY_DROP_TAGS = {'p', 'div', 'span'}
+IMG_SRC_RE = re.compile(r'\ssrc="([^"]+)"')
+PODCAST_FALLBACK_CONTENT = '<p>Listen to this episode to explore these themes.</p>'
+
+class SubstackPageParser(HTMLParser):
+    """One streaming pass over a Substack post page
+
+    Collects the title, subtitle and date text, and re-serializes
+    the post body (div.available-content, or div.body.markup) with the
+    Substack UI stripped. Elements are tracked on a stack, so nested divs
+    close where they really close instead of at the first </div>.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.stack = []          # open elements: [tag, kind, buffer]
+        self.open_tags = Counter()
+        self.buffers = []        # output buffers of the buffered elements on the stack
+        self.root = None         # stack entry of the content root while inside it
+        self.dropping = 0        # depth inside removed UI subtrees
+        self.collectors = {}     # name -> [depth, parts, has_tags] for metadata text
+        self.texts = {}          # finished metadata text (raw, entities not decoded)
+        self.content = None
+        self.date_iso = None
+        self.date_iso_candidate = None
+
+    def _emit(self, text):
+        """Write to the nearest buffered ancestor, if inside the post body"""
+        if self.root is not None and not self.dropping:
+            self.buffers[-1].append(text)
+
+    # Metadata collectors
+
+    def _collect(self, name, depth):
+        if name not in self.texts and name not in self.collectors:
+            self.collectors[name] = [depth, [], False]
+
+    def _collect_text(self, text):
+        for collector in self.collectors.values():
+            collector[1].append(text)
+
+    def _start_metadata(self, tag, attrs, depth):
+        for collector in self.collectors.values():
+            collector[2] = True
+        classes = attrs.get('class') or ''
+        if tag == 'h2' and 'pencraft' in classes and 'title' in classes[classes.index('pencraft'):]:
+            self._collect('h2_title', depth)
+        elif tag == 'title':
+            self._collect('title', depth)
+        elif tag == 'div' and 'subtitle' in classes:
+            self._collect('subtitle', depth)
+        elif tag == 'div' and 'meta' in classes and 'date_meta' not in self.texts:
+            self.collectors['date_meta'] = [depth, [], False]
+        elif tag == 'time' and attrs.get('datetime') and 'time' not in self.texts:
+            self.collectors['time'] = [depth, [], False]
+            self.date_iso_candidate = attrs['datetime']
+
+    def _end_metadata(self, depth):
+        for name, (start_depth, parts, has_tags) in list(self.collectors.items()):
+            if start_depth != depth:
+                continue
+            del self.collectors[name]
+            text = ''.join(parts)
+            if name in ('time', 'date_meta'):
+                # Only elements holding plain text count as the post date
+                if not has_tags and text:
+                    self.texts[name] = text
+                    if name == 'time':
+                        self.date_iso = self.date_iso_candidate
+            else:
+                self.texts[name] = text
+
+    # HTMLParser callbacks
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, void=tag in VOID_ELEMENTS)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, void=True)
+
+    def _start(self, tag, attrs, void):
+        attrs = dict(attrs)
+        depth = len(self.stack)
+        self._start_metadata(tag, attrs, depth)
+        raw = self.get_starttag_text()
+        classes = attrs.get('class') or ''
+        kind, buffer = None, None
+
+        if self.root is None:
+            if self.content is None and tag == 'div' and classes in CONTENT_ROOT_CLASSES:
+                kind, buffer = 'root', []
+        elif self.dropping:
+            kind = 'drop'
+        elif tag == 'button' or (tag == 'div' and any(c in classes for c in DROP_DIV_CLASSES)):
+            kind = 'drop'
+        elif tag == 'img':
+            src = IMG_SRC_RE.search(raw)
+            self._emit(f'<img src="{src.group(1)}" alt="">' if src else raw)
+        elif tag == 'div' and 'native-video-embed' in classes:
+            kind, buffer = 'video', []
+        elif tag in ('iframe', 'video') and self._video_frame() is not None:
+            kind, buffer = 'embed', [raw]
+        elif tag in BARE_TAGS and ('pencraft' in classes or attrs.get('dir') == 'auto' or raw == f'<{tag}>'):
+            if tag in EMPTY_DROP_TAGS:
+                kind, buffer = 'bare', []
+            else:
+                self._emit(f'<{tag}>')
+        else:
+            self._emit(raw)
+
+        if void:
+            return
+        self.stack.append([tag, kind, buffer])
+        self.open_tags[tag] += 1
+        if buffer is not None:
+            self.buffers.append(buffer)
+        if kind == 'root':
+            self.root = self.stack[-1]
+        elif kind == 'drop':
+            self.dropping += 1
+
+    def _video_frame(self):
+        for entry in reversed(self.stack):
+            if entry[1] == 'video':
+                return entry
+        return None
+
+    def handle_endtag(self, tag):
+        if not self.open_tags[tag]:
+            if tag not in VOID_ELEMENTS:
+                self._emit(f'</{tag}>')
+            return
+        # Close everything left open inside tag, then tag itself
+        while self.stack:
+            entry = self._pop()
+            if entry[0] == tag:
+                break
+
+    def _pop(self):
+        entry = self.stack.pop()
+        self.open_tags[entry[0]] -= 1
+        if entry[2] is not None:
+            self.buffers.pop()
+        if self.collectors:
+            self._end_metadata(len(self.stack))
+        self._close(entry)
+        return entry
+
+    def _close(self, entry):
+        tag, kind, buffer = entry[:3]
+        if kind == 'drop':
+            self.dropping -= 1
+        elif kind == 'root':
+            self.content = ''.join(buffer)
+            self.root = None
+        elif kind == 'bare':
+            inner = ''.join(buffer)
+            if inner.strip():
+                self._emit(f'<{tag}>{inner}</{tag}>')
+        elif kind == 'embed':
+            element = ''.join(buffer) + f'</{tag}>'
+            video = self._video_frame()
+            if video is not None and len(video) == 3:
+                video.append(element)  # first iframe/video replaces the whole embed div
+            self._emit(element)
+        elif kind == 'video':
+            self._emit(entry[3] if len(entry) > 3 else ''.join(buffer))
+        elif self.root is not None and tag not in VOID_ELEMENTS:
+            self._emit(f'</{tag}>')
+
+    def handle_data(self, data):
+        self._collect_text(data)
+        self._emit(data)
+
+    def handle_entityref(self, name):
+        self._collect_text(f'&{name};')
+        self._emit(f'&{name};')
+
+    def handle_charref(self, name):
+        self._collect_text(f'&#{name};')
+        self._emit(f'&#{name};')
+
+    def handle_comment(self, data):
+        self._emit(f'<!--{data}-->')
+
+    def close(self):
+        super().close()
+        while self.stack:
+            self._pop()
+
 def clean_substack_html(html_content):
-    """Remove all Substack-specific HTML/CSS and extract clean content"""
+    """Remove all Substack-specific HTML/CSS and extract clean content
+
+    Single linear pass with SubstackPageParser, JSON-LD from the shared
+    page_metadata record; clean_substack_html_regex is the previous
+    implementation, kept for bench-substack-cleaner.py.
+    """
+    page = SubstackPageParser()
+    page.feed(html_content)
+    page.close()
+    jsonld = page_metadata(html_content).jsonld
+    metadata = jsonld or {}
+
+    # Title from the post header, <title>, or JSON-LD headline
+    title = page.texts.get('h2_title') or page.texts.get('title') or ''
+    title = unescape(title.replace(' | Forbidden Yoga', '').strip())
+    if not title:
+        title = metadata.get('headline') or 'Untitled'
+
+    # Subtitle from HTML, or a short JSON-LD description
+    subtitle = unescape(page.texts.get('subtitle', '').strip())
+    if not subtitle:
+        desc = metadata.get('description', '')
+        if desc and len(desc) < 100:  # Short descriptions are likely subtitles
+            subtitle = desc
+
+    # Date
+    if 'time' in page.texts:
+        date_iso = page.date_iso
+        date_display = page.texts['time']
+    else:
+        date_display = page.texts.get('date_meta', '').strip()
+        date_iso = datetime.now().isoformat() + 'Z'
+
+    # Check if this is a podcast post
+    is_podcast = 'class="typography podcast-post post' in html_content or '"@type":"NewsArticle"' in html_content
+
+    main_content = page.content or ''
+
+    # If content is empty/minimal and this is a podcast, use the JSON-LD description
+    podcast_fallback = len(main_content.strip()) < 100 and is_podcast
+    if podcast_fallback:
+        print("  ! Podcast post with no article content - extracting description from metadata")
+        if jsonld is not None:
+            description = metadata.get('description', '')
+            if description:
+                main_content = f'<p>{description}</p>'
+            elif subtitle:
+                main_content = f'<p>{subtitle}</p>'
+            else:
+                main_content = PODCAST_FALLBACK_CONTENT
+            print(f"  ✓ Extracted podcast description: {len(description)} chars")
+        else:
+            main_content = PODCAST_FALLBACK_CONTENT
+
+    return {
+        'title': title,
+        'subtitle': subtitle,
+        'date_iso': date_iso,
+        'date_display': date_display,
+        'content': main_content.strip(),
+        'podcast_fallback': podcast_fallback
+    }
+
+def clean_substack_html_regex(html_content):
+    """Regex version of clean_substack_html (reference for bench-substack-cleaner.py)"""
 
     # Extract title from HTML or fallback to JSON-LD metadata
     title_match = re.search(r'<h2[^>]*class="[^"]*pencraft[^"]*title[^"]*"[^>]*>(.*?)</h2>', html_content, re.DOTALL)
@@ -276,7 +591,8 @@ def clean_substack_html(html_content):
         main_content = content_match.group(1) if content_match else ''
 
     # If content is empty/minimal and this is a podcast, extract description from JSON-LD metadata
-    if (not main_content or len(main_content.strip()) < 100) and is_podcast:
+    podcast_fallback = (not main_content or len(main_content.strip()) < 100) and is_podcast
+    if podcast_fallback:
         print("  ! Podcast post with no article content - extracting description from metadata")
         # Extract description from JSON-LD structured data
         jsonld_match = re.search(r'<script type="application/ld\+json">(.*?)</script>', html_content, re.DOTALL)
@@ -335,16 +651,17 @@ def clean_substack_html(html_content):
         'subtitle': subtitle,
         'date_iso': date_iso,
         'date_display': date_display,
-        'content': main_content.strip()
+        'content': main_content.strip(),
+        'podcast_fallback': podcast_fallback
     }
 
 def create_full_blog_post_html(post_data, slug, image_map, featured_image_url=None, keywords=None):
     """Create complete blog post HTML with blog-post.css styling"""
 
-    # Replace image URLs in content
-    content = post_data['content']
-    for original_url, local_url in image_map.items():
-        content = content.replace(original_url, local_url)
+    # Replace image URLs in content (one pass; srcset variants map to the same local image)
+    content = URLRewriter(image_map, key=substack_image_key).rewrite(post_data['content'])
+    # Dimensions and loading hints of the now-local images (read from their headers)
+    content = stamp_images(content)
 
     # Generate meta description from first paragraph
     description_match = re.search(r'<p>(.*?)</p>', content, re.DOTALL)
@@ -362,155 +679,60 @@ def create_full_blog_post_html(post_data, slug, image_map, featured_image_url=No
         if not og_image.startswith('http'):
             og_image = f'https://forbidden-yoga.com{og_image}'
 
-    # Create keywords section HTML
-    keywords_html = ''
-    if keywords and len(keywords) > 0:
-        keywords_html = '''
-        <div class="post-keywords">
-            <h3>Keywords</h3>
-            <div class="keyword-cloud">
-'''
-        for keyword in keywords:
-            keywords_html += f'            <span class="keyword-tag clickable-keyword" data-keyword="{keyword}">{keyword}</span>\n'
-
-        keywords_html += '''            </div>
-        </div>
-'''
-
-    # Build HTML
-    html = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{post_data['title']} | Forbidden Yoga</title>
-    <meta name="description" content="{description}">
-    <meta name="keywords" content="tantra yoga, kundalini awakening, tantric healing, sacred sexuality, spiritual awakening, energy healing, chakra healing, breathwork, conscious touch, embodied spirituality, somatic healing, sensual liberation, {slug.replace('-', ' ')}, forbidden yoga">
-    <link rel="stylesheet" href="../styles.css">
-        <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Playfair+Display:wght@700&family=Roboto:wght@100;400&display=swap" rel="stylesheet">
-
-<link rel="stylesheet" href="../blog-post.css">
-
-    <!-- Canonical URL -->
-    <link rel="canonical" href="https://forbidden-yoga.com/posts/{slug}.html">
-
-    <!-- Open Graph / Facebook -->
-    <meta property="og:type" content="article">
-    <meta property="og:url" content="https://forbidden-yoga.com/posts/{slug}.html">
-    <meta property="og:title" content="{post_data['title']} | Forbidden Yoga">
-    <meta property="og:description" content="{description}">
-    <meta property="og:image" content="{og_image}">
-    <meta property="og:site_name" content="Forbidden Yoga">
-    <meta property="article:published_time" content="{post_data['date_iso']}">
-    <meta property="article:author" content="Michael Perin Wogenburg">
-    <meta property="article:section" content="Tantra Yoga">
-
-    <!-- Twitter -->
-    <meta name="twitter:card" content="summary_large_image">
-    <meta name="twitter:url" content="https://forbidden-yoga.com/posts/{slug}.html">
-    <meta name="twitter:title" content="{post_data['title']}">
-    <meta name="twitter:description" content="{description}">
-    <meta name="twitter:image" content="{og_image}">
-    <!-- Structured Data -->
-    <script type="application/ld+json">
-{{
-  "@context": "https://schema.org",
-  "@type": "BlogPosting",
-  "headline": "{post_data['title']}",
-  "description": "{description}",
-  "image": "{og_image}",
-  "author": {{
-    "@type": "Person",
-    "name": "Michael Perin Wogenburg",
-    "url": "https://forbidden-yoga.com",
-    "jobTitle": "Kundalini Yoga Teacher & Tantric Healing Practitioner"
-  }},
-  "publisher": {{
-    "@type": "Organization",
-    "name": "Forbidden Yoga",
-    "logo": {{
-      "@type": "ImageObject",
-      "url": "https://forbidden-yoga.com/forbidden-yoga-logo-white.png"
-    }}
-  }},
-  "datePublished": "{post_data['date_iso']}",
-  "dateModified": "{post_data['date_iso']}",
-  "mainEntityOfPage": {{
-    "@type": "WebPage",
-    "@id": "https://forbidden-yoga.com/posts/{slug}.html"
-  }},
-  "keywords": "tantra yoga, kundalini, spiritual practice, forbidden yoga, tantric healing"
-}}
-    </script>
-    <link rel="icon" type="image/png" href="../favicon.png">
-</head>
-<body>
-    <article class="post-container">
-        <a href="/#blog-section" class="top-back-link">← Back to all posts</a>
-
-        <h1>{post_data['title']}</h1>'''
-
-    if post_data.get('subtitle'):
-        html += f'''
-        <h3 class="post-subtitle">{post_data['subtitle']}</h3>'''
-
-    html += f'''
-        <div class="post-meta">
-            <time>{post_data['date_display']}</time>
-        </div>
-        <div class="post-content">
-            {content}
-        </div>
-{keywords_html}
-        <a href="/#blog-section" class="back-link">← Back to all posts</a>
-    </article>
-
-    <footer class="footer">
-        <div class="footer-email">love<span style="display:none">nospam</span>@<span style="display:none">antispam</span>forbidden-yoga.com</div>
-        <div class="footer-links">
-            <a href="/privacy.html">Privacy Policy</a>
-            <span>•</span>
-            <a href="/terms.html">Terms & Conditions</a>
-        </div>
-        <div class="footer-copyright">Spiritual Art Performance Project</div>
-    </footer>
-
-    <script src="/keyword-navigation.js"></script>
-</body>
-</html>
-'''
-
-    return html
-
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 convert-blog-post-full.py <substack-url> [keyword1,keyword2,...]")
-        print("Example: python3 convert-blog-post-full.py https://forbiddenyoga.substack.com/p/my-post \"Shadow Work,Kundalini,Tantra\"")
-        sys.exit(1)
-
-    url = sys.argv[1]
-    keywords = []
-    if len(sys.argv) >= 3:
-        keywords = [k.strip() for k in sys.argv[2].split(',')]
+    return render_post({
+        'slug': slug,
+        'title': post_data['title'],
+        'subtitle': post_data.get('subtitle', ''),
+        'description': description,
+        'date_iso': post_data['date_iso'],
+        'date_display': unescape(post_data['date_display']),
+        'content': content,
+        'og_image': og_image,
+        'keywords': keywords,
+    })
+
+def convert_post(url, keywords=None, journal=None):
+    """Run fetch, image download, clean and render for one post
+
+    Returns a summary dict; raises on fetch errors so callers can decide
+    whether one failure should stop the run. With a journal, each stage is
+    recorded as it completes and stages already journaled (fetched page,
+    downloaded images) are reused instead of being redone.
+    """
+    keywords = keywords or []
 
     # Extract slug
     slug = extract_slug_from_url(url)
     if not slug:
-        print("Error: Could not extract slug from URL")
-        sys.exit(1)
+        raise ValueError(f"Could not extract slug from URL: {url}")
 
     print(f"\n{'='*60}")
     print(f"Converting blog post: {slug}")
     print(f"{'='*60}\n")
 
     # Fetch HTML
-    html_content = fetch_post_html(url)
+    html_content = None
+    if journal and journal.has_reached(slug, 'fetched'):
+        html_content = journal.load_page(slug)
+        if html_content is not None:
+            print(f"↻ Resuming: using journaled copy of {url}")
+    if html_content is None:
+        html_content = fetch_post_html(url)
+        if journal:
+            journal.save_page(slug, html_content)
+            journal.record(slug, 'fetched', url=url)
 
     # Download images (and JW Player poster if present)
     print("\n--- Downloading Images ---")
-    image_map, featured_image_url = extract_and_download_images(html_content, slug)
+    if journal and journal.has_reached(slug, 'images'):
+        details = journal.details(slug)
+        image_map = details.get('image_map', {})
+        featured_image_url = details.get('featured_image_url')
+        print(f"↻ Resuming: {len(image_map)} images already downloaded")
+    else:
+        image_map, featured_image_url = extract_and_download_images(html_content, slug)
+        if journal:
+            journal.record(slug, 'images', image_map=image_map, featured_image_url=featured_image_url)
     print(f"Downloaded {len(image_map)} images\n")
 
     if featured_image_url:
@@ -523,20 +745,171 @@ def main():
     print(f"Date: {post_data['date_display']}")
     if post_data.get('subtitle'):
         print(f"Subtitle: {post_data['subtitle']}")
+    if journal:
+        journal.record(slug, 'cleaned', title=post_data['title'])
 
     # Create final HTML
     print("\n--- Generating Blog Post HTML ---")
     final_html = create_full_blog_post_html(post_data, slug, image_map, featured_image_url, keywords)
+    if journal:
+        journal.record(slug, 'rendered')
 
     # Write to file
     output_path = Path(f'/Volumes/LaCie/CLAUDE/posts/{slug}.html')
     output_path.write_text(final_html, encoding='utf-8')
+    if journal:
+        journal.record(slug, 'written', output_path=str(output_path))
+
+    return {
+        'slug': slug,
+        'url': url,
+        'title': post_data['title'],
+        'output_path': output_path,
+        'images': len(image_map),
+        'featured_image_url': featured_image_url,
+        'age_restricted': post_data['podcast_fallback']
+    }
+
+def convert_posts(targets, keywords=None, concurrency=DEFAULT_CONCURRENCY, log_dir=None,
+                  journal=None, only_failed=False):
+    """Convert many posts concurrently in this process
+
+    targets are Substack URLs or slugs. Each post's log is buffered and
+    printed as one block when it finishes (and written to
+    {log_dir}/seodeep-{slug}.log if log_dir is given). With a journal,
+    posts it already shows as written are skipped (or everything but the
+    journaled failures, with only_failed). Returns a list of result dicts
+    in input order for the posts that ran; failed posts carry an 'error' key.
+    """
+    urls = [normalize_post_url(t) for t in targets if t.strip()]
+
+    if journal:
+        pending = set(journal.pending([extract_slug_from_url(u) for u in urls], only_failed))
+        skipped = len(urls)
+        urls = [u for u in urls if extract_slug_from_url(u) in pending]
+        skipped -= len(urls)
+        if skipped:
+            print(f"↻ Journal: skipping {skipped} posts, {len(urls)} left to convert\n")
+
+    router = sys.stdout if isinstance(sys.stdout, ThreadLogRouter) else ThreadLogRouter(sys.stdout)
+    original_stdout = sys.stdout
+    sys.stdout = router
+
+    if log_dir:
+        Path(log_dir).mkdir(parents=True, exist_ok=True)
+
+    def worker(url):
+        with router.capture() as log:
+            slug = extract_slug_from_url(url) or url
+            try:
+                result = convert_post(url, keywords, journal)
+            except Exception as e:
+                print(f"  ✗ Error converting {url}: {e}")
+                if journal:
+                    journal.fail(slug, e)
+                result = {'slug': slug, 'url': url, 'error': str(e)}
+        result['log'] = log.getvalue()
+        return result
+
+    results = [None] * len(urls)
+    done = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            futures = {executor.submit(worker, url): i for i, url in enumerate(urls)}
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                done += 1
+
+                if log_dir:
+                    log_path = Path(log_dir) / f"seodeep-{result['slug']}.log"
+                    log_path.write_text(result['log'], encoding='utf-8')
+
+                status = '❌ FAILED' if 'error' in result else '✅ Done'
+                router.emit(f"{result['log']}\n[{done}/{len(urls)}] {status}: {result['slug']}\n")
+    finally:
+        sys.stdout = original_stdout
+
+    return results
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(
+        prog='convert-blog-post-full.py --batch',
+        description='Convert several Substack posts concurrently in one process'
+    )
+    parser.add_argument('targets', nargs='*', help='Substack post URLs or slugs')
+    parser.add_argument('--from-file', help='Read URLs/slugs from a file, one per line')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Posts processed at once (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--keywords', default='', help='Comma-separated keywords applied to every post')
+    parser.add_argument('--log-dir', help='Write each post log to <dir>/seodeep-<slug>.log')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the journaled run: skip written posts, resume the rest mid-way')
+    parser.add_argument('--only-failed', action='store_true',
+                        help='Retry only the posts the journal shows as failed')
+    args = parser.parse_args(argv)
+
+    targets = list(args.targets)
+    if args.from_file:
+        lines = Path(args.from_file).read_text(encoding='utf-8').splitlines()
+        targets += [line.strip() for line in lines if line.strip() and not line.startswith('#')]
+
+    if not targets:
+        parser.error('no posts given')
+
+    keywords = [k.strip() for k in args.keywords.split(',') if k.strip()]
+
+    journal = MigrationJournal()
+    if not (args.resume or args.only_failed):
+        journal.reset()
+
+    print(f"Converting {len(targets)} posts with concurrency {args.concurrency}\n")
+    results = convert_posts(targets, keywords, args.concurrency, args.log_dir,
+                            journal=journal, only_failed=args.only_failed)
+
+    failed = [r for r in results if 'error' in r]
+    age_restricted = [r for r in results if r.get('age_restricted')]
+
+    print(f"\n{'='*60}")
+    print(f"✅ Converted: {len(results) - len(failed)}/{len(results)}")
+    if age_restricted:
+        print(f"\n🔒 Age-restricted (podcast fallback used): {len(age_restricted)}")
+        for r in age_restricted:
+            print(f"  - {r['slug']}")
+    if failed:
+        print(f"\n❌ Failed ({len(failed)}):")
+        for r in failed:
+            print(f"  - {r['slug']}: {r['error'][:100]}")
+        sys.exit(1)
+
+def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == '--batch':
+        batch_main(sys.argv[2:])
+        return
+
+    if len(sys.argv) < 2:
+        print("Usage: python3 convert-blog-post-full.py <substack-url> [keyword1,keyword2,...]")
+        print("       python3 convert-blog-post-full.py --batch [--concurrency N] [--from-file FILE] [--resume|--only-failed] <url-or-slug>...")
+        print("Example: python3 convert-blog-post-full.py https://forbiddenyoga.substack.com/p/my-post \"Shadow Work,Kundalini,Tantra\"")
+        sys.exit(1)
+
+    url = sys.argv[1]
+    keywords = []
+    if len(sys.argv) >= 3:
+        keywords = [k.strip() for k in sys.argv[2].split(',')]
+
+    try:
+        result = convert_post(url, keywords)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
+    slug = result['slug']
     print(f"\n{'='*60}")
     print(f"✅ SUCCESS")
     print(f"{'='*60}")
-    print(f"Blog post saved to: {output_path}")
-    print(f"Images downloaded: {len(image_map)}")
+    print(f"Blog post saved to: {result['output_path']}")
+    print(f"Images downloaded: {result['images']}")
     if keywords:
         print(f"Keywords added: {', '.join(keywords)}")
     print(f"\nNext steps:")
@@ -7,13 +7,24 @@ Deep SEODEEP cleanup script for Forbidden Yoga blog posts.
 - Adds missing H3 subtitles from meta descriptions
 - Converts italic headers (<p><em>text</em></p>) to <h2>
 - Preserves all paragraph content and Spotify iframes
+- All rules are applied in one depth-first pass over each post
+- Posts already found clean are skipped until their content or the cleanup
+  rules (this script) change (.post-cache/)
+- Posts are cleaned in parallel, one process per core
 """
 
-import re
-from bs4 import BeautifulSoup, NavigableString
+from collections import Counter
+from bs4 import CData, NavigableString, Tag
 from pathlib import Path
 
+from batch_runner import find_posts, run_batch
+from build_manifest import hash_file
+from html_parser import make_soup
+from post_document import get_post_cache
+
 POSTS_DIR = Path(__file__).parent / "posts"
+# "Nothing to clean" marks are per rule set: editing this script re-checks every post
+CLEAN_MARK = f"deep-clean:{hash_file(__file__)[:12]}"
 
 # Substack classes to remove
 SUBSTACK_CLASSES = [
@@ -28,158 +39,212 @@ def is_substack_class(class_name):
         return False
     return any(sub in class_name for sub in SUBSTACK_CLASSES)
 
-def clean_post(html_file):
-    """Clean a single blog post."""
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
+def is_variant_picture(tag):
+    """True for the responsive <picture>s generate-image-variants.py writes"""
+    return tag is not None and tag.name == 'picture' and tag.has_attr('data-variants')
+
+TEXT_TYPES = (NavigableString, CData)
+MEDIA_TAGS = ('img', 'iframe')
+KEEP_IMG_ATTRS = ('src', 'alt', 'width', 'height', 'loading', 'decoding')
+VARIANT_IMG_ATTRS = ('srcset', 'sizes')
+DROP_TAGS = {
+    'hr': "Removed {} <hr> tags",
+    'svg': "Removed {} SVG icons",
+    'button': "Removed {} buttons",
+}
+
+class CleanupVisitor:
+    """Applies every cleanup rule in a single depth-first pass over the soup
+
+    hr/svg/button are dropped on entry so their subtrees are never walked.
+    All other rules fire when a tag is left, once its children are final,
+    in the same order the old phase-by-phase cleaner ran them. Text and
+    media presence are computed bottom-up, so no rule re-walks a subtree.
+    """
+
+    def __init__(self, soup, html_file):
+        self.soup = soup
+        self.default_alt = f"Image from {Path(html_file).stem.replace('-', ' ').title()}"
+        self.counts = Counter()
+        self.figure_depth = 0
+        self.post_content = None
+        self.in_post_content = False
+        self.wrapper_links = []  # first <a href> seen inside each open p.button-wrapper
+        self.subtitles = []
+        self.meta_desc = None
+        self.title_h1 = None
+
+    def run(self):
+        self.visit_children(self.soup)
+        self.add_subtitle()
+        return self.changes()
+
+    def visit_children(self, parent):
+        has_text = has_media = False
+        for child in list(parent.children):
+            if isinstance(child, Tag):
+                text, media = self.visit(child)
+                has_text = has_text or text
+                has_media = has_media or media
+            elif type(child) in TEXT_TYPES and child.strip():
+                has_text = True
+        return has_text, has_media
+
+    def visit(self, tag):
+        """Clean tag and its subtree; returns (has_text, has_media) for the parent"""
+        name = tag.name
+        if name in DROP_TAGS:
+            # Dropped tags nested inside (the icon <svg> of a share <button>) count too
+            for inner in tag.find_all(list(DROP_TAGS)):
+                self.counts[inner.name] += 1
+            tag.decompose()
+            self.counts[name] += 1
+            return False, False
+
+        classes = tag.get('class') or []
+        is_post_content = False
+        if name == 'div' and self.post_content is None and 'post-content' in classes:
+            self.post_content = tag
+            self.in_post_content = is_post_content = True
+        if name == 'a':
+            for frame in self.wrapper_links:
+                if frame[0] is None:
+                    frame[0] = tag.get('href', '')
+        is_wrapper = name == 'p' and 'button-wrapper' in classes
+        if is_wrapper:
+            self.wrapper_links.append([None])
+        if name == 'figure':
+            self.figure_depth += 1
+
+        has_text, has_media = self.visit_children(tag)
+
+        if name == 'figure':
+            self.figure_depth -= 1
+        spotify_href = is_wrapper and 'spotify' in (self.wrapper_links.pop()[0] or '').lower()
+        if is_post_content:
+            self.in_post_content = False
+
+        return self.leave(tag, name, classes, has_text, has_media, spotify_href)
+
+    def leave(self, tag, name, classes, has_text, has_media, spotify_href):
+        # Substack UI divs with no text
+        if name == 'div' and not has_text and any(is_substack_class(c) for c in classes):
+            tag.decompose()
+            return False, False
 
-    soup = BeautifulSoup(content, 'html.parser')
-    changes_made = []
-
-    # 1. Remove all <hr> tags
-    hr_tags = soup.find_all('hr')
-    if hr_tags:
-        for hr in hr_tags:
-            hr.decompose()
-        changes_made.append(f"Removed {len(hr_tags)} <hr> tags")
-
-    # 2. Remove SVG elements (Substack icons)
-    svg_tags = soup.find_all('svg')
-    if svg_tags:
-        for svg in svg_tags:
-            svg.decompose()
-        changes_made.append(f"Removed {len(svg_tags)} SVG icons")
-
-    # 3. Remove button elements (Substack UI)
-    button_tags = soup.find_all('button')
-    if button_tags:
-        for btn in button_tags:
-            btn.decompose()
-        changes_made.append(f"Removed {len(button_tags)} buttons")
-
-    # 4. Clean up Substack divs with pencraft/pc-* classes
-    substack_divs = soup.find_all('div', class_=lambda x: x and any(is_substack_class(c) for c in (x if isinstance(x, list) else [x])))
-    for div in substack_divs:
-        # If it only contains UI elements, remove it
-        if not div.get_text(strip=True):
-            div.decompose()
-
-    # 5. Simplify images - remove srcset, data-attrs, keep only src
-    for img in soup.find_all('img'):
-        # Keep only essential attributes
-        src = img.get('src', '')
-        alt = img.get('alt', '')
-
-        # Clear all attributes
-        attrs_to_remove = [attr for attr in img.attrs if attr not in ['src', 'alt', 'width', 'height']]
-        for attr in attrs_to_remove:
-            del img[attr]
-
-        # Add descriptive alt if empty
-        if not alt:
-            filename = Path(html_file).stem.replace('-', ' ').title()
-            img['alt'] = f"Image from {filename}"
-
-    # 6. Remove <picture> and <source> tags, keep inner <img>
-    for picture in soup.find_all('picture'):
-        img = picture.find('img')
-        if img:
-            picture.replace_with(img)
-
-    # 7. Simplify figure/figcaption structures
-    for figure in soup.find_all('figure'):
-        # Remove anchor wrappers around images
-        for a in figure.find_all('a', class_='image-link'):
-            img = a.find('img')
+        # Simplify images - remove srcset, data-attrs, keep only src (and the
+        # dimensions / loading hints; srcset/sizes too in variant <picture>s)
+        if name == 'img':
+            keep = KEEP_IMG_ATTRS + (VARIANT_IMG_ATTRS if is_variant_picture(tag.parent) else ())
+            for attr in [attr for attr in tag.attrs if attr not in keep]:
+                del tag[attr]
+            if not tag.get('alt', ''):
+                tag['alt'] = self.default_alt
+            return has_text, True
+
+        # <picture>/<source> -> inner <img>; image-link anchors in figures -> <img>
+        # (the responsive <picture>s of generate-image-variants.py are kept)
+        if (name == 'picture' and not is_variant_picture(tag)) or (name == 'a' and self.figure_depth and 'image-link' in classes):
+            img = tag.find('img')
             if img:
-                a.replace_with(img)
-
-    # 8. Remove empty paragraphs
-    for p in soup.find_all('p'):
-        if not p.get_text(strip=True) and not p.find(['img', 'iframe']):
-            p.decompose()
-
-    # 9. Remove button-wrapper divs (Substack call-to-action buttons)
-    for wrapper in soup.find_all('p', class_='button-wrapper'):
-        # Check if it's a Spotify link - keep those
-        a = wrapper.find('a')
-        if a and 'spotify' in a.get('href', '').lower():
-            # Convert to simple link
-            wrapper.name = 'p'
-            wrapper['class'] = []
-            del wrapper['data-attrs']
-            del wrapper['data-component-name']
-        else:
-            wrapper.decompose()
+                tag.replace_with(img)
+                return has_text, True
 
-    # 10. Clean data-* attributes from all elements
-    for tag in soup.find_all(True):
-        attrs_to_remove = [attr for attr in tag.attrs if attr.startswith('data-')]
-        for attr in attrs_to_remove:
+        if name == 'p':
+            # Empty paragraphs
+            if not has_text and not has_media:
+                tag.decompose()
+                return False, False
+            # Substack call-to-action buttons (Spotify links are kept as plain paragraphs)
+            if 'button-wrapper' in classes:
+                if not spotify_href:
+                    tag.decompose()
+                    return has_text, has_media
+                tag['class'] = []
+                del tag['data-attrs']
+                del tag['data-component-name']
+
+        # data-* attributes and Substack classes
+        for attr in [attr for attr in tag.attrs if attr.startswith('data-')]:
             del tag[attr]
+        if 'class' in tag.attrs and isinstance(tag['class'], list):
+            cleaned = [c for c in tag['class'] if not is_substack_class(c)]
+            if cleaned:
+                tag['class'] = cleaned
+            else:
+                del tag['class']
+
+        # Empty anchors
+        if name == 'a' and not has_text and not has_media:
+            tag.decompose()
+            return False, False
 
-    # 11. Remove empty class attributes and pencraft classes
-    for tag in soup.find_all(True):
-        if 'class' in tag.attrs:
-            classes = tag.get('class', [])
-            if isinstance(classes, list):
-                cleaned = [c for c in classes if not is_substack_class(c)]
-                if cleaned:
-                    tag['class'] = cleaned
-                else:
-                    del tag['class']
-
-    # 12. Remove empty anchor tags
-    for a in soup.find_all('a'):
-        if not a.get_text(strip=True) and not a.find(['img', 'iframe']):
-            a.decompose()
-
-    # 13. Convert italic headers to H2
-    # Pattern: <p><em>Short Text Without Period</em></p>
-    post_content = soup.find('div', class_='post-content')
-    if post_content:
-        em_converted = 0
-        for p in post_content.find_all('p'):
-            em = p.find('em')
-            if em and len(p.find_all()) == 1:  # Only contains the em
+        # Italic headers: <p><em>Short Text Without Period</em></p> -> <h2>
+        if name == 'p' and self.in_post_content:
+            em = tag.find('em')
+            if em and len(tag.find_all(limit=2)) == 1:
                 text = em.get_text().strip()
-                # If short text without period, likely a header
                 if len(text) < 100 and not text.endswith('.') and not text.endswith('?'):
-                    # Create h2
-                    h2 = soup.new_tag('h2')
+                    h2 = self.soup.new_tag('h2')
                     h2.string = text
-                    p.replace_with(h2)
-                    em_converted += 1
-        if em_converted:
-            changes_made.append(f"Converted {em_converted} <em> tags to <h2>")
-
-    # 14. Add H3 subtitle if missing
-    h3_subtitle = soup.find('h3', class_='post-subtitle')
-    if not h3_subtitle:
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and meta_desc.get('content'):
-            h1 = soup.find('h1', class_='post-title')
-            if h1:
-                h3 = soup.new_tag('h3', attrs={'class': 'post-subtitle'})
-                h3.string = meta_desc['content']
-                h1.insert_after(h3)
-                changes_made.append("Added H3 subtitle from meta description")
+                    tag.replace_with(h2)
+                    self.counts['em'] += 1
+
+        if name == 'h3' and 'post-subtitle' in classes:
+            self.subtitles.append(tag)
+        elif name == 'meta' and self.meta_desc is None and tag.get('name') == 'description':
+            self.meta_desc = tag
+        elif name == 'h1' and self.title_h1 is None and 'post-title' in classes:
+            self.title_h1 = tag
+
+        return has_text, has_media or name in MEDIA_TAGS
+
+    def add_subtitle(self):
+        """Add H3 subtitle from the meta description if missing"""
+        if any(not h3.decomposed for h3 in self.subtitles):
+            return
+        if self.meta_desc and self.meta_desc.get('content') and self.title_h1:
+            h3 = self.soup.new_tag('h3', attrs={'class': 'post-subtitle'})
+            h3.string = self.meta_desc['content']
+            self.title_h1.insert_after(h3)
+            self.counts['subtitle'] += 1
+
+    def changes(self):
+        changes_made = [message.format(self.counts[name])
+                        for name, message in DROP_TAGS.items() if self.counts[name]]
+        if self.counts['em']:
+            changes_made.append(f"Converted {self.counts['em']} <em> tags to <h2>")
+        if self.counts['subtitle']:
+            changes_made.append("Added H3 subtitle from meta description")
+        return changes_made
+
+def clean_post(html_file):
+    """Clean a single blog post."""
+    cache = get_post_cache()
+    if cache.has_mark(html_file, CLEAN_MARK):
+        return None
+
+    with open(html_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    soup = make_soup(content)
+    changes_made = CleanupVisitor(soup, html_file).run()
 
     if changes_made:
         # Write cleaned content
         with open(html_file, 'w', encoding='utf-8') as f:
             f.write(str(soup))
         return changes_made
+    cache.mark(html_file, CLEAN_MARK)
     return None
 
 def main():
     print("🧹 Deep SEODEEP cleanup of all blog posts...\n")
 
-    all_posts = sorted([f for f in POSTS_DIR.glob("*.html") if not f.name.startswith("._")])
+    all_posts = find_posts(POSTS_DIR)
     cleaned_count = 0
 
-    for post_file in all_posts:
-        changes = clean_post(post_file)
+    for post_file, changes in run_batch(clean_post, all_posts):
         if changes:
             cleaned_count += 1
             print(f"✅ {post_file.name}")
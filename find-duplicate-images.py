@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate image finder for the media folders (the site publishes the
+whole repo, so every copy is deployed)
+- Perceptual hash (pHash) of every image: decoded at reduced size (JPEG
+  draft mode) to 32x32 grayscale in worker processes, then one vectorized
+  NumPy DCT over all images; the 8x8 lowest frequencies against their
+  median give 64 bits
+- The same picture at another size, quality or format (.jpg vs .webp)
+  hashes within a few bits; a BK-tree finds every pair within --distance
+  bits (and of the same aspect ratio) and the pairs are grouped
+- Each group keeps the largest copy a page links to (else the largest
+  copy); the others are reported as referenced (needs a rewrite before
+  removal) or unreferenced (can go), with the space they take
+- --link replaces byte-identical copies with hard links to the kept file:
+  the bytes are the same, so every path keeps working (this saves local
+  disk; git and the deploy store each file separately, so only removing
+  the unreferenced copies shrinks those)
+- Hashes are cached in .image-hashes.json by path, mtime and size
+- blog-images/variants/ (generated sizes of one image) is not scanned;
+  icons and flat (blank) images are not compared
+
+Usage:
+    python3 find-duplicate-images.py [--distance 6] [--link] [dir ...]
+"""
+
+import argparse
+import json
+import os
+import re
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from batch_runner import run_batch
+from build_manifest import hash_file
+
+REPO_ROOT = Path(__file__).resolve().parent
+MEDIA_DIRS = ('blog-images', 'images', 'blog-thumbnails', 'wix-images', 'backup-20251209-122504/blog-images')
+SKIP_DIRS = ('blog-images/variants',)
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.avif')
+CACHE_PATH = REPO_ROOT / '.image-hashes.json'
+CACHE_VERSION = 1
+HASH_SIZE = 8            # 8x8 DCT coefficients -> 64-bit hash
+SAMPLE_SIZE = 32         # grayscale sample the DCT runs on
+DEFAULT_DISTANCE = 6     # max differing bits for near-duplicates
+MIN_CONTRAST = 2.0       # samples flatter than this (blank/solid images) are not compared
+MIN_SIDE = 64            # icons this small hash unreliably and weigh nothing
+ASPECT_TOLERANCE = 0.05  # near-duplicates keep their aspect ratio (within 5%)
+# Files whose text can point at an image (every page is deployed, backups included)
+REFERENCE_GLOBS = ('**/*.html', '*.js', '*.css', '*.json', '*.xml', 'netlify/**/*.js')
+SITE_HOSTS = ('forbidden-yoga.com', 'www.forbidden-yoga.com')
+IMAGE_REF_RE = re.compile(r'(?:https?://[\w.\-]+)?[\w\-./~%()]+\.(?:jpe?g|png|webp|gif|avif)\b', re.IGNORECASE)
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II matrix"""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+DCT = _dct_matrix(SAMPLE_SIZE)
+
+def load_sample(path):
+    """(width, height, 32x32 grayscale bytes) of an image file, or None if it can't be decoded"""
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            image.draft('L', (SAMPLE_SIZE * 2, SAMPLE_SIZE * 2))
+            image = ImageOps.exif_transpose(image.convert('L'))
+            sample = image.resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.BOX)
+            return width, height, sample.tobytes()
+    except Exception:
+        return None
+
+def phashes(samples):
+    """64-bit perceptual hashes of N 32x32 samples, all at once: (N,) uint64 and the samples' contrast"""
+    pixels = np.frombuffer(b''.join(samples), dtype=np.uint8).reshape(-1, SAMPLE_SIZE, SAMPLE_SIZE)
+    pixels = pixels.astype(np.float32)
+    coefficients = DCT @ pixels @ DCT.T  # (N, 32, 32) 2-D DCT
+    low = coefficients[:, :HASH_SIZE, :HASH_SIZE].reshape(len(samples), -1)
+    median = np.median(low[:, 1:], axis=1)  # DC term left out: it is just the brightness
+    bits = np.packbits(low > median[:, None], axis=1)
+    return bits.view('>u8').ravel(), pixels.std(axis=(1, 2))
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+class BKTree:
+    """Hamming-distance BK-tree over 64-bit hashes"""
+
+    def __init__(self):
+        self.root = None  # [hash, items, {distance: child}]
+
+    def add(self, value, item):
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def find(self, value, radius):
+        """Items whose hash is within radius bits of value"""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                found.extend(node[1])
+            # Triangle inequality: only children within radius of distance can match
+            stack.extend(child for d, child in node[2].items() if distance - radius <= d <= distance + radius)
+        return found
+
+class HashCache:
+    """Repo-relative path -> {mtime, size, width, height, phash, contrast}"""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = Path(path)
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            data = {}
+        self.images = data.get('images', {}) if data.get('version') == CACHE_VERSION else {}
+
+    def get(self, key, stat):
+        entry = self.images.get(key)
+        if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry
+        return None
+
+    def save(self):
+        """Write the cache atomically"""
+        data = json.dumps({'version': CACHE_VERSION, 'images': self.images}, sort_keys=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix='.image-hashes-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+def media_files(directories):
+    files = []
+    for directory in directories:
+        for path in sorted((REPO_ROOT / directory).rglob('*')):
+            relative = path.relative_to(REPO_ROOT).as_posix()
+            if (path.is_file() and path.suffix.lower() in IMAGE_SUFFIXES and not path.name.startswith('.')
+                    and not any(relative.startswith(skip + '/') for skip in SKIP_DIRS)):
+                files.append(path)
+    return files
+
+def hash_images(files, cache):
+    """Cache entries for files, hashing only the new or changed ones"""
+    entries = {}
+    stale = []
+    for path in files:
+        key = path.relative_to(REPO_ROOT).as_posix()
+        stat = path.stat()
+        entry = cache.get(key, stat)
+        if entry:
+            entries[key] = entry
+        else:
+            stale.append((path, key, stat))
+
+    if stale:
+        print(f"Hashing {len(stale)} images ({len(files) - len(stale)} cached)...")
+        loaded = [(key, stat, sample) for (_, key, stat), (_, sample)
+                  in zip(stale, run_batch(load_sample, [path for path, _, _ in stale]))]
+        decoded = [(key, stat, sample) for key, stat, sample in loaded if sample]
+        hashes, contrast = phashes([sample[2] for _, _, sample in decoded]) if decoded else ([], [])
+        for (key, stat, (width, height, _)), value, spread in zip(decoded, hashes, contrast):
+            entries[key] = cache.images[key] = {
+                'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'width': width, 'height': height,
+                'phash': f'{int(value):016x}', 'contrast': round(float(spread), 2)}
+        for key, _, sample in loaded:
+            if not sample:
+                print(f"  ⚠️  Could not decode {key}")
+        cache.save()
+    return entries
+
+def same_shape(a, b):
+    aspect_a, aspect_b = a['width'] / a['height'], b['width'] / b['height']
+    return abs(aspect_a - aspect_b) <= ASPECT_TOLERANCE * max(aspect_a, aspect_b)
+
+def group_duplicates(entries, distance):
+    """Groups (lists of keys) of images within distance bits of each other"""
+    tree = BKTree()
+    keys = [key for key, entry in entries.items()
+            if entry['contrast'] >= MIN_CONTRAST and min(entry['width'], entry['height']) >= MIN_SIDE]
+    for key in keys:
+        tree.add(int(entries[key]['phash'], 16), key)
+
+    parent = {key: key for key in keys}
+
+    def root(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for key in keys:
+        for other in tree.find(int(entries[key]['phash'], 16), distance):
+            if same_shape(entries[key], entries[other]):
+                parent[root(other)] = root(key)
+
+    groups = defaultdict(list)
+    for key in keys:
+        groups[root(key)].append(key)
+    return [sorted(group) for group in groups.values() if len(group) > 1]
+
+def referenced_paths():
+    """Repo-relative paths of the images the site's pages, scripts and data point at"""
+    paths = set()
+    for pattern in REFERENCE_GLOBS:
+        for page in REPO_ROOT.glob(pattern):
+            if page.name.startswith('.'):  # caches such as .image-hashes.json
+                continue
+            try:
+                text = page.read_text(encoding='utf-8', errors='ignore')
+            except OSError:
+                continue
+            for reference in IMAGE_REF_RE.findall(text):
+                parts = urlsplit(reference)
+                if parts.netloc and parts.netloc not in SITE_HOSTS:
+                    continue
+                path = unquote(parts.path)
+                # Site-absolute, or relative to the page
+                base = REPO_ROOT if path.startswith('/') else page.parent
+                resolved = os.path.normpath(base / path.lstrip('/'))
+                paths.add(Path(resolved).relative_to(REPO_ROOT).as_posix() if resolved.startswith(str(REPO_ROOT)) else path)
+    return paths
+
+def hard_link(keep, duplicate):
+    """Replace duplicate with a hard link to keep (atomically)"""
+    tmp = duplicate.with_name(f'.{duplicate.name}.link')
+    os.link(keep, tmp)
+    os.replace(tmp, duplicate)
+
+def main():
+    parser = argparse.ArgumentParser(description='Find near-duplicate images across the media folders')
+    parser.add_argument('dirs', nargs='*', default=list(MEDIA_DIRS), help='Folders to scan (default: all media folders)')
+    parser.add_argument('--distance', type=int, default=DEFAULT_DISTANCE,
+                        help=f'Max differing hash bits (default: {DEFAULT_DISTANCE})')
+    parser.add_argument('--link', action='store_true', help='Hard-link byte-identical copies to the kept file')
+    args = parser.parse_args()
+
+    files = media_files(args.dirs)
+    print(f"{'='*60}\n🔍 {len(files)} images in {', '.join(args.dirs)}\n{'='*60}")
+    entries = hash_images(files, HashCache())
+    groups = group_duplicates(entries, args.distance)
+    referenced = referenced_paths()
+
+    def is_referenced(key):
+        return key in referenced
+
+    unreferenced_bytes = referenced_bytes = linked_bytes = 0
+    for group in sorted(groups, key=lambda g: -sum(entries[k]['size'] for k in g)):
+        # Keep the largest referenced copy (or the largest copy)
+        keep = max(group, key=lambda k: (is_referenced(k), entries[k]['width'] * entries[k]['height'],
+                                         entries[k]['size']))
+        keep_path = REPO_ROOT / keep
+        keep_digest = None
+        print(f"\n{entries[keep]['width']}x{entries[keep]['height']}  keep {keep}")
+        for key in group:
+            if key == keep:
+                continue
+            entry = entries[key]
+            path = REPO_ROOT / key
+            identical = entry['size'] == entries[keep]['size'] and (
+                keep_digest or (keep_digest := hash_file(keep_path))) == hash_file(path)
+            if identical and os.path.samefile(path, keep_path):
+                continue  # already linked
+            status = 'referenced' if is_referenced(key) else 'unreferenced'
+            if identical and args.link:
+                hard_link(keep_path, path)
+                linked_bytes += entry['size']
+                status = 'hard-linked'
+            elif is_referenced(key):
+                referenced_bytes += entry['size']
+            else:
+                unreferenced_bytes += entry['size']
+            kind = 'identical' if identical else f"{hamming(int(entry['phash'], 16), int(entries[keep]['phash'], 16))} bits"
+            print(f"  {entry['width']}x{entry['height']}  {key}  ({entry['size'] // 1024} KB, {kind}, {status})")
+
+    print(f"\n{'='*60}")
+    print(f"📊 {len(groups)} groups of near-duplicates")
+    print(f"   Unreferenced copies: {unreferenced_bytes / 1024 / 1024:.1f} MB (can be removed)")
+    print(f"   Referenced copies: {referenced_bytes / 1024 / 1024:.1f} MB (rewrite the references to the kept file first)")
+    if args.link:
+        print(f"   Hard-linked: {linked_bytes / 1024 / 1024:.1f} MB")
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,8 @@ import re
 import os
 from pathlib import Path
 
+from post_sections import PostSections
+
 def extract_image_filenames(broken_html):
     """Extract actual image filenames from broken markup."""
     # Find all references to blog-images files
@@ -35,19 +37,14 @@ def fix_post(filepath):
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
 
-    # Find the post-content div (handle both link formats)
-    content_match = re.search(
-        r'<div class="post-content">(.*?)</div>\s*<a [^>]*class="back-link"[^>]*>',
-        content,
-        re.DOTALL
-    )
+    # Find the post-content div
+    sections = PostSections(content)
+    old_content = sections.text('content')
 
-    if not content_match:
+    if old_content is None:
         print(f"  ⚠️  Could not find post-content div")
         return False
 
-    old_content = content_match.group(1)
-
     # Extract image filenames from broken markup
     images = extract_image_filenames(old_content)
 
@@ -93,8 +90,8 @@ def fix_post(filepath):
 
     new_content = '\n            '.join(new_paragraphs)
 
-    # Replace the content
-    new_full = content.replace(old_content, new_content)
+    # Replace the content (by offset, so nothing outside post-content can change)
+    new_full = sections.splice('content', new_content)
 
     # Write back
     with open(filepath, 'w', encoding='utf-8') as f:
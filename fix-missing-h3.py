@@ -4,39 +4,43 @@ Fix posts missing H3 with class='post-subtitle' by extracting from meta descript
 """
 
 import sys
-from bs4 import BeautifulSoup
 from pathlib import Path
 
+from html_parser import make_soup
+from post_document import load_post
+
 def fix_missing_h3(html_file):
     """Add missing H3 subtitle by extracting from meta description"""
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    soup = BeautifulSoup(content, 'html.parser')
+    # Checks run on the cached post model; the file is only parsed to fix it
+    doc = load_post(html_file)
 
     # Check if H3 subtitle already exists
-    h3_with_class = soup.find('h3', class_='post-subtitle')
-    if h3_with_class:
+    if doc.subtitle is not None:
         print(f"✅ {html_file.name} already has H3 subtitle")
         return False
 
     # Get meta description
-    meta_desc = soup.find('meta', attrs={'name': 'description'})
-    if not meta_desc or not meta_desc.get('content'):
+    meta_desc = doc.meta_name.get('description')
+    if not meta_desc:
         print(f"⚠️  {html_file.name} has no meta description to use")
         return False
 
-    subtitle_text = meta_desc.get('content').strip()
+    subtitle_text = meta_desc.strip()
     if not subtitle_text:
         print(f"⚠️  {html_file.name} has empty meta description")
         return False
 
     # Find H1 with class='post-title'
-    h1_title = soup.find('h1', class_='post-title')
-    if not h1_title:
+    if doc.h1 is None:
         print(f"❌ {html_file.name} has no H1 with class='post-title'")
         return False
 
+    with open(html_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    soup = make_soup(content)
+    h1_title = soup.find('h1', class_='post-title')
+
     # Create new H3 subtitle
     new_h3 = soup.new_tag('h3', **{'class': 'post-subtitle'})
     new_h3.string = subtitle_text
@@ -2,22 +2,46 @@
 """
 Fix missing SEO tags in blog posts.
 Adds: OG tags, Twitter cards, Schema.org JSON-LD, canonical URLs
+Posts with nothing to fix are ruled out from the cached post model without re-parsing.
 """
 
 import json
 import re
-from bs4 import BeautifulSoup
 from pathlib import Path
 
+from batch_runner import find_posts, run_batch
+from html_parser import make_soup
+from post_document import load_post
+
 POSTS_DIR = Path(__file__).parent / "posts"
 BASE_URL = "https://forbidden-yoga.com"
+REQUIRED_PROPERTIES = ['og:title', 'og:description', 'og:image', 'og:url']
+PRESENT_PROPERTIES = ['og:type', 'og:site_name']
+REQUIRED_NAMES = ['twitter:title', 'twitter:description', 'twitter:image']
+
+def needs_seo_fix(doc):
+    """True if fix_seo_tags() would change anything in this post"""
+    if not doc.has_head:
+        return False
+    if any(not doc.meta_property.get(prop, '').strip() for prop in REQUIRED_PROPERTIES):
+        return True
+    if any(prop not in doc.meta_property for prop in PRESENT_PROPERTIES):
+        return True
+    if 'twitter:card' not in doc.meta_name:
+        return True
+    if any(not doc.meta_name.get(name, '').strip() for name in REQUIRED_NAMES):
+        return True
+    return not (doc.canonical or '').strip() or not doc.has_jsonld
 
 def fix_seo_tags(html_file):
     """Fix missing SEO tags for a single post."""
+    if not needs_seo_fix(load_post(html_file)):
+        return None
+
     with open(html_file, 'r', encoding='utf-8') as f:
         content = f.read()
 
-    soup = BeautifulSoup(content, 'html.parser')
+    soup = make_soup(content)
     filename = html_file.name
     slug = filename.replace('.html', '')
     changes = []
@@ -189,11 +213,10 @@ def fix_seo_tags(html_file):
 def main():
     print("🔧 Fixing missing SEO tags...\n")
 
-    all_posts = sorted([f for f in POSTS_DIR.glob("*.html") if not f.name.startswith("._")])
+    all_posts = find_posts(POSTS_DIR)
     fixed_count = 0
 
-    for post_file in all_posts:
-        changes = fix_seo_tags(post_file)
+    for post_file, changes in run_batch(fix_seo_tags, all_posts):
         if changes:
             fixed_count += 1
             print(f"✅ {post_file.name}")
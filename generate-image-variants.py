@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Responsive image variants for the images shown in posts
+- Every /blog-images/ image a post shows gets AVIF and WebP variants at
+  several widths (VARIANT_WIDTHS, never wider than the source) plus JPEG
+  fallbacks, in blog-images/variants/; formats the image backend cannot
+  encode are left out
+- image-variants.json records, per source image, its content hash, size and
+  variants; a source is only re-encoded when its bytes or the variant
+  settings changed, or one of its variant files is missing
+- <img> tags in the posts are wrapped in <picture> markup with srcset/sizes
+  from the manifest (AVIF, WebP, then the JPEG srcset on the <img>); running
+  again rebuilds that markup from the current manifest
+- Images are encoded in parallel, one process per core; posts are only
+  rewritten when their images or the manifest changed (build manifest)
+
+Usage:
+    python3 generate-image-variants.py [--dirty] [--force] [--posts DIR]
+"""
+
+import argparse
+import json
+import os
+import re
+import tempfile
+from html import escape
+from pathlib import Path
+
+from batch_runner import find_posts, run_batch
+from build_manifest import BuildStep, hash_file, hash_json
+from image_pipeline import open_image, supports
+
+REPO_ROOT = Path(__file__).resolve().parent
+IMAGES_PREFIX = '/blog-images/'
+VARIANTS_PREFIX = '/blog-images/variants/'
+VARIANTS_DIR = REPO_ROOT / 'blog-images' / 'variants'
+MANIFEST_PATH = REPO_ROOT / 'image-variants.json'
+MANIFEST_VERSION = 1
+
+SOURCE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.webp')
+VARIANT_WIDTHS = (400, 800, 1200)
+# (format, file extension, MIME type, quality), in <picture> source order
+VARIANT_FORMATS = (
+    ('avif', 'avif', 'image/avif', 50),
+    ('webp', 'webp', 'image/webp', 75),
+    ('jpeg', 'jpg', 'image/jpeg', 80),
+)
+# .post-container is 900px wide with 40px padding
+SIZES = '(max-width: 900px) calc(100vw - 80px), 820px'
+SETTINGS = hash_json([VARIANT_WIDTHS, VARIANT_FORMATS])
+
+IMAGE_MARKUP_RE = re.compile(r'<picture data-variants>.*?</picture>|<img\b[^>]*>', re.DOTALL)
+IMG_TAG_RE = re.compile(r'<img\b[^>]*>')
+SRC_RE = re.compile(r'\ssrc="([^"]+)"')
+# What variant_markup() adds to the <img> tag, to take it off again
+ADDED_ATTRS_RE = re.compile(r'^<img srcset="[^"]*" sizes="[^"]*"')
+
+def source_path(url):
+    return REPO_ROOT / url.lstrip('/')
+
+def is_variant_source(url):
+    """Still images under /blog-images/ (an animated GIF would lose its animation)"""
+    return (url.startswith(IMAGES_PREFIX) and not url.startswith(VARIANTS_PREFIX)
+            and Path(url).suffix.lower() in SOURCE_SUFFIXES)
+
+def variant_widths(width):
+    """Widths to encode for a source width: the VARIANT_WIDTHS below it and the largest that fits"""
+    widths = [w for w in VARIANT_WIDTHS if w < width]
+    widths.append(min(width, VARIANT_WIDTHS[-1]))
+    return sorted(set(widths))
+
+def variant_name(path, width, extension):
+    # The source extension is kept in the name: foo.jpg and foo.png both exist
+    return f"{path.stem}-{path.suffix.lstrip('.').lower()}-{width}w.{extension}"
+
+def build_variants(url):
+    """Encode every variant of one source image; returns its manifest entry (None on error)"""
+    path = source_path(url)
+    try:
+        with open_image(path) as source:
+            variants = {}
+            for image_format, extension, _, quality in VARIANT_FORMATS:
+                if not supports(image_format):
+                    continue
+                variants[image_format] = []
+                for width in variant_widths(source.width):
+                    name = variant_name(path, width, extension)
+                    saved = source.save(VARIANTS_DIR / name, max_width=width, quality=quality)
+                    variants[image_format].append([f'{VARIANTS_PREFIX}{name}', saved.width])
+        print(f"✓ {path.name}: {source.width}x{source.height}, "
+              f"{sum(len(v) for v in variants.values())} variants in {source.seconds * 1000:.0f} ms")
+    except Exception as e:
+        print(f"✗ {path.name}: {e}")
+        return None
+    return {'hash': hash_file(path), 'settings': SETTINGS, 'width': source.width,
+            'height': source.height, 'variants': variants}
+
+class VariantManifest:
+    """Source image URL -> {hash, settings, width, height, variants: {format: [[url, width], ...]}}"""
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = Path(path)
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            data = {}
+        self.images = data.get('images', {}) if data.get('version') == MANIFEST_VERSION else {}
+
+    def is_current(self, url, digest):
+        """True if url's variants were built from these bytes with the current settings and all exist"""
+        entry = self.images.get(url)
+        return (entry is not None and entry['hash'] == digest and entry['settings'] == SETTINGS
+                and all(source_path(variant).exists()
+                        for variants in entry['variants'].values() for variant, _ in variants))
+
+    def update(self, url, entry):
+        """Record url's new variants; deletes the old variant files no longer listed"""
+        old = self.images.get(url)
+        self.images[url] = entry
+        if old:
+            kept = {variant for variants in entry['variants'].values() for variant, _ in variants}
+            for variants in old['variants'].values():
+                for variant, _ in variants:
+                    if variant not in kept:
+                        source_path(variant).unlink(missing_ok=True)
+
+    def save(self):
+        """Write the manifest atomically"""
+        data = json.dumps({'version': MANIFEST_VERSION, 'images': self.images}, indent=2, sort_keys=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix='.image-variants-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+def original_img(markup):
+    """The post's own <img> tag, from a bare <img> or a <picture> this script built"""
+    if markup.startswith('<picture'):
+        markup = IMG_TAG_RE.findall(markup)[-1]
+    return ADDED_ATTRS_RE.sub('<img', markup)
+
+def image_urls(html):
+    """Source URLs of the images a post shows"""
+    urls = []
+    for match in IMAGE_MARKUP_RE.finditer(html):
+        src = SRC_RE.search(original_img(match.group(0)))
+        if src and is_variant_source(src.group(1)):
+            urls.append(src.group(1))
+    return urls
+
+def srcset(variants):
+    return escape(', '.join(f'{url} {width}w' for url, width in variants))
+
+def variant_markup(img, entry):
+    """<picture> for an <img> tag: one <source> per modern format, the JPEG srcset on the <img>"""
+    sources = ''.join(f'<source type="{mime}" srcset="{srcset(entry["variants"][image_format])}" sizes="{SIZES}">'
+                      for image_format, _, mime, _ in VARIANT_FORMATS
+                      if image_format != 'jpeg' and entry['variants'].get(image_format))
+    jpeg = entry['variants'].get('jpeg')
+    if jpeg:
+        img = f'<img srcset="{srcset(jpeg)}" sizes="{SIZES}"' + img[len('<img'):]
+    return f'<picture data-variants>{sources}{img}</picture>'
+
+def rewrite_images(html, manifest):
+    """html with every variant-backed <img> in <picture> markup from the manifest"""
+    def replace(match):
+        img = original_img(match.group(0))
+        src = SRC_RE.search(img)
+        entry = manifest.images.get(src.group(1)) if src else None
+        return variant_markup(img, entry) if entry else img
+
+    return IMAGE_MARKUP_RE.sub(replace, html)
+
+def main():
+    parser = argparse.ArgumentParser(description='Build responsive image variants and point the posts at them')
+    parser.add_argument('--posts', default=str(REPO_ROOT / 'posts'), help='Posts directory (default: posts/)')
+    parser.add_argument('--dirty', action='store_true', help='Report what would be rebuilt, build nothing')
+    parser.add_argument('--force', action='store_true', help='Re-encode every image and rewrite every post')
+    args = parser.parse_args()
+
+    post_files = find_posts(args.posts)
+    manifest = VariantManifest()
+
+    # Every image the posts show, once
+    urls = sorted({url for post_file in post_files
+                   for url in image_urls(post_file.read_text(encoding='utf-8', errors='ignore'))})
+    stale = []
+    for url in urls:
+        if not source_path(url).exists():
+            print(f"⚠️  Missing image {url}")
+        elif args.force or not manifest.is_current(url, hash_file(source_path(url))):
+            stale.append(url)
+
+    print(f"\n{'='*60}\n🖼️  {len(stale)} of {len(urls)} images need variants\n{'='*60}")
+    if args.dirty:
+        for url in stale:
+            print(f"• {url}")
+    else:
+        VARIANTS_DIR.mkdir(parents=True, exist_ok=True)
+        for url, entry in run_batch(build_variants, stale):
+            if entry:
+                manifest.update(url, entry)
+        manifest.save()
+
+    print(f"\n{'='*60}\n🔧 image-variants\n{'='*60}")
+    # The manifest is an input of every post: a changed entry re-renders its posts
+    step = BuildStep('image-variants', [__file__, MANIFEST_PATH], depends=('images',))
+    step.run(post_files, lambda html, path: rewrite_images(html, manifest),
+             force=args.force, dry_run=args.dirty)
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,8 @@ Based on tantric/spiritual/psychological terms and notable people names
 import re
 from pathlib import Path
 
+from batch_runner import find_posts, run_batch
+
 # Keyword mappings for each post based on deep semantic analysis
 # Keywords include: specific texts, scholars, Sanskrit terms, practices, and people mentioned
 POST_KEYWORDS = {
@@ -560,12 +562,11 @@ def main():
     added = 0
     skipped = 0
 
-    for post_path in sorted(posts_dir.glob('*.html')):
-        # Skip index.html
-        if post_path.stem == 'index':
-            continue
+    # Skip index.html
+    post_paths = [p for p in find_posts(posts_dir) if p.stem != 'index']
 
-        if add_keywords_to_post(post_path):
+    for post_path, was_added in run_batch(add_keywords_to_post, post_paths):
+        if was_added:
             added += 1
         else:
             skipped += 1
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Central HTML parser factory for the BeautifulSoup scripts
+- make_soup() builds a BeautifulSoup tree with the selected backend
+- Backends: html.parser (stdlib, default), lxml, html5lib, selectolax
+- selectolax is a read-only fast path: post_document builds its PostDocument
+  straight from a selectolax tree; scripts that edit a soup get html.parser
+- Select with HTML_PARSER=lxml (or set_backend()); a backend that is not
+  installed falls back to html.parser with a warning
+
+Check a backend against html.parser with check-parser-backends.py before
+using it for the fix scripts: parsers repair broken markup differently.
+
+Usage:
+    from html_parser import make_soup
+    soup = make_soup(html)
+"""
+
+import importlib.util
+import os
+import sys
+import threading
+
+from bs4 import BeautifulSoup
+
+DEFAULT_BACKEND = 'html.parser'
+SOUP_BACKENDS = ('html.parser', 'lxml', 'html5lib')
+BACKENDS = SOUP_BACKENDS + ('selectolax',)
+BACKEND_MODULES = {'lxml': 'lxml', 'html5lib': 'html5lib', 'selectolax': 'selectolax'}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def is_available(backend):
+    """True if the backend's package is installed"""
+    module = BACKEND_MODULES.get(backend)
+    return module is None or importlib.util.find_spec(module) is not None
+
+def available_backends():
+    return [backend for backend in BACKENDS if is_available(backend)]
+
+def _resolve(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend {backend!r} (choose from {', '.join(BACKENDS)})")
+    if not is_available(backend):
+        print(f"⚠️  HTML parser backend {backend!r} is not installed, using {DEFAULT_BACKEND}", file=sys.stderr)
+        return DEFAULT_BACKEND
+    return backend
+
+def get_backend():
+    """Return the process-wide parser backend (HTML_PARSER, default html.parser)"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _resolve(os.environ.get('HTML_PARSER') or DEFAULT_BACKEND)
+        return _backend
+
+def set_backend(backend):
+    """Select the parser backend for the rest of this process"""
+    global _backend
+    with _backend_lock:
+        _backend = _resolve(backend)
+    return _backend
+
+def soup_features(backend=None):
+    """BeautifulSoup features string for a backend (selectolax builds no soup)"""
+    backend = backend or get_backend()
+    return backend if backend in SOUP_BACKENDS else DEFAULT_BACKEND
+
+def make_soup(markup, backend=None):
+    """Parse markup into a BeautifulSoup tree with the selected backend"""
+    return BeautifulSoup(markup, soup_features(backend))
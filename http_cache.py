@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Persistent conditional-GET cache for Substack pages and RSS feeds
+- Stores each body on disk with its ETag / Last-Modified headers
+- Later runs send If-None-Match / If-Modified-Since and reuse the body on 304
+- Offline mode serves only from cache (set HTTP_CACHE_OFFLINE=1 or pass --offline)
+
+Usage:
+    from http_cache import cached_fetch_text
+    html = cached_fetch_text('https://forbiddenyoga.substack.com/p/dark-alchemy')
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from http_client import Response, get_client
+
+CACHE_DIR = Path(os.environ.get('HTTP_CACHE_DIR', Path(__file__).resolve().parent / '.http-cache'))
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a URL has never been cached"""
+
+def _atomic_write(path, data):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+class HTTPCache:
+    """URL-keyed body cache with HTTP validators; safe to share across threads"""
+
+    def __init__(self, cache_dir=CACHE_DIR, offline=None, client=None):
+        self.cache_dir = Path(cache_dir)
+        if offline is None:
+            offline = os.environ.get('HTTP_CACHE_OFFLINE', '') not in ('', '0')
+        self.offline = offline
+        self.client = client or get_client()
+        self.hits = 0          # served without any request (offline)
+        self.revalidated = 0   # 304 Not Modified
+        self.misses = 0        # full 200 download
+        self._lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def load(self, url):
+        """Return (meta, body) for a cached URL, or (None, None)"""
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def store(self, url, response):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        meta_path, body_path = self._paths(url)
+        meta = {
+            'url': url,
+            'final_url': response.url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_type': response.headers.get('Content-Type', ''),
+            'fetched_at': time.time(),
+        }
+        # Body first, so a crash never leaves metadata pointing at a stale body
+        _atomic_write(body_path, response.body)
+        _atomic_write(meta_path, json.dumps(meta, indent=2).encode('utf-8'))
+
+    def _cached_response(self, url, meta, body):
+        headers = {'Content-Type': meta.get('content_type', '')}
+        return Response(200, 'OK (cached)', headers, body, meta.get('final_url') or url, from_cache=True)
+
+    def fetch(self, url, timeout=None):
+        """GET with revalidation; returns a Response (from_cache=True on 304/offline)"""
+        meta, body = self.load(url)
+
+        if self.offline:
+            if meta is None:
+                raise CacheMiss(f"Not in cache (offline mode): {url}")
+            self._count('hits')
+            return self._cached_response(url, meta, body)
+
+        headers = {}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = self.client.get(url, headers=headers, timeout=timeout)
+
+        if response.status == 304 and meta is not None:
+            self._count('revalidated')
+            return self._cached_response(url, meta, body)
+
+        if response.status == 200:
+            self._count('misses')
+            self.store(url, response)
+
+        return response
+
+    def summary(self):
+        return f"{self.revalidated} not modified, {self.misses} downloaded, {self.hits} offline hits"
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_cache():
+    """Return the process-wide shared cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HTTPCache()
+        return _default_cache
+
+def set_offline(offline=True):
+    """Switch the shared cache to (or out of) offline mode"""
+    get_cache().offline = offline
+
+def cached_fetch(url, timeout=None):
+    """GET through the shared cache (does not raise on HTTP errors)"""
+    return get_cache().fetch(url, timeout=timeout)
+
+def cached_fetch_bytes(url, timeout=None):
+    """GET through the shared cache; raises HTTPError on 4xx/5xx"""
+    return cached_fetch(url, timeout).raise_for_status().body
+
+def cached_fetch_text(url, timeout=None):
+    """GET through the shared cache and return text; raises HTTPError on 4xx/5xx"""
+    return cached_fetch(url, timeout).raise_for_status().text()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Shared keep-alive HTTP client for the Substack / live-site scripts
+- Pools persistent HTTP/1.1 connections per host (thread-safe)
+- Decodes gzip / deflate, and brotli when the brotli module is installed
+- Follows redirects with one uniform timeout and User-Agent
+- Streams large downloads to disk in fixed-size chunks (flat memory)
+- Adaptive per-host rate limiting; 429/503 are retried with backoff
+
+Usage:
+    from http_client import fetch_text, fetch_bytes, download_to_file
+    html = fetch_text('https://forbiddenyoga.substack.com/p/dark-alchemy')
+    download_to_file(image_url, 'blog-images/dark-alchemy-img-0.jpg', hash_algorithm='sha256')
+"""
+
+import gzip
+import hashlib
+import http.client
+import os
+import ssl
+import tempfile
+import threading
+import time
+import zlib
+from collections import namedtuple
+from contextlib import contextmanager
+from email.message import Message
+from pathlib import Path
+from urllib.parse import urlsplit, urljoin
+
+from rate_limit import RateLimiter, backoff_delay, parse_retry_after
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+USER_AGENT = 'Mozilla/5.0'
+DEFAULT_TIMEOUT = 30
+MAX_IDLE_PER_HOST = 8
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+RETRY_STATUSES = (429, 503)
+MAX_RETRIES = 4
+CHUNK_SIZE = 64 * 1024
+MAX_DOWNLOAD_BYTES = 50 * 1024 * 1024
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli else 'gzip, deflate'
+
+# Same relaxed SSL settings the migration scripts have always used
+ssl_context = ssl.create_default_context()
+ssl_context.check_hostname = False
+ssl_context.verify_mode = ssl.CERT_NONE
+
+# Errors that mean a pooled connection was closed by the server while idle
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+class HTTPError(Exception):
+    """Raised by raise_for_status() / fetch_* for 4xx and 5xx responses"""
+
+    def __init__(self, status, reason, url):
+        super().__init__(f"HTTP {status} {reason}: {url}")
+        self.status = status
+        self.reason = reason
+        self.url = url
+
+class DownloadTooLarge(Exception):
+    """Raised when a download exceeds its max_bytes limit"""
+
+Download = namedtuple('Download', ['path', 'size', 'digest'])
+
+class Response:
+    """A fully read response; body is already content-decoded"""
+
+    def __init__(self, status, reason, headers, body, url, from_cache=False):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.url = url
+        self.from_cache = from_cache
+
+    @property
+    def ok(self):
+        return self.status < 400
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HTTPError(self.status, self.reason, self.url)
+        return self
+
+    def text(self, encoding=None):
+        if encoding is None:
+            msg = Message()
+            msg['content-type'] = self.headers.get('Content-Type', '')
+            encoding = msg.get_content_charset() or 'utf-8'
+        return self.body.decode(encoding, errors='replace')
+
+def decode_body(data, content_encoding):
+    """Undo Content-Encoding (gzip, deflate, br)"""
+    encoding = (content_encoding or '').strip().lower()
+    if not encoding or encoding == 'identity':
+        return data
+    if encoding in ('gzip', 'x-gzip'):
+        return gzip.decompress(data)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(data)
+        except zlib.error:
+            return zlib.decompress(data, -zlib.MAX_WBITS)  # raw deflate
+    if encoding == 'br' and brotli:
+        return brotli.decompress(data)
+    raise ValueError(f"Unsupported Content-Encoding: {content_encoding}")
+
+class HTTPClient:
+    """Connection-pooling client; one instance can be shared by many threads"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_idle_per_host=MAX_IDLE_PER_HOST,
+                 user_agent=USER_AGENT, rate_limiter=None, max_retries=MAX_RETRIES):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.user_agent = user_agent
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.retries = 0
+        self._idle = {}  # (scheme, host, port) -> [connection, ...]
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.requests_sent = 0
+
+    def _pool_key(self, url):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        port = parts.port or (443 if scheme == 'https' else 80)
+        return (scheme, parts.hostname, port)
+
+    def _acquire(self, key, timeout, fresh=False):
+        """Return (connection, reused) for a host, preferring an idle one"""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle and not fresh:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            self.connections_opened += 1
+
+        scheme, host, port = key
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        return conn, False
+
+    def _release(self, key, conn, reusable):
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle_per_host:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def _send(self, method, url, headers, body, timeout):
+        """Send one request (no redirects) and return (key, conn, raw response)
+
+        The caller must read the response and hand the connection back
+        with _release(). A reused connection that turns out to be stale
+        is replaced by a fresh one once.
+        """
+        key = self._pool_key(url)
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        for attempt in range(2):
+            conn, reused = self._acquire(key, timeout, fresh=attempt > 0)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                raw = conn.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            with self._lock:
+                self.requests_sent += 1
+            return key, conn, raw
+
+    def _send_throttled(self, method, url, headers, body, timeout):
+        """_send() behind the host's rate limiter, retrying 429/503 responses
+
+        Throttled responses pause every request to that host for
+        Retry-After seconds (or a jittered exponential backoff if the
+        header is missing) before the retry goes out.
+        """
+        limiter = self.rate_limiter.for_host(urlsplit(url).hostname)
+
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire()
+            started = time.monotonic()
+            key, conn, raw = self._send(method, url, headers, body, timeout)
+
+            if raw.status not in RETRY_STATUSES:
+                limiter.record_response(time.monotonic() - started)
+                return key, conn, raw
+
+            # Throttled: slow the host down even if this was the last attempt
+            delay = max(parse_retry_after(raw.getheader('Retry-After')) or 0, backoff_delay(attempt))
+            limiter.record_throttle(delay)
+            if attempt == self.max_retries:
+                return key, conn, raw
+
+            try:
+                raw.read()
+            except Exception:
+                conn.close()
+                raise
+            self._release(key, conn, not raw.will_close)
+
+            with self._lock:
+                self.retries += 1
+
+    def _build_headers(self, headers, decode):
+        merged = {
+            'User-Agent': self.user_agent,
+            'Accept-Encoding': ACCEPT_ENCODING if decode else 'identity',
+            'Connection': 'keep-alive',
+        }
+        if headers:
+            merged.update(headers)
+        return merged
+
+    def request(self, method, url, headers=None, body=None, timeout=None, decode=True):
+        """Perform a request, following redirects, and return a Response"""
+        timeout = timeout or self.timeout
+        request_headers = self._build_headers(headers, decode)
+
+        for _ in range(MAX_REDIRECTS + 1):
+            key, conn, raw = self._send_throttled(method, url, request_headers, body, timeout)
+            try:
+                data = raw.read()
+            except Exception:
+                conn.close()
+                raise
+            self._release(key, conn, not raw.will_close)
+
+            location = raw.getheader('Location')
+            if raw.status in REDIRECT_STATUSES and location:
+                url = urljoin(url, location)
+                if raw.status == 303:
+                    method, body = 'GET', None
+                continue
+
+            if decode and method != 'HEAD':
+                data = decode_body(data, raw.getheader('Content-Encoding'))
+            return Response(raw.status, raw.reason, raw.headers, data, url)
+
+        raise HTTPError(310, 'Too many redirects', url)
+
+    def get(self, url, headers=None, timeout=None):
+        return self.request('GET', url, headers=headers, timeout=timeout)
+
+    @contextmanager
+    def stream(self, url, headers=None, timeout=None):
+        """GET a URL and yield the raw, unread response for chunked reading
+
+        Redirects are followed and the body is not content-decoded
+        (Accept-Encoding: identity). The final URL is on response.url. The
+        connection goes back to the pool only if the body was read to the end.
+        """
+        timeout = timeout or self.timeout
+        request_headers = self._build_headers(headers, decode=False)
+
+        for _ in range(MAX_REDIRECTS + 1):
+            key, conn, raw = self._send_throttled('GET', url, request_headers, None, timeout)
+            location = raw.getheader('Location')
+            if raw.status in REDIRECT_STATUSES and location:
+                try:
+                    raw.read()
+                except Exception:
+                    conn.close()
+                    raise
+                self._release(key, conn, not raw.will_close)
+                url = urljoin(url, location)
+                continue
+            break
+        else:
+            raise HTTPError(310, 'Too many redirects', url)
+
+        raw.url = url
+        try:
+            yield raw
+        finally:
+            self._release(key, conn, raw.isclosed() and not raw.will_close)
+
+    def download_to_file(self, url, dest, max_bytes=MAX_DOWNLOAD_BYTES, hash_algorithm=None,
+                         chunk_size=CHUNK_SIZE, headers=None, timeout=None):
+        """Stream a URL to dest in chunks, then atomically rename it into place
+
+        The body goes to a temp file next to dest, so a failed or oversized
+        download never leaves a partial file behind. Raises HTTPError for
+        4xx/5xx and DownloadTooLarge past max_bytes (None disables the
+        limit). Returns Download(path, size, digest); digest is the hex
+        hash when hash_algorithm (e.g. 'sha256') is given, else None.
+        """
+        dest = Path(dest)
+        hasher = hashlib.new(hash_algorithm) if hash_algorithm else None
+
+        with self.stream(url, headers=headers, timeout=timeout) as response:
+            if response.status >= 400:
+                raise HTTPError(response.status, response.reason, response.url)
+
+            length = response.getheader('Content-Length')
+            if max_bytes is not None and length and length.isdigit() and int(length) > max_bytes:
+                raise DownloadTooLarge(f"{url} is {length} bytes (limit {max_bytes})")
+
+            fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=f'.{dest.name}.', suffix='.part')
+            size = 0
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    while True:
+                        chunk = response.read(chunk_size)
+                        if not chunk:
+                            break
+                        size += len(chunk)
+                        if max_bytes is not None and size > max_bytes:
+                            raise DownloadTooLarge(f"{url} exceeded {max_bytes} bytes")
+                        if hasher:
+                            hasher.update(chunk)
+                        f.write(chunk)
+                os.replace(tmp, dest)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+        return Download(dest, size, hasher.hexdigest() if hasher else None)
+
+    def close(self):
+        """Close every idle pooled connection"""
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for idle in pools.values():
+            for conn in idle:
+                conn.close()
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_client():
+    """Return the process-wide shared client"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HTTPClient()
+        return _default_client
+
+def fetch(url, headers=None, timeout=None):
+    """GET a URL with the shared client (does not raise on HTTP errors)"""
+    return get_client().get(url, headers=headers, timeout=timeout)
+
+def fetch_bytes(url, headers=None, timeout=None):
+    """GET a URL and return the decoded body; raises HTTPError on 4xx/5xx"""
+    return fetch(url, headers, timeout).raise_for_status().body
+
+def fetch_text(url, headers=None, timeout=None):
+    """GET a URL and return the body as text; raises HTTPError on 4xx/5xx"""
+    return fetch(url, headers, timeout).raise_for_status().text()
+
+def download_to_file(url, dest, max_bytes=MAX_DOWNLOAD_BYTES, hash_algorithm=None, timeout=None):
+    """Stream a URL to dest with the shared client (see HTTPClient.download_to_file)"""
+    return get_client().download_to_file(url, dest, max_bytes=max_bytes,
+                                          hash_algorithm=hash_algorithm, timeout=timeout)
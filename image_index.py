@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Header-only dimension index of the site's images
+- Width and height are read from the first bytes of each file (JPEG SOF
+  segment and EXIF orientation, PNG IHDR, GIF screen descriptor, WebP
+  VP8/VP8L/VP8X, AVIF/HEIF ispe box); no image is decoded
+- Covers blog-images/, images/ and blog-thumbnails/, keyed by site URL
+- Cached in .image-index.json (IMAGE_INDEX to override) with each file's
+  mtime and size, so a file is only read again after it changed
+- stamp_images() adds width, height, loading="lazy" and decoding="async" to
+  the <img> tags of a fragment that do not set them yet
+
+CLI:
+    python3 image_index.py            # index every image, report unreadable ones
+    python3 image_index.py /blog-images/dark-alchemy-img-0.jpg
+"""
+
+import json
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+REPO_ROOT = Path(__file__).resolve().parent
+INDEX_PATH = Path(os.environ.get('IMAGE_INDEX', REPO_ROOT / '.image-index.json'))
+INDEX_VERSION = 1
+IMAGE_DIRS = ('blog-images', 'images', 'blog-thumbnails')
+SITE_HOSTS = ('forbidden-yoga.com', 'www.forbidden-yoga.com')
+HEADER_BYTES = 64 * 1024  # ISO-BMFF (AVIF) headers are searched within this
+
+IMG_TAG_RE = re.compile(r'<img\b[^>]*>')
+SRC_RE = re.compile(r'\ssrc="([^"]+)"')
+ATTR_RE = re.compile(r'\s(width|height|loading|decoding)\s*=', re.IGNORECASE)
+# JPEG start-of-frame markers (C4, C8 and CC are DHT, JPG and DAC)
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+
+def _exif_orientation(data):
+    """Orientation tag (1-8) of an APP1 Exif segment, or 1"""
+    if not data.startswith(b'Exif\0\0') or len(data) < 14:
+        return 1
+    tiff = data[6:]
+    order = '<' if tiff[:2] == b'II' else '>'
+    try:
+        (ifd,) = struct.unpack(order + 'I', tiff[4:8])
+        (count,) = struct.unpack(order + 'H', tiff[ifd:ifd + 2])
+        for i in range(count):
+            entry = tiff[ifd + 2 + i * 12:ifd + 14 + i * 12]
+            tag, _, _, value = struct.unpack(order + 'HHIH', entry[:10])
+            if tag == 0x0112:
+                return value
+    except struct.error:
+        pass
+    return 1
+
+def _jpeg_size(f):
+    orientation = 1
+    while True:
+        byte = f.read(1)
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in STANDALONE_MARKERS:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2 or marker == 0xD9:
+            return None
+        (length,) = struct.unpack('>H', length_bytes)
+        if marker in SOF_MARKERS:
+            height, width = struct.unpack('>xHH', f.read(5))
+            # Browsers apply the EXIF rotation; 5-8 swap the sides
+            return (height, width) if orientation >= 5 else (width, height)
+        if marker == 0xE1 and orientation == 1:
+            orientation = _exif_orientation(f.read(length - 2))
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+
+def _webp_size(head):
+    chunk = head[12:16]
+    if chunk == b'VP8 ' and head[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and head[20] == 0x2F:
+        (bits,) = struct.unpack('<I', head[21:25])
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        return (int.from_bytes(head[24:27], 'little') + 1,
+                int.from_bytes(head[27:30], 'little') + 1)
+    return None
+
+def _isobmff_size(head):
+    """Size from the first ispe (image spatial extents) property of an AVIF/HEIF file"""
+    at = head.find(b'ispe')
+    if at < 0 or len(head) < at + 16:
+        return None
+    return struct.unpack('>II', head[at + 8:at + 16])
+
+def read_dimensions(path):
+    """(width, height) from an image file's header, or None if the format is not recognised"""
+    with open(path, 'rb') as f:
+        head = f.read(32)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', head[6:10])
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return _webp_size(head)
+        if head[:2] == b'\xff\xd8':
+            f.seek(2)
+            return _jpeg_size(f)
+        if head[4:8] == b'ftyp':
+            return _isobmff_size(head + f.read(HEADER_BYTES - len(head)))
+    return None
+
+def _atomic_write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def site_path(src):
+    """Site URL path of an <img> src on this site (/blog-images/...), or None"""
+    parts = urlsplit(src)
+    if parts.netloc and parts.netloc not in SITE_HOSTS:
+        return None
+    path = unquote(parts.path)
+    return path if path.lstrip('/').split('/', 1)[0] in IMAGE_DIRS else None
+
+class ImageIndex:
+    """Site URL path -> {mtime, size, width, height} of the site's images; safe to share across threads"""
+
+    def __init__(self, path=INDEX_PATH, root=REPO_ROOT):
+        self.path = Path(path)
+        self.root = Path(root)
+        self.read = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            data = {}
+        self.images = data.get('images', {}) if data.get('version') == INDEX_VERSION else {}
+
+    def dimensions(self, url):
+        """(width, height) of a site image by URL path, or None if missing or unreadable"""
+        file_path = self.root / url.lstrip('/')
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return None
+        with self._lock:
+            known = self.images.get(url)
+        if not known or known['mtime'] != stat.st_mtime_ns or known['size'] != stat.st_size:
+            try:
+                size = read_dimensions(file_path)
+            except (OSError, struct.error, IndexError):  # unreadable or truncated header
+                size = None
+            known = {'mtime': stat.st_mtime_ns, 'size': stat.st_size,
+                     'width': size[0] if size else None, 'height': size[1] if size else None}
+            with self._lock:
+                self.images[url] = known
+                self.read += 1
+                self._dirty = True
+        return (known['width'], known['height']) if known['width'] else None
+
+    def refresh(self):
+        """Index every image in IMAGE_DIRS; drops files that no longer exist"""
+        urls = []
+        for directory in IMAGE_DIRS:
+            for file_path in sorted((self.root / directory).rglob('*')):
+                if file_path.is_file() and not file_path.name.startswith('.'):
+                    urls.append('/' + file_path.relative_to(self.root).as_posix())
+        for url in urls:
+            self.dimensions(url)
+        with self._lock:
+            for url in set(self.images) - set(urls):
+                del self.images[url]
+                self._dirty = True
+        return urls
+
+    def save(self):
+        """Write the index atomically if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            text = json.dumps({'version': INDEX_VERSION, 'images': self.images}, indent=2, sort_keys=True)
+            self._dirty = False
+        _atomic_write(self.path, text)
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+def get_image_index():
+    """Return the process-wide image index"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = ImageIndex()
+        return _default_index
+
+def stamp_img(tag, index=None):
+    """An <img> tag with width/height (if known), loading="lazy" and decoding="async" added where missing"""
+    present = {name.lower() for name in ATTR_RE.findall(tag)}
+    added = []
+    if not {'width', 'height'} & present:
+        src = SRC_RE.search(tag)
+        url = site_path(src.group(1)) if src else None
+        size = (index or get_image_index()).dimensions(url) if url else None
+        if size:
+            added.append(f'width="{size[0]}" height="{size[1]}"')
+    if 'loading' not in present:
+        added.append('loading="lazy"')
+    if 'decoding' not in present:
+        added.append('decoding="async"')
+    if not added:
+        return tag
+    # Appended at the end, so markup other scripts put right after <img stays put
+    head, close = (tag[:-2].rstrip(), ' />') if tag.endswith('/>') else (tag[:-1].rstrip(), '>')
+    return f'{head} {" ".join(added)}{close}'
+
+def stamp_images(html, index=None):
+    """html with every <img> stamped (see stamp_img)"""
+    return IMG_TAG_RE.sub(lambda m: stamp_img(m.group(0), index), html)
+
+def main():
+    index = get_image_index()
+    started = time.perf_counter()
+    if len(sys.argv) > 1:
+        for url in sys.argv[1:]:
+            print(f"{url}: {index.dimensions(url)}")
+    else:
+        urls = index.refresh()
+        unreadable = [url for url in urls if index.dimensions(url) is None]
+        print(f"Indexed {len(urls)} images ({index.read} read, {len(urls) - index.read} unchanged) "
+              f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        for url in unreadable:
+            print(f"  ⚠️  Unreadable: {url}")
+    index.save()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+In-process image pipeline for the featured image / thumbnail scripts
+- Replaces the identify / convert / cp / ffmpeg subprocesses: no process is
+  spawned per image
+- open_image() decodes a source once (EXIF-rotated, alpha flattened on
+  white); every derived size is resized from that decoded buffer, never
+  from a re-encoded copy
+- save() writes JPEG, WebP or AVIF (if the backend has an encoder, see
+  supports()); with a max_kb budget it binary-searches the highest quality
+  that fits, encoding the same resized pixels each probe
+- image_size() reads the dimensions from the file header without decoding
+- Backends: Pillow (default), pyvips (faster, lower memory); select with
+  IMAGE_BACKEND=pyvips (or set_backend()); a backend that is not installed
+  falls back to the other with a warning
+- get_image_stats() counts images, wall time per image and processes
+  spawned by this process (subprocess/os.system audit events)
+
+Usage:
+    from image_pipeline import open_image
+    source = open_image('blog-images/dark-alchemy-img-0.jpg')
+    source.save('images/dark-alchemy-featured.jpg', max_width=1200, quality=90)
+    source.save('blog-thumbnails/dark-alchemy.jpg', max_dim=600, max_kb=100)
+"""
+
+import importlib.util
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+DEFAULT_BACKEND = 'pillow'
+BACKENDS = ('pillow', 'pyvips')
+BACKEND_MODULES = {'pillow': 'PIL', 'pyvips': 'pyvips'}
+SPAWN_EVENTS = ('subprocess.Popen', 'os.system', 'os.posix_spawn', 'os.exec', 'os.spawn')
+AVIF_SPEED = 8  # libavif speed 0-10; the default (6) is several times slower for little gain
+MIN_QUALITY = 30  # lowest quality tried to fit a max_kb budget
+FORMATS = {'.jpg': 'jpeg', '.jpeg': 'jpeg', '.webp': 'webp', '.avif': 'avif'}
+
+# What save() wrote; quality is None for a source copied as is
+SavedImage = namedtuple('SavedImage', 'path width height quality size')
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def is_available(backend):
+    """True if the backend's package is installed"""
+    return importlib.util.find_spec(BACKEND_MODULES[backend]) is not None
+
+def _resolve(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown image backend {backend!r} (choose from {', '.join(BACKENDS)})")
+    if is_available(backend):
+        return backend
+    for other in BACKENDS:
+        if is_available(other):
+            print(f"⚠️  Image backend {backend!r} is not installed, using {other}", file=sys.stderr)
+            return other
+    raise RuntimeError("No image backend installed (pip install Pillow, or pyvips)")
+
+def get_backend():
+    """Return the process-wide image backend (IMAGE_BACKEND, default pillow)"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _resolve(os.environ.get('IMAGE_BACKEND') or DEFAULT_BACKEND)
+        return _backend
+
+def set_backend(backend):
+    """Select the image backend for the rest of this process"""
+    global _backend
+    with _backend_lock:
+        _backend = _resolve(backend)
+
+class ImageStats:
+    """Images processed, wall time per image and processes spawned, for this process"""
+
+    def __init__(self):
+        self.images = 0
+        self.seconds = 0.0
+        self.slowest = 0.0
+        self.spawned = 0
+        self._lock = threading.Lock()
+
+    def _audit(self, event, args):
+        if event in SPAWN_EVENTS:
+            self.spawned += 1
+
+    def record(self, seconds):
+        with self._lock:
+            self.images += 1
+            self.seconds += seconds
+            self.slowest = max(self.slowest, seconds)
+
+    def counters(self):
+        """(images, seconds, slowest, spawned), to add up across processes"""
+        with self._lock:
+            return self.images, self.seconds, self.slowest, self.spawned
+
+    def add(self, images, seconds, slowest, spawned):
+        with self._lock:
+            self.images += images
+            self.seconds += seconds
+            self.slowest = max(self.slowest, slowest)
+            self.spawned += spawned
+
+    def summary(self):
+        images, seconds, slowest, spawned = self.counters()
+        average = seconds / images * 1000 if images else 0
+        return (f"{images} images, {average:.0f} ms/image (slowest {slowest * 1000:.0f} ms), "
+                f"{spawned} processes spawned")
+
+_stats = None
+_stats_lock = threading.Lock()
+
+def get_image_stats():
+    """Return the process-wide ImageStats (counts spawns from the first call on)"""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = ImageStats()
+            sys.addaudithook(_stats._audit)
+        return _stats
+
+def supports(image_format, backend=None):
+    """True if the backend can encode image_format ('jpeg', 'webp', 'avif')"""
+    backend = backend or get_backend()
+    if image_format == 'jpeg':
+        return True
+    if backend == 'pyvips':
+        import pyvips
+        saver = 'heifsave' if image_format == 'avif' else f'{image_format}save'
+        return pyvips.type_find('VipsOperation', saver) != 0
+    from PIL import features
+    return bool(features.check(image_format))
+
+def _fit(width, height, max_width=None, max_dim=None, upscale=False):
+    """Target size for the limits, keeping the aspect ratio (None: keep as is)"""
+    scales = []
+    if max_width:
+        scales.append(max_width / width)
+    if max_dim:
+        scales.append(max_dim / max(width, height))
+    if not scales:
+        return None
+    scale = min(scales)
+    if scale == 1 or (scale > 1 and not upscale):
+        return None
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+class PillowImage:
+    def __init__(self, path):
+        from PIL import Image, ImageOps
+        with Image.open(path) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode in ('RGBA', 'LA', 'PA', 'P'):
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+            image.load()
+        self.image = image
+        self.width, self.height = image.size
+
+    def resized(self, width, height):
+        from PIL import Image
+        return self.image.resize((width, height), Image.LANCZOS)
+
+    @staticmethod
+    def encode(image, image_format, quality):
+        buffer = io.BytesIO()
+        if image_format == 'webp':
+            image.save(buffer, 'WEBP', quality=quality, method=4)
+        elif image_format == 'avif':
+            image.save(buffer, 'AVIF', quality=quality, speed=AVIF_SPEED)
+        else:
+            image.save(buffer, 'JPEG', quality=quality, optimize=True)
+        return buffer.getvalue()
+
+class VipsImage:
+    def __init__(self, path):
+        import pyvips
+        image = pyvips.Image.new_from_file(str(path)).autorot()
+        if image.hasalpha():
+            image = image.flatten(background=[255] * (image.bands - 1))
+        if image.interpretation != 'srgb':
+            image = image.colourspace('srgb')
+        # Decode once; every resize below reads from memory
+        self.image = image.copy_memory()
+        self.width, self.height = image.width, image.height
+
+    def resized(self, width, height):
+        return self.image.resize(width / self.width, vscale=height / self.height, kernel='lanczos3')
+
+    @staticmethod
+    def encode(image, image_format, quality):
+        if image_format == 'webp':
+            return image.write_to_buffer('.webp', Q=quality, strip=True)
+        if image_format == 'avif':
+            return image.write_to_buffer('.avif', Q=quality, compression='av1', effort=9 - AVIF_SPEED, strip=True)
+        return image.write_to_buffer('.jpg', Q=quality, optimize_coding=True, strip=True)
+
+BACKEND_CLASSES = {'pillow': PillowImage, 'pyvips': VipsImage}
+
+def _write_bytes(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A unique temp file: parallel writers of the same output never share one
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)  # mkstemp creates it 0600; images are served
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+class SourceImage:
+    """One decoded source image; save() derives each output from the decoded pixels"""
+
+    def __init__(self, path, backend=None):
+        self.path = Path(path)
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.decoded = BACKEND_CLASSES[backend or get_backend()](self.path)
+        self.width, self.height = self.decoded.width, self.decoded.height
+
+    def encode(self, image, image_format, quality, max_bytes=None, min_quality=MIN_QUALITY):
+        """(data, quality): image encoded at quality, or with max_bytes at the
+        highest quality in [min_quality, quality] that fits
+
+        Every probe encodes the same in-memory pixels, so a lower quality
+        never stacks artifacts on an earlier encode. The highest quality is
+        tried first (most images fit); otherwise the quality is binary
+        searched. If even min_quality does not fit, that encode is returned.
+        """
+        data = self.decoded.encode(image, image_format, quality)
+        if max_bytes is None or len(data) <= max_bytes:
+            return data, quality
+
+        best = None
+        low, high = min_quality, quality - 1
+        while low <= high:
+            probe = (low + high) // 2
+            probe_data = self.decoded.encode(image, image_format, probe)
+            if len(probe_data) <= max_bytes:
+                best = probe_data, probe
+                low = probe + 1
+            else:
+                high = probe - 1
+        return best or (self.decoded.encode(image, image_format, min_quality), min_quality)
+
+    def save(self, output_path, max_width=None, max_dim=None, quality=85, max_kb=None,
+             upscale=False, copy_unscaled=False):
+        """Write a JPEG, WebP or AVIF (by suffix) no wider than max_width / larger
+        than max_dim on either side; returns a SavedImage
+
+        With max_kb, the highest quality up to quality that fits the budget is
+        used (see encode()). With copy_unscaled, a source that needs no resize
+        is copied as is instead of re-encoded (like cp).
+        """
+        output_path = Path(output_path)
+        image_format = FORMATS.get(output_path.suffix.lower())
+        if image_format is None:
+            raise ValueError(f"Unsupported image format {output_path.suffix!r} (choose from {', '.join(FORMATS)})")
+        size = _fit(self.width, self.height, max_width, max_dim, upscale)
+        if size is None and copy_unscaled:
+            if output_path.resolve() != self.path.resolve():
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(self.path, output_path)
+            return SavedImage(output_path, self.width, self.height, None, output_path.stat().st_size)
+
+        image = self.decoded.resized(*size) if size else self.decoded.image
+        max_bytes = max_kb * 1024 if max_kb else None
+        data, used_quality = self.encode(image, image_format, quality, max_bytes)
+        _write_bytes(output_path, data)
+        width, height = size or (self.width, self.height)
+        return SavedImage(output_path, width, height, used_quality, len(data))
+
+    def close(self):
+        """Record and return the wall time from decode to the last output"""
+        if self.seconds is None:
+            self.seconds = time.perf_counter() - self.started
+            get_image_stats().record(self.seconds)
+        return self.seconds
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_image(path, backend=None):
+    """Decode an image once for deriving outputs (use as a context manager to time it)"""
+    get_image_stats()
+    return SourceImage(path, backend)
+
+def image_size(path):
+    """(width, height) read from the file header, or (None, None) if unreadable"""
+    try:
+        if get_backend() == 'pyvips':
+            import pyvips
+            image = pyvips.Image.new_from_file(str(path))
+            return image.width, image.height
+        from PIL import Image
+        with Image.open(path) as image:
+            return image.size
+    except Exception:
+        return None, None
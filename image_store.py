@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Content-addressed image store shared by the migration scripts
+- Every stored image is identified by the SHA-256 of its bytes
+- image-store.json maps original URL -> hash, slug -> hashes, hash -> file
+- URLs already in the index are never downloaded again
+- Bytes already in the store are never written a second time; the caller
+  gets the existing file instead
+- New images keep the filename the caller proposes ({slug}-img-N.jpg,
+  Substack UUID, ...), so tools that look for those names keep working
+
+CLI:
+    python3 image_store.py scan                      # index blog-images/, report duplicates
+    python3 image_store.py scan backup-*/blog-images # also report copies in other folders
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+
+from http_client import CHUNK_SIZE, MAX_DOWNLOAD_BYTES, download_to_file
+
+REPO_ROOT = Path(__file__).resolve().parent
+STORE_DIR = REPO_ROOT / 'blog-images'
+INDEX_PATH = REPO_ROOT / 'image-store.json'
+PUBLIC_PREFIX = '/blog-images'
+
+def hash_file(path, chunk_size=CHUNK_SIZE):
+    """SHA-256 of a file, read in chunks"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+class ImageStore:
+    """Hash-keyed index over the files in blog-images/; safe to share across threads"""
+
+    def __init__(self, store_dir=STORE_DIR, index_path=INDEX_PATH):
+        self.store_dir = Path(store_dir)
+        self.index_path = Path(index_path)
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # snapshot + replace, so an older index never lands last
+        self.objects = {}  # hash -> {'file': name, 'size': bytes}
+        self.urls = {}     # original URL -> hash
+        self.posts = {}    # slug -> [hash, ...]
+        if self.index_path.exists():
+            index = json.loads(self.index_path.read_text(encoding='utf-8'))
+            self.objects = index.get('objects', {})
+            self.urls = index.get('urls', {})
+            self.posts = index.get('posts', {})
+
+    def public_path(self, digest):
+        return f"{PUBLIC_PREFIX}/{self.objects[digest]['file']}"
+
+    def has_object(self, digest):
+        """True if the hash is indexed and its file is still on disk"""
+        entry = self.objects.get(digest)
+        return bool(entry) and (self.store_dir / entry['file']).exists()
+
+    def lookup_url(self, url):
+        """Return the stored hash for a URL, or None if unknown or deleted"""
+        with self._lock:
+            digest = self.urls.get(url)
+            return digest if digest and self.has_object(digest) else None
+
+    def _link_post(self, slug, digest):
+        if slug:
+            hashes = self.posts.setdefault(slug, [])
+            if digest not in hashes:
+                hashes.append(digest)
+
+    def _free_name(self, filename, digest):
+        """filename, unless a different image already lives there"""
+        dest = self.store_dir / filename
+        if not dest.exists():
+            return filename
+        owner = next((h for h, e in self.objects.items() if e['file'] == filename), None)
+        if owner is None:
+            owner = hash_file(dest)
+        if owner == digest:
+            return filename
+        return f"{dest.stem}-{digest[:8]}{dest.suffix}"
+
+    def _register(self, digest, size, filename):
+        self.objects[digest] = {'file': filename, 'size': size}
+
+    def fetch(self, url, filename, slug=None, max_bytes=MAX_DOWNLOAD_BYTES, timeout=None):
+        """Make sure url's image is stored; returns (public_path, digest, downloaded)
+
+        filename is only used when the bytes are new to the store.
+        """
+        digest = self.lookup_url(url)
+        if digest:
+            with self._lock:
+                self._link_post(slug, digest)
+                return self.public_path(digest), digest, False
+
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        incoming = self.store_dir / f".incoming-{uuid.uuid4().hex}"
+        download = download_to_file(url, incoming, max_bytes=max_bytes, hash_algorithm='sha256',
+                                    timeout=timeout)
+        digest = download.digest
+
+        with self._lock:
+            if self.has_object(digest):
+                # Same bytes under another URL/name: keep the stored copy
+                incoming.unlink()
+            else:
+                name = self._free_name(filename, digest)
+                os.replace(incoming, self.store_dir / name)
+                self._register(digest, download.size, name)
+            self.urls[url] = digest
+            self._link_post(slug, digest)
+            return self.public_path(digest), digest, True
+
+    def add_file(self, path, slug=None):
+        """Index a file already in store_dir; returns (digest, canonical_name)
+
+        canonical_name differs from path.name when the bytes were already
+        indexed under another file (i.e. path is a duplicate).
+        """
+        path = Path(path)
+        digest = hash_file(path)
+        with self._lock:
+            if not self.has_object(digest):
+                self._register(digest, path.stat().st_size, path.name)
+            self._link_post(slug, digest)
+            return digest, self.objects[digest]['file']
+
+    def save(self):
+        """Write the index atomically; concurrent saves land in snapshot order"""
+        with self._save_lock:
+            with self._lock:
+                data = json.dumps({
+                    'objects': self.objects,
+                    'urls': self.urls,
+                    'posts': self.posts,
+                }, indent=2, sort_keys=True)
+            fd, tmp = tempfile.mkstemp(dir=self.index_path.parent, prefix='.image-store-')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp, self.index_path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_store():
+    """Return the process-wide shared store"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ImageStore()
+        return _default_store
+
+def store_image(url, filename, slug=None):
+    """Fetch url into the shared store (skipping known URLs/bytes); returns the public path"""
+    public_path, _, _ = get_store().fetch(url, filename, slug)
+    return public_path
+
+def image_files(directory):
+    return sorted(p for p in Path(directory).iterdir()
+                  if p.is_file() and not p.name.startswith('.'))
+
+def scan(extra_dirs):
+    """Index blog-images/ and report byte-identical copies there and in extra_dirs"""
+    store = get_store()
+    duplicates = []
+
+    print(f"Indexing {store.store_dir}...")
+    for path in image_files(store.store_dir):
+        digest, canonical = store.add_file(path)
+        if canonical != path.name:
+            duplicates.append((path, canonical, path.stat().st_size))
+
+    for directory in extra_dirs:
+        print(f"Checking {directory}...")
+        for path in image_files(directory):
+            digest = hash_file(path)
+            if store.has_object(digest):
+                duplicates.append((path, store.objects[digest]['file'], path.stat().st_size))
+
+    store.save()
+
+    print(f"\n{len(store.objects)} unique images indexed in {store.index_path.name}")
+    if duplicates:
+        wasted = sum(size for _, _, size in duplicates)
+        print(f"\n{len(duplicates)} duplicate files ({wasted / 1024 / 1024:.1f} MB):")
+        for path, canonical, size in duplicates:
+            print(f"  {path}  ==  {canonical}  ({size // 1024} KB)")
+    else:
+        print("No duplicate bytes found")
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != 'scan':
+        print("Usage: python3 image_store.py scan [extra-dir ...]")
+        sys.exit(1)
+    scan(sys.argv[2:])
+
+if __name__ == '__main__':
+    main()
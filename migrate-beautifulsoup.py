@@ -5,25 +5,19 @@ Properly parses HTML instead of using fragile regex
 """
 
 import sys
-import json
-import urllib.request
-import ssl
 from pathlib import Path
 from datetime import datetime
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 import re
 
-# SSL context
-ssl_context = ssl.create_default_context()
-ssl_context.check_hostname = False
-ssl_context.verify_mode = ssl.CERT_NONE
+from html_parser import make_soup
+from http_client import fetch_text
+from image_store import get_store
+from page_metadata import page_metadata
 
 def fetch_url(url):
     """Fetch URL content"""
-    req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-    with urllib.request.urlopen(req, context=ssl_context, timeout=30) as response:
-        return response.read().decode('utf-8')
+    return fetch_text(url)
 
 def extract_slug(url):
     """Extract slug from URL"""
@@ -38,12 +32,13 @@ def get_image_hash_from_url(url):
     return None
 
 def download_image(url):
-    """Download image with original hash filename"""
+    """Download image into the shared store with original hash filename"""
     filename = get_image_hash_from_url(url)
     if not filename:
         return None
 
-    local_path = Path(f'/Volumes/LaCie/CLAUDE/blog-images/{filename}')
+    store = get_store()
+    local_path = store.store_dir / filename
 
     if local_path.exists():
         print(f"  ✓ Already exists: {filename}")
@@ -51,12 +46,10 @@ def download_image(url):
 
     try:
         print(f"  Downloading: {filename}")
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, context=ssl_context, timeout=30) as response:
-            image_data = response.read()
-        local_path.write_bytes(image_data)
-        print(f"  ✓ Saved: {filename}")
-        return f"/blog-images/{filename}"
+        local_url, _, downloaded = store.fetch(url, filename)
+        store.save()
+        print(f"  ✓ {'Saved' if downloaded else 'Same image already stored as'}: {local_url}")
+        return local_url
     except Exception as e:
         print(f"  ✗ Error: {e}")
         return None
@@ -98,16 +91,10 @@ def migrate_post(url):
 
     # Fetch HTML
     html = fetch_url(url)
-    soup = BeautifulSoup(html, 'html.parser')
+    soup = make_soup(html)
 
     # Extract JSON-LD metadata
-    json_ld = soup.find('script', {'type': 'application/ld+json'})
-    metadata = {}
-    if json_ld:
-        try:
-            metadata = json.loads(json_ld.string)
-        except:
-            pass
+    metadata = page_metadata(html).jsonld or {}
 
     # Extract title
     title = metadata.get('headline', 'Untitled')
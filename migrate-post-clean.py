@@ -4,28 +4,21 @@ Clean blog post migration script - NO IMAGE RENAMING
 Migrates ONE post at a time from Substack to clean HTML
 """
 
-import urllib.request
-import urllib.parse
 import re
 import json
 import sys
-import ssl
 from pathlib import Path
 from html import unescape
 from datetime import datetime
 from urllib.parse import urlparse
 
-# SSL context
-ssl_context = ssl.create_default_context()
-ssl_context.check_hostname = False
-ssl_context.verify_mode = ssl.CERT_NONE
+from http_client import fetch_text
+from image_store import get_store
 
 def fetch_post_html(url, timeout=30):
     """Fetch post HTML from Substack with timeout"""
     print(f"Fetching: {url}")
-    req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-    with urllib.request.urlopen(req, context=ssl_context, timeout=timeout) as response:
-        return response.read().decode('utf-8')
+    return fetch_text(url, timeout=timeout)
 
 def extract_slug_from_url(url):
     """Extract slug from Substack URL"""
@@ -67,13 +60,12 @@ def get_original_filename(image_url):
     return filename
 
 def download_image(image_url, timeout=30):
-    """Download image and save with ORIGINAL filename"""
-    blog_images_dir = Path('/Volumes/LaCie/CLAUDE/blog-images')
-    blog_images_dir.mkdir(exist_ok=True)
+    """Download image into the shared store, named with its ORIGINAL filename"""
+    store = get_store()
 
     # Get original filename from URL
     original_filename = get_original_filename(image_url)
-    local_path = blog_images_dir / original_filename
+    local_path = store.store_dir / original_filename
 
     # Skip if already downloaded
     if local_path.exists():
@@ -82,15 +74,14 @@ def download_image(image_url, timeout=30):
 
     try:
         print(f"  Downloading: {original_filename}")
-        req = urllib.request.Request(image_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, context=ssl_context, timeout=timeout) as response:
-            image_data = response.read()
-
-        with open(local_path, 'wb') as f:
-            f.write(image_data)
-
-        print(f"  ✓ Saved: {original_filename} ({len(image_data)} bytes)")
-        return f"/blog-images/{original_filename}"
+        local_url, _, downloaded = store.fetch(image_url, original_filename, timeout=timeout)
+        store.save()
+
+        if downloaded:
+            print(f"  ✓ Saved: {local_url}")
+        else:
+            print(f"  ✓ Same image already stored as: {local_url}")
+        return local_url
 
     except Exception as e:
         print(f"  ✗ Error: {e}")
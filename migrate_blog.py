@@ -1,54 +1,131 @@
 #!/usr/bin/env python3
-import urllib.request
+"""
+Generate posts/*.html and posts-data.json from the Substack RSS feed
+- --incremental: only render items newer than the last synced item, or whose
+  content changed since the last sync (state kept in rss-sync-state.json)
+- --offline: use the cached feed only
+"""
 import re
+import io
 import json
+import hashlib
 import os
+import sys
+import xml.etree.ElementTree as ET
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 from html import unescape
 
+from http_cache import cached_fetch_bytes, set_offline
+from post_template import render_post
+
+SYNC_STATE_FILE = 'rss-sync-state.json'
+CONTENT_ENCODED = '{http://purl.org/rss/1.0/modules/content/}encoded'
+
 def fetch_rss():
-    """Fetch RSS feed from Substack"""
+    """Fetch RSS feed bytes from Substack (revalidated through the HTTP cache)"""
     url = 'https://forbiddenyoga.substack.com/feed'
-    req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-    with urllib.request.urlopen(req) as response:
-        return response.read().decode('utf-8')
-
-def parse_rss(xml):
-    """Parse RSS XML and extract posts"""
-    posts = []
-
-    # Find all items
-    item_pattern = re.compile(r'<item>(.*?)</item>', re.DOTALL)
-    items = item_pattern.findall(xml)
-
-    for item_xml in items:
-        # Extract fields
-        title_match = re.search(r'<title><!\[CDATA\[(.*?)\]\]></title>', item_xml)
-        desc_match = re.search(r'<description><!\[CDATA\[(.*?)\]\]></description>', item_xml)
-        link_match = re.search(r'<link>(.*?)</link>', item_xml)
-        date_match = re.search(r'<pubDate>(.*?)</pubDate>', item_xml)
-        content_match = re.search(r'<content:encoded><!\[CDATA\[(.*?)\]\]></content:encoded>', item_xml, re.DOTALL)
-
-        if title_match and content_match:
-            title = unescape(title_match.group(1))
-            description = unescape(desc_match.group(1)) if desc_match else ''
-            link = link_match.group(1) if link_match else ''
-            pub_date = date_match.group(1) if date_match else ''
-            content = content_match.group(1)
+    return cached_fetch_bytes(url)
+
+def _child_text(item, tag):
+    element = item.find(tag)
+    return element.text or '' if element is not None else ''
+
+def iter_rss(source):
+    """Stream posts out of an RSS feed, one dict per <item>
+
+    source is the feed as bytes/str or a binary file object. The XML parser
+    handles CDATA and entities, and each <item> is cleared once yielded, so
+    only one post is held in memory regardless of feed size.
+    """
+    if isinstance(source, str):
+        source = source.encode('utf-8')
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    channel = None
+    for event, element in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if element.tag == 'channel':
+                channel = element
+            continue
+        if element.tag != 'item':
+            continue
+
+        title = _child_text(element, 'title')
+        content = _child_text(element, CONTENT_ENCODED)
+        if title and content:
+            description = _child_text(element, 'description')
+            link = _child_text(element, 'link').strip()
+            guid = _child_text(element, 'guid').strip() or link
 
             # Create slug from link
             slug = link.split('/p/')[-1] if '/p/' in link else re.sub(r'[^a-z0-9]+', '-', title.lower())
 
-            posts.append({
-                'title': title,
-                'description': description,
+            yield {
+                'title': unescape(title),
+                'description': unescape(description),
                 'link': link,
-                'pubDate': pub_date,
+                'pubDate': _child_text(element, 'pubDate').strip(),
+                'guid': guid,
                 'content': content,
                 'slug': slug
-            })
+            }
+
+        # Drop the finished item (and its reference from <channel>)
+        element.clear()
+        if channel is not None and len(channel) and channel[-1] is element:
+            channel.remove(element)
+
+def parse_rss(xml):
+    """Parse RSS XML and extract posts"""
+    return list(iter_rss(xml))
 
-    return posts
+def parse_pub_date(value):
+    """RFC 822 pubDate -> datetime, or None"""
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+def post_hash(post):
+    """Hash of every field that ends up in the generated page"""
+    hasher = hashlib.sha256()
+    for field in ('title', 'description', 'pubDate', 'content'):
+        hasher.update(post[field].encode('utf-8'))
+        hasher.update(b'\0')
+    return hasher.hexdigest()
+
+def load_sync_state(path=SYNC_STATE_FILE):
+    """High-water mark and per-item hashes from the last sync"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'high_water': None, 'hashes': {}}
+
+def save_sync_state(state, path=SYNC_STATE_FILE):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+def is_changed(post, state):
+    """True if post is newer than the high-water mark or its content hash changed"""
+    mark = state.get('high_water')
+    mark_date = parse_pub_date(mark['pubDate']) if mark else None
+    post_date = parse_pub_date(post['pubDate'])
+    if mark_date is None or post_date is None or post_date > mark_date:
+        return True
+    return state['hashes'].get(post['guid']) != post_hash(post)
+
+def advance_sync_state(state, post):
+    """Record post's hash and move the high-water mark if it is the newest so far"""
+    state['hashes'][post['guid']] = post_hash(post)
+    post_date = parse_pub_date(post['pubDate'])
+    mark = state.get('high_water')
+    if post_date and (mark is None or post_date > parse_pub_date(mark['pubDate'])):
+        state['high_water'] = {'pubDate': post['pubDate'], 'guid': post['guid']}
 
 def generate_post_html(post):
     """Generate HTML for a single post"""
@@ -59,197 +136,53 @@ def generate_post_html(post):
     except:
         formatted_date = post['pubDate']
 
-    return f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{post['title']} | Forbidden Yoga</title>
-    <meta name="description" content="{post['description']}">
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Playfair+Display:wght@700&family=Roboto:wght@100;400&display=swap" rel="stylesheet">
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-
-        body {{
-            font-family: 'Roboto', sans-serif;
-            font-weight: 100;
-            background-color: #f3f2de;
-            color: #2a2a2a;
-            line-height: 1.8;
-        }}
-
-        .header {{
-            background-color: #f3f2de;
-            padding: 40px 20px;
-            text-align: center;
-        }}
-
-        .logo-link {{
-            display: inline-block;
-        }}
-
-        .logo {{
-            max-width: 200px;
-            height: auto;
-        }}
-
-        .post-container {{
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 60px 20px;
-        }}
-
-        .post-title {{
-            font-family: 'Playfair Display', serif;
-            font-size: 3.5rem;
-            font-weight: 700;
-            color: #1a1a1a;
-            margin-bottom: 20px;
-            line-height: 1.2;
-        }}
-
-        .post-meta {{
-            font-size: 0.95rem;
-            color: #666;
-            margin-bottom: 40px;
-            padding-bottom: 20px;
-            border-bottom: 1px solid #d0d0d0;
-        }}
-
-        .post-description {{
-            font-size: 1.2rem;
-            font-style: italic;
-            color: #4a4a4a;
-            margin-bottom: 40px;
-        }}
-
-        .post-content {{
-            font-size: 1.05rem;
-            line-height: 1.9;
-        }}
-
-        .post-content p {{
-            margin-bottom: 1.5em;
-        }}
-
-        .post-content h1, .post-content h2, .post-content h3 {{
-            font-family: 'Playfair Display', serif;
-            margin-top: 2em;
-            margin-bottom: 0.8em;
-            color: #1a1a1a;
-        }}
-
-        .post-content h1 {{ font-size: 2.5rem; }}
-        .post-content h2 {{ font-size: 2rem; }}
-        .post-content h3 {{ font-size: 1.5rem; }}
-
-        .post-content img {{
-            max-width: 100%;
-            height: auto;
-            margin: 2em 0;
-            border-radius: 8px;
-        }}
-
-        .post-content a {{
-            color: #4a8a8a;
-            text-decoration: underline;
-        }}
-
-        .post-content a:hover {{
-            color: #2a6a6a;
-        }}
-
-        .post-content iframe {{
-            max-width: 100%;
-            margin: 2em 0;
-        }}
-
-        .post-content em {{
-            font-style: italic;
-        }}
-
-        .post-content strong {{
-            font-weight: 400;
-        }}
-
-        .back-link {{
-            display: inline-block;
-            margin-top: 60px;
-            padding: 12px 24px;
-            background-color: #b8d4d4;
-            color: #1a1a1a;
-            text-decoration: none;
-            border-radius: 30px;
-            font-size: 0.95rem;
-            transition: background-color 0.3s ease;
-        }}
-
-        .back-link:hover {{
-            background-color: #a0c0c0;
-        }}
-
-        @media (max-width: 768px) {{
-            .post-title {{
-                font-size: 2.5rem;
-            }}
-
-            .post-content {{
-                font-size: 1rem;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <a href="/" class="logo-link">
-            <img src="/FY LOGO white no bg 2000.png" alt="Forbidden Yoga" class="logo">
-        </a>
-    </div>
-
-    <article class="post-container">
-        <h1 class="post-title">{post['title']}</h1>
-        <div class="post-meta">
-            {formatted_date}
-        </div>
-        {'<p class="post-description">' + post['description'] + '</p>' if post['description'] else ''}
-        <div class="post-content">
-            {post['content']}
-        </div>
-        <a href="/#blog-section" class="back-link">← Back to all posts</a>
-    </article>
-</body>
-</html>'''
+    pub_date = parse_pub_date(post['pubDate'])
+    return render_post({
+        'slug': post['slug'],
+        'title': post['title'],
+        'subtitle': post['description'],
+        'date_iso': pub_date.isoformat() if pub_date else '',
+        'date_display': formatted_date,
+        'content': post['content'],
+    })
 
 def main():
+    if '--offline' in sys.argv:
+        set_offline()
+    incremental = '--incremental' in sys.argv
+
     try:
         print('Fetching RSS feed...')
         rss = fetch_rss()
 
-        print('Parsing posts...')
-        posts = parse_rss(rss)
-
-        print(f'Found {len(posts)} posts')
+        state = load_sync_state() if incremental else {'high_water': None, 'hashes': {}}
+        if incremental:
+            mark = state['high_water']
+            print(f"Last synced: {mark['pubDate'] if mark else 'never'}")
+        # Compare against the state as loaded; advance a copy
+        new_state = {'high_water': state['high_water'], 'hashes': dict(state['hashes'])}
 
         # Create posts directory
         posts_dir = 'posts'
         if not os.path.exists(posts_dir):
             os.makedirs(posts_dir)
 
-        # Generate HTML for each post
+        # Generate HTML for each new or changed post as it is parsed
+        print('Parsing posts...')
         post_list = []
-        for post in posts:
-            print(f"Processing: {post['title']}")
-            html = generate_post_html(post)
+        generated = 0
+        for post in iter_rss(rss):
             filename = f"{post['slug']}.html"
 
-            with open(os.path.join(posts_dir, filename), 'w', encoding='utf-8') as f:
-                f.write(html)
+            if is_changed(post, state):
+                print(f"Processing: {post['title']}")
+                html = generate_post_html(post)
+
+                with open(os.path.join(posts_dir, filename), 'w', encoding='utf-8') as f:
+                    f.write(html)
+
+                advance_sync_state(new_state, post)
+                generated += 1
 
             post_list.append({
                 'title': post['title'],
@@ -258,11 +191,15 @@ def main():
                 'url': f'/posts/{filename}'
             })
 
+        print(f'Found {len(post_list)} posts')
+
         # Save post list as JSON for blog.js
         with open('posts-data.json', 'w', encoding='utf-8') as f:
             json.dump(post_list, f, indent=2, ensure_ascii=False)
 
-        print(f'\\n✅ Success! Generated {len(posts)} blog posts')
+        save_sync_state(new_state)
+
+        print(f'\\n✅ Success! Generated {generated} of {len(post_list)} blog posts')
         print(f'Posts saved to: {posts_dir}')
         print(f'Post data saved to: posts-data.json')
 
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Resumable journal for long migration runs
+- Appends one JSON line per slug and stage to migration-journal.jsonl
+- Stages: fetched -> images -> cleaned -> rendered -> written
+- Keeps the fetched page (and the image map) so a rerun can pick a post up
+  at the stage where it stopped instead of starting over
+- Failures are journaled too, so --only-failed can retry just those
+
+CLI:
+    python3 migration_journal.py            # show the state of every slug
+    python3 migration_journal.py --failed   # list only the failures
+"""
+
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent
+JOURNAL_PATH = REPO_ROOT / 'migration-journal.jsonl'
+PAGES_DIR = REPO_ROOT / '.migration-journal'
+
+STAGES = ['fetched', 'images', 'cleaned', 'rendered', 'written']
+
+class MigrationJournal:
+    """Per-slug progress, rebuilt from the JSONL file; safe to share across threads"""
+
+    def __init__(self, path=JOURNAL_PATH, pages_dir=PAGES_DIR):
+        self.path = Path(path)
+        self.pages_dir = Path(pages_dir)
+        self._lock = threading.Lock()
+        self.state = {}  # slug -> {'stage', 'failed', 'error', 'details'}
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        continue  # torn last line from a crash
+
+    def _apply(self, entry):
+        state = self.state.setdefault(entry['slug'], {'stage': None, 'failed': False, 'error': None, 'details': {}})
+        if entry.get('status') == 'failed':
+            state['failed'] = True
+            state['error'] = entry.get('error')
+        else:
+            state['stage'] = entry['stage']
+            state['failed'] = False
+            state['error'] = None
+            state['details'].update(entry.get('details', {}))
+
+    def _append(self, entry):
+        entry['time'] = datetime.now().isoformat(timespec='seconds')
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(entry)
+
+    def record(self, slug, stage, **details):
+        """Mark a stage as completed for slug"""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        self._append({'slug': slug, 'stage': stage, 'status': 'ok', 'details': details})
+
+    def fail(self, slug, error):
+        """Record that slug failed after its last completed stage"""
+        stage = self.stage(slug)
+        self._append({'slug': slug, 'stage': stage, 'status': 'failed', 'error': str(error)})
+
+    def stage(self, slug):
+        """Last completed stage for slug, or None"""
+        with self._lock:
+            return self.state.get(slug, {}).get('stage')
+
+    def details(self, slug):
+        with self._lock:
+            return dict(self.state.get(slug, {}).get('details', {}))
+
+    def has_reached(self, slug, stage):
+        current = self.stage(slug)
+        return current is not None and STAGES.index(current) >= STAGES.index(stage)
+
+    def is_done(self, slug):
+        return self.stage(slug) == STAGES[-1]
+
+    def failed(self):
+        with self._lock:
+            return sorted(slug for slug, state in self.state.items() if state['failed'])
+
+    def pending(self, slugs, only_failed=False):
+        """Slugs that still need work (only the failed ones if only_failed)"""
+        if only_failed:
+            failed = set(self.failed())
+            return [slug for slug in slugs if slug in failed]
+        return [slug for slug in slugs if not self.is_done(slug)]
+
+    def save_page(self, slug, html):
+        self.pages_dir.mkdir(parents=True, exist_ok=True)
+        (self.pages_dir / f"{slug}.html").write_text(html, encoding='utf-8')
+
+    def load_page(self, slug):
+        path = self.pages_dir / f"{slug}.html"
+        return path.read_text(encoding='utf-8') if path.exists() else None
+
+    def reset(self):
+        """Forget all progress (start of a fresh, non-resumed run)"""
+        with self._lock:
+            self.state = {}
+            if self.path.exists():
+                self.path.unlink()
+            if self.pages_dir.exists():
+                for page in self.pages_dir.glob('*.html'):
+                    page.unlink()
+
+def main():
+    journal = MigrationJournal()
+    if not journal.state:
+        print(f"No journal at {journal.path}")
+        return
+
+    only_failed = '--failed' in sys.argv
+    print(f"{'Slug':<50} {'Stage':<10} Status")
+    print("=" * 80)
+    for slug, state in sorted(journal.state.items()):
+        if only_failed and not state['failed']:
+            continue
+        status = f"❌ {state['error'][:60]}" if state['failed'] else ('✅' if state['stage'] == STAGES[-1] else '…')
+        print(f"{slug:<50} {state['stage'] or '-':<10} {status}")
+
+    done = sum(1 for slug in journal.state if journal.is_done(slug))
+    print(f"\n{done}/{len(journal.state)} written, {len(journal.failed())} failed")
+
+if __name__ == '__main__':
+    main()
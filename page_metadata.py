@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Metadata of a Substack post page, extracted once per page
+- PageMetadata holds every JSON-LD block (parsed), the <meta> name/property
+  tags (OG, Twitter, description), <title>, canonical URL and the first
+  <time datetime="..."> element
+- One regex scan over the page finds all of them; each JSON-LD block is
+  json.loads()-ed once
+- Records are memoized by page content hash, so the cleaner, the converter
+  and the migration scripts share one extraction per page per run
+
+Usage:
+    from page_metadata import page_metadata
+    meta = page_metadata(html)
+    print(meta.headline, meta.og('image'), meta.time_datetime)
+"""
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from html import unescape
+
+CACHE_SIZE = 64
+
+METADATA_RE = re.compile(
+    r'<script\b(?P<script_attrs>[^>]*)>(?P<script>.*?)</script>'
+    r'|<meta\b(?P<meta>[^>]*)>'
+    r'|<link\b(?P<link>[^>]*)>'
+    r'|<title>(?P<title>[^\n]*?)</title>'
+    r'|<time[^>]*datetime="(?P<datetime>[^"]+)"[^>]*>(?P<time>[^<]+)</time>',
+    re.DOTALL | re.IGNORECASE,
+)
+ATTR_RE = re.compile(r'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+JSONLD_TYPE_RE = re.compile(r'\btype\s*=\s*["\']?application/ld\+json', re.IGNORECASE)
+
+def parse_attrs(text):
+    """Attribute dict of a tag's attribute text (names lowercased, values unescaped)"""
+    attrs = {}
+    for name, double, single, bare in ATTR_RE.findall(text):
+        attrs.setdefault(name.lower(), unescape(double or single or bare))
+    return attrs
+
+class PageMetadata:
+    """Everything the migration scripts read from a page's metadata"""
+
+    def __init__(self, html):
+        self.jsonld_blocks = []   # every ld+json block in page order; None for invalid JSON
+        self.meta_name = {}       # <meta name=...> content, first occurrence wins
+        self.meta_property = {}   # <meta property=...> content (og:*, article:*)
+        self.title = None         # first single-line <title> text, raw
+        self.canonical = None
+        self.time_datetime = None # first <time datetime="..."> with plain text
+        self.time_text = None
+
+        for match in METADATA_RE.finditer(html):
+            kind = match.lastgroup
+            if kind == 'script':
+                if JSONLD_TYPE_RE.search(match.group('script_attrs')):
+                    try:
+                        self.jsonld_blocks.append(json.loads(match.group('script')))
+                    except json.JSONDecodeError:
+                        self.jsonld_blocks.append(None)
+            elif kind == 'meta':
+                attrs = parse_attrs(match.group('meta'))
+                content = attrs.get('content', '')
+                if 'name' in attrs:
+                    self.meta_name.setdefault(attrs['name'], content)
+                if 'property' in attrs:
+                    self.meta_property.setdefault(attrs['property'], content)
+            elif kind == 'link':
+                attrs = parse_attrs(match.group('link'))
+                if self.canonical is None and 'canonical' in attrs.get('rel', '').split():
+                    self.canonical = attrs.get('href', '')
+            elif kind == 'title':
+                if self.title is None:
+                    self.title = match.group('title')
+            elif self.time_datetime is None:
+                self.time_datetime = match.group('datetime')
+                self.time_text = match.group('time')
+
+    @property
+    def jsonld(self):
+        """The page's first JSON-LD block (None if missing or invalid)"""
+        return self.jsonld_blocks[0] if self.jsonld_blocks else None
+
+    def _jsonld_field(self, name, default=''):
+        data = self.jsonld
+        return data.get(name, default) if isinstance(data, dict) else default
+
+    @property
+    def headline(self):
+        return self._jsonld_field('headline')
+
+    @property
+    def description(self):
+        return self._jsonld_field('description')
+
+    @property
+    def date_published(self):
+        return self._jsonld_field('datePublished')
+
+    @property
+    def types(self):
+        """Every @type declared by the page's JSON-LD blocks"""
+        found = set()
+        for block in self.jsonld_blocks:
+            for item in block if isinstance(block, list) else [block]:
+                if isinstance(item, dict):
+                    value = item.get('@type')
+                    found.update(value if isinstance(value, list) else [value])
+        found.discard(None)
+        return found
+
+    def og(self, name, default=''):
+        """og:<name> content"""
+        return self.meta_property.get(f'og:{name}', default)
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def page_metadata(html):
+    """PageMetadata for a page, extracted once per distinct page content"""
+    key = hashlib.sha256(html.encode('utf-8', 'surrogatepass')).hexdigest()
+    with _cache_lock:
+        record = _cache.get(key)
+        if record is not None:
+            _cache.move_to_end(key)
+            return record
+    record = PageMetadata(html)
+    with _cache_lock:
+        _cache[key] = record
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return record
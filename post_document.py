@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Parse-once post model shared by the audit and fix scripts
+- PostDocument holds what those scripts read from a post: title, H1/H3,
+  meta and OG tags, canonical URL, JSON-LD, content paragraphs, images,
+  embeds and tag counts
+- Cached in .post-cache/ by content hash, with a path -> (mtime, size, hash)
+  index, so a post that has not changed is never read or parsed again,
+  in any script or run; the index is written once, at the end of a batch
+  or of the process (batch_runner workers hand their entries to the parent)
+- Fix scripts can mark a content hash as already handled (e.g. "nothing
+  for deep-clean to do"); editing the file invalidates the mark, and a
+  versioned mark name (deep-clean:<rules hash>) invalidates it on rule changes
+- Parsed with the html_parser backend (HTML_PARSER); with selectolax the
+  model is read straight from a selectolax tree, without a soup
+
+Usage:
+    from post_document import load_post
+    doc = load_post('posts/dark-alchemy.html')
+    print(doc.h1, doc.word_count(), len(doc.images))
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+
+from html_parser import get_backend, make_soup
+
+REPO_ROOT = Path(__file__).resolve().parent
+CACHE_DIR = Path(os.environ.get('POST_CACHE_DIR', REPO_ROOT / '.post-cache'))
+MODEL_VERSION = 1
+
+def _atomic_write(path, text):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+class PostDocument:
+    """Everything the audit/fix scripts read from a post, as plain JSON-able data"""
+
+    FIELDS = ('title', 'has_head', 'h1', 'subtitle', 'meta_name', 'meta_property', 'canonical',
+              'has_jsonld', 'jsonld', 'content_root', 'paragraphs', 'italic_paragraphs', 'images',
+              'iframes', 'video_embeds', 'audio_embeds', 'tag_counts')
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_html(cls, html, backend=None):
+        backend = backend or get_backend()
+        if backend == 'selectolax':
+            return cls.from_selectolax(html)
+        return cls.from_soup(make_soup(html, backend))
+
+    @classmethod
+    def from_soup(cls, soup):
+        title = soup.find('title')
+        h1 = soup.find('h1', class_='post-title')
+        h3 = soup.find('h3', class_='post-subtitle')
+
+        # First occurrence wins, like soup.find()
+        meta_name = {}
+        meta_property = {}
+        for meta in soup.find_all('meta'):
+            if meta.get('name') is not None:
+                meta_name.setdefault(meta['name'], meta.get('content', ''))
+            if meta.get('property') is not None:
+                meta_property.setdefault(meta['property'], meta.get('content', ''))
+
+        canonical = soup.find('link', attrs={'rel': 'canonical'})
+        jsonld = soup.find('script', attrs={'type': 'application/ld+json'})
+
+        # Main content: div.post-content, else <article>
+        content = soup.find('div', class_='post-content')
+        content_root = 'post-content' if content else None
+        if not content:
+            content = soup.find('article')
+            content_root = 'article' if content else None
+        paragraphs = []
+        in_content = set()
+        if content:
+            paragraphs = [[p.get_text().strip(), p.find_parent('figcaption') is not None]
+                          for p in content.find_all('p')]
+            if content_root == 'post-content':
+                in_content = {id(tag) for tag in content.find_all(True)}
+
+        # <p><em>...</em></p> paragraphs (possible section headers)
+        italic_paragraphs = []
+        for p in soup.find_all('p'):
+            em = p.find('em')
+            if em and len(p.find_all()) == 1:
+                italic_paragraphs.append([em.get_text().strip(), id(p) in in_content])
+
+        images = [{'src': img.get('src', ''), 'alt': img.get('alt') or '',
+                   'in_content': id(img) in in_content}
+                  for img in soup.find_all('img')]
+
+        video_embeds = []
+        for div in soup.find_all('div', class_=lambda x: x and 'video-embed' in x if x else False):
+            iframe = div.find('iframe')
+            video_embeds.append(str(iframe.get('src', '')) if iframe else None)
+
+        return cls(
+            title=title.get_text() if title else None,
+            has_head=soup.find('head') is not None,
+            h1=h1.get_text().strip() if h1 else None,
+            subtitle=h3.get_text().strip() if h3 else None,
+            meta_name=meta_name,
+            meta_property=meta_property,
+            canonical=canonical.get('href', '') if canonical else None,
+            has_jsonld=jsonld is not None,
+            jsonld=jsonld.string if jsonld else None,
+            content_root=content_root,
+            paragraphs=paragraphs,
+            italic_paragraphs=italic_paragraphs,
+            images=images,
+            iframes=[iframe.get('src', '') for iframe in soup.find_all('iframe')],
+            video_embeds=video_embeds,
+            audio_embeds=len(soup.find_all('div', {'data-component-name': 'AudioEmbedPlayer'})),
+            tag_counts=dict(Counter(tag.name for tag in soup.find_all(True))),
+        )
+
+    @classmethod
+    def from_selectolax(cls, html):
+        """Same fields as from_soup(), read from a selectolax (lexbor) tree"""
+        from selectolax.lexbor import LexborHTMLParser
+
+        tree = LexborHTMLParser(html)
+
+        def attr(node, name, default=''):
+            value = node.attributes.get(name, default)
+            return default if value is None else value
+
+        def inside(node, ancestor_tag=None, ancestor=None):
+            parent = node.parent
+            while parent is not None:
+                if parent.tag == ancestor_tag or (ancestor is not None and parent.mem_id == ancestor.mem_id):
+                    return True
+                parent = parent.parent
+            return False
+
+        title = tree.css_first('title')
+        h1 = tree.css_first('h1.post-title')
+        h3 = tree.css_first('h3.post-subtitle')
+
+        meta_name = {}
+        meta_property = {}
+        for meta in tree.css('meta'):
+            if meta.attributes.get('name') is not None:
+                meta_name.setdefault(meta.attributes['name'], attr(meta, 'content'))
+            if meta.attributes.get('property') is not None:
+                meta_property.setdefault(meta.attributes['property'], attr(meta, 'content'))
+
+        canonical = tree.css_first('link[rel~="canonical"]')
+        jsonld = tree.css_first('script[type="application/ld+json"]')
+
+        content = tree.css_first('div.post-content')
+        content_root = 'post-content' if content else None
+        if not content:
+            content = tree.css_first('article')
+            content_root = 'article' if content else None
+        paragraphs = []
+        if content:
+            paragraphs = [[p.text().strip(), inside(p, 'figcaption')] for p in content.css('p')]
+        in_content = content if content_root == 'post-content' else None
+
+        italic_paragraphs = []
+        for p in tree.css('p'):
+            em = p.css_first('em')
+            # css('*') includes p itself
+            if em and len(p.css('*')) == 2:
+                italic_paragraphs.append([em.text().strip(),
+                                          in_content is not None and inside(p, ancestor=in_content)])
+
+        images = [{'src': attr(img, 'src'), 'alt': attr(img, 'alt'),
+                   'in_content': in_content is not None and inside(img, ancestor=in_content)}
+                  for img in tree.css('img')]
+
+        video_embeds = []
+        for div in tree.css('div[class*="video-embed"]'):
+            iframe = div.css_first('iframe')
+            video_embeds.append(attr(iframe, 'src') if iframe else None)
+
+        tag_counts = Counter(node.tag for node in tree.root.traverse() if not node.tag.startswith('-'))
+
+        return cls(
+            title=title.text() if title else None,
+            # lexbor always adds a <head>; report whether the markup had one
+            has_head=re.search(r'<head[\s>]', html, re.IGNORECASE) is not None,
+            h1=h1.text().strip() if h1 else None,
+            subtitle=h3.text().strip() if h3 else None,
+            meta_name=meta_name,
+            meta_property=meta_property,
+            canonical=attr(canonical, 'href') if canonical else None,
+            has_jsonld=jsonld is not None,
+            jsonld=(jsonld.text() or None) if jsonld else None,
+            content_root=content_root,
+            paragraphs=paragraphs,
+            italic_paragraphs=italic_paragraphs,
+            images=images,
+            iframes=[attr(iframe, 'src') for iframe in tree.css('iframe')],
+            video_embeds=video_embeds,
+            audio_embeds=len(tree.css('div[data-component-name="AudioEmbedPlayer"]')),
+            tag_counts=dict(tag_counts),
+        )
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def word_count(self, include_captions=True):
+        """Words in the content paragraphs (optionally skipping figcaptions)"""
+        texts = [text for text, in_caption in self.paragraphs if include_captions or not in_caption]
+        return len(' '.join(texts).split())
+
+    def count(self, tag_name):
+        return self.tag_counts.get(tag_name, 0)
+
+    def content_images(self):
+        return [img for img in self.images if img['in_content']]
+
+class PostCache:
+    """On-disk PostDocument cache; safe to share across threads"""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.index_path = self.cache_dir / 'index.json'
+        self.index = {}     # resolved path -> {'mtime', 'size', 'hash'}
+        self.entries = {}   # hash -> {'version', 'doc', 'marks'} loaded this run
+        self.hits = 0
+        self.parsed = 0
+        self._updated = set()   # index keys this process changed
+        self._unsent = set()    # ... and not yet handed over by take_updates()
+        self._dirty = False
+        self._lock = threading.Lock()
+        try:
+            self.index = json.loads(self.index_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            self.index = {}
+
+    def _entry_path(self, digest):
+        return self.cache_dir / f"{digest}.json"
+
+    def _save_entry(self, digest, entry):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self._entry_path(digest), json.dumps(entry, ensure_ascii=False))
+
+    def _load_entry(self, digest):
+        entry = self.entries.get(digest)
+        if entry is None:
+            try:
+                entry = json.loads(self._entry_path(digest).read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                return None
+            if entry.get('version') != MODEL_VERSION or entry.get('parser') != get_backend():
+                return None
+            self.entries[digest] = entry
+        return entry
+
+    def file_hash(self, path):
+        """(content hash, bytes or None) for a file; bytes are only read if the index is stale"""
+        path = Path(path).resolve()
+        stat = path.stat()
+        key = str(path)
+        with self._lock:
+            known = self.index.get(key)
+        if known and known['mtime'] == stat.st_mtime_ns and known['size'] == stat.st_size:
+            return known['hash'], None
+
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._set_index(key, {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'hash': digest})
+        return digest, data
+
+    def _set_index(self, key, value):
+        self.index[key] = value
+        self._updated.add(key)
+        self._unsent.add(key)
+        self._dirty = True
+
+    def take_updates(self):
+        """Index entries changed since the last call (a batch_runner worker sends them to its parent,
+        which saves them; the worker itself then has nothing to write)"""
+        with self._lock:
+            updates = {key: self.index[key] for key in self._unsent}
+            self._unsent.clear()
+            self._dirty = False
+            return updates
+
+    def add_updates(self, updates):
+        """Take over index entries another process computed; saved with this process's own"""
+        with self._lock:
+            for key, value in updates.items():
+                self._set_index(key, value)
+
+    def save(self):
+        """Write the path index if it changed, once per run (batch end or exit)
+
+        Other runs may have saved the index since it was loaded; their
+        entries are kept and the ones this process changed are overlaid.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                index = json.loads(self.index_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                index = {}
+            for key in self._updated:
+                index[key] = self.index[key]
+            self.index = index
+            self._dirty = False
+            text = json.dumps(self.index, indent=2, sort_keys=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self.index_path, text)
+
+    def _document(self, digest, read_html):
+        with self._lock:
+            entry = self._load_entry(digest)
+            if entry is not None:
+                self.hits += 1
+                return PostDocument.from_dict(entry['doc'])
+
+        doc = PostDocument.from_html(read_html())
+        entry = {'version': MODEL_VERSION, 'parser': get_backend(), 'doc': doc.to_dict(), 'marks': []}
+        with self._lock:
+            self.parsed += 1
+            self.entries[digest] = entry
+            self._save_entry(digest, entry)
+        return doc
+
+    def load(self, path):
+        """PostDocument for a post file, parsing it only if its content is new"""
+        digest, data = self.file_hash(path)
+
+        def read_html():
+            raw = data if data is not None else Path(path).read_bytes()
+            # Same newline handling as open(..., encoding='utf-8').read()
+            return raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+        return self._document(digest, read_html)
+
+    def from_html(self, html):
+        """PostDocument for fetched HTML (keyed by content hash only)"""
+        digest = hashlib.sha256(html.encode('utf-8')).hexdigest()
+        return self._document(digest, lambda: html)
+
+    def has_mark(self, path, name):
+        """True if name was marked on the post's current content"""
+        digest, _ = self.file_hash(path)
+        with self._lock:
+            entry = self._load_entry(digest)
+            return entry is not None and name in entry['marks']
+
+    def mark(self, path, name):
+        """Record that name has been handled for the post's current content"""
+        self.load(path)
+        digest, _ = self.file_hash(path)
+        with self._lock:
+            entry = self._load_entry(digest)
+            if name not in entry['marks']:
+                entry['marks'].append(name)
+                self._save_entry(digest, entry)
+
+    def add_counters(self, parsed, hits):
+        """Count posts another process parsed / loaded from this cache"""
+        with self._lock:
+            self.parsed += parsed
+            self.hits += hits
+
+    def summary(self):
+        return f"{self.parsed} parsed, {self.hits} from cache"
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_post_cache():
+    """Return the process-wide shared post cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PostCache()
+            atexit.register(_default_cache.save)
+        return _default_cache
+
+def load_post(path):
+    """PostDocument for a post file through the shared cache"""
+    return get_post_cache().load(path)
+
+def post_from_html(html):
+    """PostDocument for an HTML string through the shared cache"""
+    return get_post_cache().from_html(html)
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 post_document.py <post.html> [...]")
+        sys.exit(1)
+    for path in sys.argv[1:]:
+        doc = load_post(path)
+        print(json.dumps(doc.to_dict(), indent=2, ensure_ascii=False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Offset index of the sections of a post page
+- One scan records where the head, <title>, H1 title, H3 subtitle, date,
+  post-content, keywords block and footer are (start/end offsets of each
+  section's inner HTML)
+- post-content runs from <div class="post-content"> to the </div> right
+  before the back-link, exactly as the scripts' old regex matched it;
+  content_div is the same div up to its balanced </div> (posts whose
+  content is followed by the keywords block instead of the back-link)
+- splice() replaces a section by offset: no rescan of the file, and only
+  that section changes even if the same text appears elsewhere
+
+Usage:
+    from post_sections import PostSections
+    sections = PostSections(html)
+    html = sections.splice('content', new_content)
+"""
+
+import re
+
+# First occurrence of each marker, in document order. title/h1/h3/time match
+# on one line, like the scripts' own regexes did.
+MARKER_RE = re.compile(
+    r'(?P<head_open><head\b[^>]*>)'
+    r'|(?P<head_close></head>)'
+    r'|<title>(?P<title>.*?)</title>'
+    r'|<h1[^>]*class="post-title"[^>]*>(?P<post_title>.*?)</h1>'
+    r'|<h3[^>]*class="post-subtitle"[^>]*>(?P<subtitle>.*?)</h3>'
+    r'|<time[^>]*>(?P<date>.*?)</time>'
+    r'|(?P<content_open><div class="post-content">)'
+    r'|(?P<content_close></div>)\s*<a [^>]*class="back-link"'
+    r'|(?P<keywords_open><div class="post-keywords">)'
+    r'|<footer\b[^>]*>(?P<footer>(?s:.*?))</footer>'
+)
+DIV_TAG_RE = re.compile(r'<div\b|</div>')
+TEXT_SECTIONS = ('title', 'post_title', 'subtitle', 'date', 'footer')
+
+class PostSections:
+    """Section offsets of one post's HTML"""
+
+    def __init__(self, html):
+        self.html = html
+        self.spans = {}  # name -> (start, end) of the section's inner HTML
+        marks = {}
+        for match in MARKER_RE.finditer(html):
+            name = match.lastgroup
+            if name == 'content_close':
+                # Only the first back-link </div> after the post-content opening counts
+                if 'content_open' in marks and 'content_close' not in marks:
+                    marks[name] = match.start(name)
+            elif name in TEXT_SECTIONS:
+                self.spans.setdefault(name, match.span(name))
+            elif name == 'head_close':
+                marks.setdefault(name, match.start())
+            else:
+                marks.setdefault(name, match.end())
+
+        if 'head_open' in marks and marks.get('head_close', -1) >= marks['head_open']:
+            self.spans['head'] = (marks['head_open'], marks['head_close'])
+        if 'content_close' in marks:
+            self.spans['content'] = (marks['content_open'], marks['content_close'])
+        if 'content_open' in marks:
+            end = self._div_end(marks['content_open'])
+            if end is not None:
+                self.spans['content_div'] = (marks['content_open'], end)
+        if 'keywords_open' in marks:
+            end = self._div_end(marks['keywords_open'])
+            if end is not None:
+                self.spans['keywords'] = (marks['keywords_open'], end)
+
+    def _div_end(self, start):
+        """Offset of the </div> closing a div whose contents begin at start"""
+        depth = 1
+        for tag in DIV_TAG_RE.finditer(self.html, start):
+            depth += 1 if tag.group(0) == '<div' else -1
+            if depth == 0:
+                return tag.start()
+        return None
+
+    def __contains__(self, name):
+        return name in self.spans
+
+    def span(self, name):
+        """(start, end) offsets of a section's inner HTML, or None"""
+        return self.spans.get(name)
+
+    def text(self, name, default=None):
+        """A section's inner HTML, or default if the post has no such section"""
+        span = self.spans.get(name)
+        return self.html[span[0]:span[1]] if span else default
+
+    def splice(self, name, replacement):
+        """The document with one section's inner HTML replaced (by offset)"""
+        start, end = self.spans[name]
+        return self.html[:start] + replacement + self.html[end:]
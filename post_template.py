@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Post page template shared by every script that writes posts/*.html
+- One page skeleton (the live site's: /styles.css + /blog-post.css, SEO head,
+  JSON-LD, keyword cloud, related posts, footer), compiled once at import
+  into static fragments and slots; rendering only joins strings
+- Every slot is escaped for where it sits: HTML text, attribute value or
+  JSON string inside the JSON-LD block; only the post body is raw HTML
+- render_posts()/write_posts() render a whole site in one process; files
+  whose HTML did not change are not rewritten
+
+Post fields (plain text unless noted; only slug is required):
+    slug, title, subtitle, description, date_iso, date_display,
+    content (HTML), og_image, schema_image, keywords (list), meta_keywords
+
+Usage:
+    from post_template import render_post, write_posts
+    html = render_post({'slug': slug, 'title': title, 'content': content})
+    written, unchanged = write_posts(posts, 'posts')
+"""
+
+import json
+import os
+import re
+import tempfile
+from html import escape
+from pathlib import Path
+
+SITE_URL = 'https://forbidden-yoga.com'
+DEFAULT_META_KEYWORDS = ('tantra yoga, kundalini awakening, tantric healing, sacred sexuality, spiritual awakening, '
+                         'energy healing, chakra healing, breathwork, conscious touch, embodied spirituality, '
+                         'somatic healing, sensual liberation, {topic}, forbidden yoga')
+DEFAULT_SCHEMA_KEYWORDS = 'tantra yoga, kundalini, spiritual practice, forbidden yoga, tantric healing'
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{title|text}} | Forbidden Yoga</title>
+    <meta name="description" content="{{description|attr}}">
+    <meta name="keywords" content="{{meta_keywords|attr}}">
+    <link rel="stylesheet" href="/styles.css">
+    <link rel="preconnect" href="https://fonts.googleapis.com">
+    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+    <link href="https://fonts.googleapis.com/css2?family=Playfair+Display:wght@700&family=Roboto:wght@100;400&display=swap" rel="stylesheet">
+    <link rel="stylesheet" href="/blog-post.css">
+    <!-- Canonical URL -->
+    <link rel="canonical" href="{{url|attr}}">
+    <!-- Open Graph / Facebook -->
+    <meta property="og:type" content="article">
+    <meta property="og:url" content="{{url|attr}}">
+    <meta property="og:title" content="{{title|attr}} | Forbidden Yoga">
+    <meta property="og:description" content="{{description|attr}}">
+    <meta property="og:image" content="{{og_image|attr}}">
+    <meta property="og:site_name" content="Forbidden Yoga">
+{{?date_iso}}    <meta property="article:published_time" content="{{date_iso|attr}}">
+{{/date_iso}}    <meta property="article:author" content="Michael Perin Wogenburg">
+    <meta property="article:section" content="Tantra Yoga">
+    <!-- Twitter -->
+    <meta name="twitter:card" content="summary_large_image">
+    <meta name="twitter:url" content="{{url|attr}}">
+    <meta name="twitter:title" content="{{title|attr}}">
+    <meta name="twitter:description" content="{{description|attr}}">
+    <meta name="twitter:image" content="{{og_image|attr}}">
+    <!-- Structured Data -->
+    <script type="application/ld+json">
+{
+  "@context": "https://schema.org",
+  "@type": "BlogPosting",
+  "headline": "{{title|json}}",
+  "description": "{{description|json}}",
+  "image": "{{schema_image|json}}",
+  "author": {
+    "@type": "Person",
+    "name": "Michael Perin Wogenburg",
+    "url": "https://forbidden-yoga.com",
+    "jobTitle": "Kundalini Yoga Teacher & Tantric Healing Practitioner"
+  },
+  "publisher": {
+    "@type": "Organization",
+    "name": "Forbidden Yoga",
+    "logo": {
+      "@type": "ImageObject",
+      "url": "https://forbidden-yoga.com/forbidden-yoga-logo-white.png"
+    }
+  },
+{{?date_iso}}  "datePublished": "{{date_iso|json}}",
+  "dateModified": "{{date_iso|json}}",
+{{/date_iso}}  "mainEntityOfPage": {
+    "@type": "WebPage",
+    "@id": "{{url|json}}"
+  },
+  "keywords": "{{schema_keywords|json}}"
+}
+    </script>
+    <link rel="icon" type="image/png" href="/favicon.png">
+</head>
+<body>
+    <article class="post-container">
+        <a href="/#blog-section" class="top-back-link">← Back to all posts</a>
+        <h1 class="post-title">{{title|text}}</h1>
+{{?subtitle}}        <h3 class="post-subtitle">{{subtitle|text}}</h3>
+{{/subtitle}}        <div class="post-meta"><time>{{date_display|text}}</time></div>
+        <div class="post-content">
+{{content|raw}}
+        </div>
+{{?keywords}}        <div class="post-keywords">
+            <h3>Keywords</h3>
+            <div class="keyword-cloud">
+{{#keywords}}            <span class="keyword-tag clickable-keyword" data-keyword="{{.|attr}}">{{.|text}}</span>
+{{/keywords}}            </div>
+        </div>
+{{/keywords}}        <section class="related-posts-grid">
+            <h3>Explore More</h3>
+            <div id="related-posts-container" class="posts-grid"></div>
+        </section>
+        <a href="/#blog-section" class="back-link">← Back to all posts</a>
+    </article>
+    <footer class="footer">
+        <div class="footer-booking">
+            <a href="https://wa.me/66830116816?text=Hello%2C%20my%20name%20is%20" class="book-guru-button" target="_blank" rel="noopener noreferrer">ONBOARDING</a>
+        </div>
+        <div class="footer-links">
+            <a href="/privacy.html">Privacy Policy</a>
+            <span>•</span>
+            <a href="/terms.html">Terms & Conditions</a>
+        </div>
+        <div class="footer-copyright">Spiritual Art Performance Project</div>
+    </footer>
+    <script src="/keyword-navigation.js"></script>
+    <script src="/related-posts.js"></script>
+</body>
+</html>
+'''
+
+# {{name|filter}} slots; {{?name}}...{{/name}} is rendered if the field is not
+# empty, {{#name}}...{{/name}} once per item of a list field (the item is {{.}})
+TAG_RE = re.compile(r'\{\{(?:(?P<open>[?#])|(?P<close>/))?(?P<name>\w+|\.)(?:\|(?P<filter>\w+))?\}\}')
+
+def escape_text(value):
+    return escape(value, quote=False)
+
+def escape_attr(value):
+    return escape(value, quote=True)
+
+def escape_json(value):
+    """Contents of a JSON string literal, safe inside <script> (no </script>, <!--)"""
+    return json.dumps(value, ensure_ascii=False)[1:-1].replace('<', '\\u003c')
+
+FILTERS = {'text': escape_text, 'attr': escape_attr, 'json': escape_json, 'raw': str}
+
+def compile_template(source):
+    """Template source -> list of static strings, (name, escaper) slots and
+    (name, parts, repeat) sections"""
+    root = []
+    stack = [(None, root)]
+    pos = 0
+    for tag in TAG_RE.finditer(source):
+        parts = stack[-1][1]
+        if tag.start() > pos:
+            parts.append(source[pos:tag.start()])
+        pos = tag.end()
+        name = tag.group('name')
+        if tag.group('open'):
+            section = []
+            parts.append((name, section, tag.group('open') == '#'))
+            stack.append((name, section))
+        elif tag.group('close'):
+            if stack[-1][0] != name:
+                raise ValueError(f"Template section {{{{/{name}}}}} closes {stack[-1][0]!r}")
+            stack.pop()
+        else:
+            filter_name = tag.group('filter') or 'text'
+            if filter_name not in FILTERS:
+                raise ValueError(f"Unknown template filter {filter_name!r}")
+            parts.append((name, FILTERS[filter_name]))
+    if len(stack) > 1:
+        raise ValueError(f"Template section {{{{#{stack[-1][0]}}}}} is not closed")
+    if pos < len(source):
+        root.append(source[pos:])
+    return root
+
+PAGE_PARTS = compile_template(PAGE_TEMPLATE)
+
+def _render(parts, fields, item, out):
+    for part in parts:
+        if isinstance(part, str):
+            out.append(part)
+            continue
+        name, body = part[:2]
+        value = item if name == '.' else fields.get(name)
+        if len(part) == 2:
+            out.append(body('' if value is None else str(value)))
+        elif value:
+            for each in value if part[2] else [item]:
+                _render(body, fields, each, out)
+
+def post_fields(post):
+    """Template fields for a post, with the defaults filled in"""
+    slug = post['slug']
+    fields = dict(post)
+    fields['url'] = f'{SITE_URL}/posts/{slug}.html'
+    fields['title'] = post.get('title') or 'Untitled'
+    fields['subtitle'] = post.get('subtitle') or ''
+    fields['description'] = post.get('description') or fields['subtitle'][:160] or fields['title']
+    fields['og_image'] = post.get('og_image') or f'{SITE_URL}/images/{slug}-featured.jpg'
+    fields['schema_image'] = post.get('schema_image') or fields['og_image']
+    keywords = [k for k in post.get('keywords') or [] if k]
+    fields['keywords'] = keywords
+    fields['meta_keywords'] = (post.get('meta_keywords') or ', '.join(keywords)
+                               or DEFAULT_META_KEYWORDS.format(topic=slug.replace('-', ' ')))
+    fields['schema_keywords'] = ', '.join(keywords) or DEFAULT_SCHEMA_KEYWORDS
+    fields['content'] = (post.get('content') or '').strip()
+    return fields
+
+def render_post(post):
+    """Full HTML page for one post (a dict of the fields above)"""
+    out = []
+    _render(PAGE_PARTS, post_fields(post), None, out)
+    return ''.join(out)
+
+def render_posts(posts):
+    """Yield (slug, html) for every post"""
+    for post in posts:
+        yield post['slug'], render_post(post)
+
+def _write_atomic(path, text):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def write_posts(posts, posts_dir):
+    """Render posts into posts_dir/<slug>.html; returns (written, unchanged) slug lists"""
+    posts_dir = Path(posts_dir)
+    posts_dir.mkdir(parents=True, exist_ok=True)
+    written, unchanged = [], []
+    for slug, html in render_posts(posts):
+        path = posts_dir / f'{slug}.html'
+        try:
+            if path.read_text(encoding='utf-8') == html:
+                unchanged.append(slug)
+                continue
+        except (OSError, UnicodeDecodeError):
+            pass
+        _write_atomic(path, html)
+        written.append(slug)
+    return written, unchanged
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Adaptive per-host rate limiting for the Substack crawls
+- Token bucket per host; every request takes one token
+- Rate creeps up while responses are fast, backs off when they slow down
+- 429 / 503 halve the rate and pause the host (honouring Retry-After)
+- Jittered exponential backoff for retries
+
+Used by http_client.HTTPClient, so scripts no longer need time.sleep() between fetches.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+INITIAL_RATE = 4.0        # requests per second per host
+MIN_RATE = 0.2
+MAX_RATE = 50.0
+BURST = 4
+RATE_STEP = 0.5           # additive increase per fast response
+SLOW_RESPONSE_SECONDS = 3.0
+SLOWDOWN_FACTOR = 0.8     # multiplicative decrease for slow responses
+THROTTLE_FACTOR = 0.5     # multiplicative decrease for 429 / 503
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Jittered exponential backoff: uniform in [ceiling/2, ceiling]"""
+    ceiling = min(cap, base * (2 ** attempt))
+    return random.uniform(ceiling / 2, ceiling)
+
+class HostLimiter:
+    """AIMD token bucket for a single host"""
+
+    def __init__(self, rate=INITIAL_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE, burst=BURST):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until this host may receive another request"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    elapsed = now - max(self.updated, self.blocked_until)
+                    self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def record_response(self, latency):
+        """Adapt the rate to a successful response's latency"""
+        with self._lock:
+            if latency > SLOW_RESPONSE_SECONDS:
+                self.rate = max(self.min_rate, self.rate * SLOWDOWN_FACTOR)
+            else:
+                self.rate = min(self.max_rate, self.rate + RATE_STEP)
+
+    def record_throttle(self, delay):
+        """The host said slow down (429/503): halve the rate and pause for delay seconds"""
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * THROTTLE_FACTOR)
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+class RateLimiter:
+    """Registry of HostLimiters, created on first use"""
+
+    def __init__(self, **limiter_options):
+        self.limiter_options = limiter_options
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def for_host(self, host):
+        with self._lock:
+            limiter = self._hosts.get(host)
+            if limiter is None:
+                limiter = self._hosts[host] = HostLimiter(**self.limiter_options)
+            return limiter
+
+    def summary(self):
+        with self._lock:
+            hosts = sorted(self._hosts.items())
+        return ', '.join(f"{host}: {l.rate:.1f}/s ({l.throttled} throttled)" for host, l in hosts)
@@ -2,12 +2,26 @@
 """
 Re-download all images from original Substack posts.
 This ensures we get the correct images for each post.
+Posts are converted concurrently in this process via convert-blog-post-full.py.
+An interrupted run can be continued with --resume (or --only-failed).
 """
 
-import subprocess
+import importlib.util
 import sys
 from pathlib import Path
 
+from migration_journal import MigrationJournal
+
+CONCURRENCY = 8
+
+def load_converter():
+    """Import convert-blog-post-full.py (hyphenated, so not importable by name)"""
+    path = Path(__file__).resolve().parent / 'convert-blog-post-full.py'
+    spec = importlib.util.spec_from_file_location('convert_blog_post_full', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
 # List of all 43 post slugs
 POST_SLUGS = [
     "4-paths-into-the-forbidden",
@@ -56,49 +70,32 @@ POST_SLUGS = [
 ]
 
 def main():
+    only_failed = '--only-failed' in sys.argv
+    resume = only_failed or '--resume' in sys.argv
+    journal = MigrationJournal()
+
     print(f"Re-downloading images from Substack for {len(POST_SLUGS)} posts\n")
 
-    # Clear existing blog-images directory
-    blog_images_dir = Path('/Volumes/LaCie/CLAUDE/blog-images')
+    if resume:
+        print(f"Resuming from {journal.path.name} (blog-images kept)")
+    else:
+        # Clear existing blog-images directory
+        blog_images_dir = Path('/Volumes/LaCie/CLAUDE/blog-images')
 
-    print(f"Clearing {blog_images_dir}...")
-    for img_file in blog_images_dir.glob('*'):
-        if img_file.is_file() and not img_file.name.startswith('.'):
-            img_file.unlink()
+        print(f"Clearing {blog_images_dir}...")
+        for img_file in blog_images_dir.glob('*'):
+            if img_file.is_file() and not img_file.name.startswith('.'):
+                img_file.unlink()
+        journal.reset()
 
     print("Starting re-download...\n")
 
-    success = 0
-    failed = []
-
-    for i, slug in enumerate(POST_SLUGS, 1):
-        print(f"[{i}/{len(POST_SLUGS)}] {slug}")
-
-        # Run convert-blog-post-full.py which downloads images
-        url = f"https://forbiddenyoga.substack.com/p/{slug}"
-
-        try:
-            result = subprocess.run(
-                ['python3', 'convert-blog-post-full.py', url],
-                capture_output=True,
-                text=True,
-                timeout=60,
-                cwd='/Volumes/LaCie/CLAUDE'
-            )
-
-            if result.returncode == 0:
-                print(f"  ✅ Downloaded")
-                success += 1
-            else:
-                print(f"  ❌ Failed: {result.stderr[:100]}")
-                failed.append(slug)
+    converter = load_converter()
+    converter.convert_posts(POST_SLUGS, concurrency=CONCURRENCY,
+                            journal=journal, only_failed=only_failed)
 
-        except subprocess.TimeoutExpired:
-            print(f"  ❌ Timeout")
-            failed.append(slug)
-        except Exception as e:
-            print(f"  ❌ Error: {str(e)[:100]}")
-            failed.append(slug)
+    failed = journal.failed()
+    success = sum(1 for slug in POST_SLUGS if journal.is_done(slug))
 
     print(f"\n{'='*80}")
     print(f"✅ Successfully downloaded: {success}/{len(POST_SLUGS)}")
@@ -1,25 +1,14 @@
 #!/usr/bin/env python3
 import os
 import re
+import sys
+
+from build_manifest import BuildStep
 
 # Directory containing blog posts
 posts_dir = 'posts'
 
-# Get all HTML files
-html_files = [f for f in os.listdir(posts_dir) if f.endswith('.html') and not f.startswith('._')]
-
-print(f'Reducing heading spacing in {len(html_files)} blog posts...\n')
-
-for filename in html_files:
-    filepath = os.path.join(posts_dir, filename)
-
-    try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-    except Exception as e:
-        print(f'✗ Error reading {filename}: {e}')
-        continue
-
+def reduce_heading_spacing(content, path=None):
     # Reduce heading top margin from 2em to 1em
     content = re.sub(
         r'(\.post-content\s+h[123],\s*\.post-content\s+h[123],\s*\.post-content\s+h[123]\s*\{[^}]*?)margin-top:\s*2em;',
@@ -34,9 +23,20 @@ for filename in html_files:
         content
     )
 
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
+
+def main():
+    # Get all HTML files
+    html_files = [f for f in os.listdir(posts_dir) if f.endswith('.html') and not f.startswith('._')]
+
+    print(f'Reducing heading spacing in {len(html_files)} blog posts...\n')
+
+    # Only posts changed since the last run (or run with a changed script) are rewritten
+    step = BuildStep('reduce-heading-spacing', [__file__])
+    step.run([os.path.join(posts_dir, f) for f in sorted(html_files)], reduce_heading_spacing,
+             force='--force' in sys.argv, dry_run='--dirty' in sys.argv)
 
-    print(f'✓ Updated {filename}')
+    print(f'\n✅ Reduced heading spacing in blog posts')
 
-print(f'\n✅ Successfully reduced heading spacing in {len(html_files)} blog posts')
+if __name__ == '__main__':
+    main()
@@ -2,13 +2,17 @@
 """
 Comprehensive SEO audit for all blog posts.
 Checks: H1/H3 structure, meta tags, OG tags, Twitter cards, Schema.org, images
+Posts are read through the shared PostDocument cache (unchanged posts are not re-parsed)
+and audited in parallel, one process per core.
 """
 
 import json
 import re
-from bs4 import BeautifulSoup
 from pathlib import Path
 
+from batch_runner import find_posts, run_batch
+from post_document import get_post_cache, load_post
+
 POSTS_DIR = Path(__file__).parent / "posts"
 
 def audit_seo(html_file):
@@ -16,70 +20,63 @@ def audit_seo(html_file):
     issues = []
     warnings = []
 
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    soup = BeautifulSoup(content, 'html.parser')
+    doc = load_post(html_file)
     filename = html_file.name
 
     # 1. Check H1 with class="post-title"
-    h1 = soup.find('h1', class_='post-title')
-    if not h1:
+    if doc.h1 is None:
         issues.append("Missing H1 with class='post-title'")
-    elif h1.get_text().strip() == filename.replace('.html', ''):
+    elif doc.h1 == filename.replace('.html', ''):
         warnings.append("H1 title is just the filename - needs proper title")
 
     # 2. Check H3 with class="post-subtitle"
-    h3 = soup.find('h3', class_='post-subtitle')
-    if not h3:
+    if doc.subtitle is None:
         issues.append("Missing H3 with class='post-subtitle'")
 
     # 3. Check meta description
-    meta_desc = soup.find('meta', attrs={'name': 'description'})
-    if not meta_desc or not meta_desc.get('content', '').strip():
+    meta_desc = doc.meta_name.get('description')
+    if not meta_desc or not meta_desc.strip():
         issues.append("Missing or empty meta description")
-    elif len(meta_desc.get('content', '')) < 50:
-        warnings.append(f"Meta description too short ({len(meta_desc.get('content', ''))} chars)")
-    elif len(meta_desc.get('content', '')) > 160:
-        warnings.append(f"Meta description too long ({len(meta_desc.get('content', ''))} chars)")
+    elif len(meta_desc) < 50:
+        warnings.append(f"Meta description too short ({len(meta_desc)} chars)")
+    elif len(meta_desc) > 160:
+        warnings.append(f"Meta description too long ({len(meta_desc)} chars)")
 
     # 4. Check OG tags
-    og_title = soup.find('meta', attrs={'property': 'og:title'})
-    og_desc = soup.find('meta', attrs={'property': 'og:description'})
-    og_image = soup.find('meta', attrs={'property': 'og:image'})
-    og_url = soup.find('meta', attrs={'property': 'og:url'})
+    og_title = doc.meta_property.get('og:title')
+    og_desc = doc.meta_property.get('og:description')
+    og_image = doc.meta_property.get('og:image')
+    og_url = doc.meta_property.get('og:url')
 
-    if not og_title or not og_title.get('content', '').strip():
+    if not og_title or not og_title.strip():
         issues.append("Missing og:title")
-    if not og_desc or not og_desc.get('content', '').strip():
+    if not og_desc or not og_desc.strip():
         issues.append("Missing og:description")
-    if not og_image or not og_image.get('content', '').strip():
+    if not og_image or not og_image.strip():
         issues.append("Missing og:image")
-    if not og_url or not og_url.get('content', '').strip():
+    if not og_url or not og_url.strip():
         warnings.append("Missing og:url")
 
     # 5. Check Twitter cards
-    tw_card = soup.find('meta', attrs={'name': 'twitter:card'})
-    tw_title = soup.find('meta', attrs={'name': 'twitter:title'})
-    tw_desc = soup.find('meta', attrs={'name': 'twitter:description'})
-    tw_image = soup.find('meta', attrs={'name': 'twitter:image'})
+    tw_title = doc.meta_name.get('twitter:title')
+    tw_desc = doc.meta_name.get('twitter:description')
+    tw_image = doc.meta_name.get('twitter:image')
 
-    if not tw_card:
+    if 'twitter:card' not in doc.meta_name:
         warnings.append("Missing twitter:card")
-    if not tw_title or not tw_title.get('content', '').strip():
+    if not tw_title or not tw_title.strip():
         issues.append("Missing twitter:title")
-    if not tw_desc or not tw_desc.get('content', '').strip():
+    if not tw_desc or not tw_desc.strip():
         issues.append("Missing twitter:description")
-    if not tw_image or not tw_image.get('content', '').strip():
+    if not tw_image or not tw_image.strip():
         warnings.append("Missing twitter:image")
 
     # 6. Check Schema.org JSON-LD
-    schema_script = soup.find('script', attrs={'type': 'application/ld+json'})
-    if not schema_script:
+    if not doc.has_jsonld:
         warnings.append("Missing Schema.org JSON-LD")
     else:
         try:
-            schema = json.loads(schema_script.string)
+            schema = json.loads(doc.jsonld)
             if not schema.get('headline'):
                 warnings.append("Schema.org missing headline")
             if not schema.get('description'):
@@ -88,16 +85,12 @@ def audit_seo(html_file):
             warnings.append("Invalid Schema.org JSON")
 
     # 7. Check canonical URL
-    canonical = soup.find('link', attrs={'rel': 'canonical'})
-    if not canonical or not canonical.get('href', '').strip():
+    if not doc.canonical or not doc.canonical.strip():
         warnings.append("Missing canonical URL")
 
     # 8. Check content
-    post_content = soup.find('div', class_='post-content')
-    if post_content:
-        paragraphs = post_content.find_all('p')
-        text = ' '.join([p.get_text().strip() for p in paragraphs])
-        word_count = len(text.split())
+    if doc.content_root == 'post-content':
+        word_count = doc.word_count()
         if word_count < 50:
             issues.append(f"Very low content ({word_count} words)")
         elif word_count < 200:
@@ -105,19 +98,18 @@ def audit_seo(html_file):
 
     # 9. Check images for Substack CDN
     substack_imgs = 0
-    for img in soup.find_all('img'):
-        src = img.get('src', '')
+    for img in doc.images:
+        src = img['src']
         if 'substackcdn.com' in src or 'substack-post-media' in src:
             substack_imgs += 1
-        if not img.get('alt'):
+        if not img['alt']:
             warnings.append("Image missing alt text")
     if substack_imgs > 0:
         warnings.append(f"{substack_imgs} image(s) still using Substack CDN")
 
     # 10. Check for <hr> tags
-    hr_tags = soup.find_all('hr')
-    if hr_tags:
-        warnings.append(f"{len(hr_tags)} <hr> tag(s) found")
+    if doc.count('hr'):
+        warnings.append(f"{doc.count('hr')} <hr> tag(s) found")
 
     return issues, warnings
 
@@ -125,14 +117,13 @@ def main():
     print("🔍 Comprehensive SEO Audit\n")
     print("=" * 80)
 
-    all_posts = sorted([f for f in POSTS_DIR.glob("*.html") if not f.name.startswith("._")])
+    all_posts = find_posts(POSTS_DIR)
 
     total_issues = 0
     total_warnings = 0
     posts_with_issues = []
 
-    for post_file in all_posts:
-        issues, warnings = audit_seo(post_file)
+    for post_file, (issues, warnings) in run_batch(audit_seo, all_posts):
 
         if issues or warnings:
             posts_with_issues.append((post_file.name, issues, warnings))
@@ -156,6 +147,7 @@ def main():
     print(f"   Posts fully optimized: {len(all_posts) - len(posts_with_issues)}")
     print(f"   Total critical issues: {total_issues}")
     print(f"   Total warnings: {total_warnings}")
+    print(f"   Posts parsed: {get_post_cache().summary()}")
 
 if __name__ == '__main__':
     main()
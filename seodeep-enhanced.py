@@ -17,7 +17,12 @@ import json
 import hashlib
 from pathlib import Path
 from urllib.parse import urlparse, unquote
-import subprocess
+import shutil
+
+from batch_runner import find_posts, run_batch
+from http_client import download_to_file
+from image_pipeline import get_image_stats, open_image
+from url_rewriter import URLRewriter, parse_srcset, substack_image_key
 
 # Configuration
 BASE_DIR = Path('/Volumes/LaCie/CLAUDE')
@@ -40,89 +45,54 @@ def ensure_directories():
 def download_image(url, output_path):
     """Download an image from URL"""
     try:
-        result = subprocess.run(
-            ['curl', '-sL', '-o', str(output_path), url],
-            capture_output=True,
-            timeout=30
-        )
-        return result.returncode == 0 and output_path.exists()
+        download_to_file(url, output_path)
+        return output_path.exists()
     except Exception as e:
         print(f"    Error downloading {url}: {e}")
         return False
 
-def get_image_dimensions(filepath):
-    """Get image dimensions using identify command"""
+def open_source(input_path):
+    """Decode an image once for all the sizes derived from it (None if it can't be decoded)"""
     try:
-        result = subprocess.run(
-            ['identify', '-format', '%w %h', str(filepath)],
-            capture_output=True,
-            text=True
-        )
-        if result.returncode == 0:
-            w, h = result.stdout.strip().split()
-            return int(w), int(h)
-    except:
-        pass
-    return None, None
-
-def optimize_image(input_path, output_path, max_width=None, quality=85):
-    """Resize and optimize an image"""
-    width, height = get_image_dimensions(input_path)
-
-    if width is None:
-        # Just copy if we can't get dimensions
-        subprocess.run(['cp', str(input_path), str(output_path)])
+        return open_image(input_path)
+    except Exception as e:
+        print(f"    Error decoding {Path(input_path).name}: {e}")
+        return None
+
+def close_source(source):
+    """Finish with a decoded image and report its wall time"""
+    seconds = source.close()
+    print(f"    {source.path.name}: {source.width}x{source.height}, {seconds * 1000:.0f} ms")
+
+def copy_image(input_path, output_path):
+    if Path(input_path).resolve() != Path(output_path).resolve():
+        shutil.copyfile(input_path, output_path)
+
+def optimize_image(input_path, output_path, max_width=None, quality=85, source=None):
+    """Resize and optimize an image (from source, input_path already decoded, if given)"""
+    if source is None:
+        # Just copy if we can't decode it
+        copy_image(input_path, output_path)
         return True
 
-    # Build ffmpeg/convert command
-    if max_width and width > max_width:
-        # Need to resize
-        try:
-            result = subprocess.run([
-                'convert', str(input_path),
-                '-resize', f'{max_width}x',
-                '-quality', str(quality),
-                str(output_path)
-            ], capture_output=True)
-            return result.returncode == 0
-        except:
-            pass
-
-    # Just copy if no resize needed
-    subprocess.run(['cp', str(input_path), str(output_path)])
+    try:
+        # Copied as is if no resize is needed
+        source.save(output_path, max_width=max_width, quality=quality, copy_unscaled=True)
+    except Exception as e:
+        print(f"    Error optimizing image: {e}")
+        copy_image(input_path, output_path)
     return True
 
-def create_thumbnail(input_path, output_path, max_dim=600, max_kb=100):
-    """Create an optimized thumbnail"""
+def create_thumbnail(input_path, output_path, max_dim=600, max_kb=100, source=None):
+    """Create an optimized thumbnail at the highest quality (up to THUMBNAIL_QUALITY) that fits max_kb"""
     try:
-        # First pass - resize
-        result = subprocess.run([
-            'convert', str(input_path),
-            '-resize', f'{max_dim}x{max_dim}>',
-            '-quality', '85',
-            str(output_path)
-        ], capture_output=True)
-
-        if result.returncode != 0:
-            subprocess.run(['cp', str(input_path), str(output_path)])
-            return
-
-        # Check file size and reduce quality if needed
-        file_size_kb = output_path.stat().st_size / 1024
-        quality = 80
-
-        while file_size_kb > max_kb and quality > 30:
-            subprocess.run([
-                'convert', str(output_path),
-                '-quality', str(quality),
-                str(output_path)
-            ], capture_output=True)
-            file_size_kb = output_path.stat().st_size / 1024
-            quality -= 10
-
+        if source is None:
+            raise ValueError(f"could not decode {Path(input_path).name}")
+        saved = source.save(output_path, max_dim=max_dim, quality=THUMBNAIL_QUALITY, max_kb=max_kb)
+        print(f"    Thumbnail: {saved.width}x{saved.height}, quality {saved.quality}, {saved.size / 1024:.0f} KB")
     except Exception as e:
         print(f"    Error creating thumbnail: {e}")
-        subprocess.run(['cp', str(input_path), str(output_path)])
+        copy_image(input_path, output_path)
 
 def generate_seo_alt_text(filename, post_title):
     """Generate SEO-friendly alt text for an image"""
@@ -154,9 +124,7 @@ def extract_images_from_html(html):
 
     # Also find srcset URLs
     for match in re.finditer(r'srcset="([^"]+)"', html):
-        srcset = match.group(1)
-        for part in srcset.split(','):
-            url = part.strip().split()[0]
+        for url, _ in parse_srcset(match.group(1)):
             if 'substackcdn.com' in url or 'substack-post-media' in url:
                 images.append(url)
 
@@ -166,6 +134,7 @@ def process_post(post_path):
     """Process a single blog post with full SEODEEP"""
     print(f"\n{'='*60}")
     print(f"Processing: {post_path.name}")
+    get_image_stats()  # count this worker's spawns too
 
     with open(post_path, 'r', encoding='utf-8') as f:
         html = f.read()
@@ -183,12 +152,14 @@ def process_post(post_path):
     print(f"  Subtitle: {subtitle[:50]}..." if subtitle else "  No subtitle")
 
     # Find and download images
+    first_source = None
     images = extract_images_from_html(html)
     substack_images = [img for img in images if 'substackcdn.com' in img or 'substack-post-media' in img]
 
     if substack_images:
         print(f"  Found {len(substack_images)} Substack images to download")
 
+        url_map = {}
         for i, img_url in enumerate(substack_images[:10]):  # Max 10 images
             local_name = f"{slug}-img-{i}.jpg"
             local_path = BLOG_IMAGES_DIR / local_name
@@ -196,26 +167,41 @@ def process_post(post_path):
             if not local_path.exists():
                 print(f"    Downloading image {i}...")
                 if download_image(img_url, local_path):
-                    # Optimize the downloaded image
-                    optimize_image(local_path, local_path, max_width=MAX_IMAGE_WIDTH)
+                    # Optimize the downloaded image; the first one stays
+                    # decoded for the featured image and thumbnail
+                    source = open_source(local_path)
+                    optimize_image(local_path, local_path, max_width=MAX_IMAGE_WIDTH, source=source)
+                    if i == 0 and source:
+                        first_source = source
+                    elif source:
+                        close_source(source)
+
+            url_map[img_url] = f'/blog-images/{local_name}'
 
-            # Update HTML to use local path
-            html = html.replace(img_url, f'/blog-images/{local_name}')
+        # Update HTML to use local paths, in one pass
+        html = URLRewriter(url_map, key=substack_image_key).rewrite(html)
 
     # Create featured image and thumbnail if not exists
     first_local_img = BLOG_IMAGES_DIR / f"{slug}-img-0.jpg"
-    if first_local_img.exists():
+    featured_path = IMAGES_DIR / f"{slug}-featured.jpg"
+    thumb_path = THUMBNAILS_DIR / f"{slug}.jpg"
+    if first_local_img.exists() and not (featured_path.exists() and thumb_path.exists()):
+        # Both are derived from one decode of the first image
+        source = first_source or open_source(first_local_img)
+
         # Featured image
-        featured_path = IMAGES_DIR / f"{slug}-featured.jpg"
         if not featured_path.exists():
             print("  Creating featured image...")
-            optimize_image(first_local_img, featured_path, max_width=1200, quality=90)
+            optimize_image(first_local_img, featured_path, max_width=1200, quality=90, source=source)
 
         # Thumbnail
-        thumb_path = THUMBNAILS_DIR / f"{slug}.jpg"
         if not thumb_path.exists():
             print("  Creating thumbnail...")
-            create_thumbnail(first_local_img, thumb_path)
+            create_thumbnail(first_local_img, thumb_path, max_dim=THUMBNAIL_MAX_DIM,
+                             max_kb=MAX_THUMBNAIL_SIZE_KB, source=source)
+        first_source = source
+    if first_source:
+        close_source(first_source)
 
     # Update SEO meta tags
     featured_url = f"https://forbidden-yoga.com/images/{slug}-featured.jpg"
@@ -248,6 +234,7 @@ def process_post(post_path):
 def run_seodeep(post_slug=None):
     """Run SEODEEP on one or all posts"""
     ensure_directories()
+    stats = get_image_stats()
 
     if post_slug:
         post_path = POSTS_DIR / f"{post_slug}.html"
@@ -256,9 +243,11 @@ def run_seodeep(post_slug=None):
         else:
             print(f"Post not found: {post_slug}")
     else:
-        # Process all posts
-        for post_path in sorted(POSTS_DIR.glob('*.html')):
-            process_post(post_path)
+        # Process all posts, in parallel (output is printed in post order)
+        for _ in run_batch(process_post, find_posts(POSTS_DIR)):
+            pass
+
+    print(f"\nImages: {stats.summary()}")
 
 if __name__ == '__main__':
     if len(sys.argv) > 1:
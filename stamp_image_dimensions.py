@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Stamp width, height, loading="lazy" and decoding="async" on every image in
+the posts' content, so the browser reserves the space before the image
+loads (no layout shift). Dimensions come from the header-only image index
+(image_index.py); attributes a post already sets are left alone.
+"""
+import sys
+from pathlib import Path
+
+from batch_runner import find_posts
+from build_manifest import BuildStep
+from image_index import get_image_index, stamp_images
+from post_sections import PostSections
+
+# Directory containing blog posts
+posts_dir = 'posts'
+
+def stamp_post(content, path=None):
+    sections = PostSections(content)
+    name = 'content_div' if 'content_div' in sections else 'content'
+    if name not in sections:
+        return content
+    return sections.splice(name, stamp_images(sections.text(name)))
+
+def main():
+    post_files = find_posts(posts_dir)
+
+    print(f'Stamping image dimensions in {len(post_files)} blog posts...\n')
+
+    # Posts are rebuilt when they or one of their images changed
+    step = BuildStep('stamp-image-dimensions', [__file__, Path(__file__).with_name('image_index.py')],
+                     depends=('images',))
+    step.run(post_files, stamp_post, force='--force' in sys.argv, dry_run='--dirty' in sys.argv)
+    get_image_index().save()
+
+    print(f'\n✅ Stamped image dimensions in blog posts')
+
+if __name__ == '__main__':
+    main()
@@ -1,144 +1,125 @@
 #!/usr/bin/env python3
 """
 Standardize all blog posts with consistent, clean HTML structure.
-Preserves existing content, just ensures consistent wrapper/meta tags.
+Preserves existing content and metadata, and re-renders every page through
+the shared post template in one pass. Only posts whose page, template,
+keyword map entry or posts-data.json entry changed since the last run are
+re-rendered (--dirty: report them, --force: re-render all).
 """
 
 import re
+import sys
+from html import unescape
 from pathlib import Path
 
-def standardize_post(filepath):
-    """Standardize a single post's HTML structure."""
+from build_manifest import BuildStep
+from page_metadata import page_metadata
+from post_sections import PostSections
+from post_template import SITE_URL, write_posts
+
+KEYWORD_RE = re.compile(r'data-keyword="([^"]*)"')
+
+def standardize_post(filepath, html, site):
+    """Read a post's content and metadata into post template fields (None if unusable)
+
+    Metadata missing from the page is taken from its posts-data.json entry,
+    a missing keyword cloud from the keyword map.
+    """
     print(f"Standardizing: {filepath.name}")
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        html = f.read()
+    # Locate every section in one scan
+    sections = PostSections(html)
+    meta = page_metadata(html)
 
     # Extract key components
-    title_match = re.search(r'<title>(.*?)</title>', html)
-    title = title_match.group(1).replace(' | Forbidden Yoga', '').strip() if title_match else "Untitled"
+    title = sections.text('title')
+    title = title.replace(' | Forbidden Yoga', '').strip() if title is not None else "Untitled"
 
     # Get h1 title
-    h1_match = re.search(r'<h1[^>]*class="post-title"[^>]*>(.*?)</h1>', html)
-    h1_title = h1_match.group(1).strip() if h1_match else title
+    h1_title = sections.text('post_title', title).strip()
 
     # Get subtitle
-    h3_match = re.search(r'<h3[^>]*class="post-subtitle"[^>]*>(.*?)</h3>', html)
-    subtitle = h3_match.group(1).strip() if h3_match else ""
+    subtitle = sections.text('subtitle', "").strip()
 
     # Get date
-    time_match = re.search(r'<time[^>]*>(.*?)</time>', html)
-    date = time_match.group(1).strip() if time_match else "May 28, 2024"
+    date = sections.text('date', "May 28, 2024").strip()
 
     # Get slug
     slug = filepath.stem
 
-    # Get post-content
-    content_match = re.search(
-        r'<div class="post-content">(.*?)</div>\s*<a [^>]*class="back-link"',
-        html,
-        re.DOTALL
-    )
+    # Get post-content (up to the back-link, or the whole div when keywords follow it)
+    post_content = sections.text('content', sections.text('content_div'))
 
-    if not content_match:
+    if post_content is None:
         print(f"  ⚠️  Could not extract post-content")
-        return False
-
-    post_content = content_match.group(1).strip()
-
-    # Build standardized HTML
-    standard_html = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{h1_title} | Forbidden Yoga</title>
-    <meta name="description" content="{subtitle[:160] if subtitle else h1_title}">
-    <meta name="keywords" content="tantra yoga, kundalini awakening, tantric healing, sacred sexuality, spiritual awakening, {slug.replace('-', ' ')}, forbidden yoga">
-    <link rel="stylesheet" href="/styles.css">
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Playfair+Display:wght@700&family=Roboto:wght@100;400&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="/blog-post.css">
-    <link rel="canonical" href="https://forbidden-yoga.com/posts/{slug}.html">
-    <meta property="og:type" content="article">
-    <meta property="og:url" content="https://forbidden-yoga.com/posts/{slug}.html">
-    <meta property="og:title" content="{h1_title} | Forbidden Yoga">
-    <meta property="og:description" content="{subtitle[:160] if subtitle else h1_title}">
-    <meta property="og:image" content="https://forbidden-yoga.com/images/{slug}-featured.jpg">
-    <meta property="og:site_name" content="Forbidden Yoga">
-    <meta property="article:author" content="Michael Perin Wogenburg">
-    <meta name="twitter:card" content="summary_large_image">
-    <meta name="twitter:title" content="{h1_title}">
-    <meta name="twitter:description" content="{subtitle[:160] if subtitle else h1_title}">
-    <meta name="twitter:image" content="https://forbidden-yoga.com/images/{slug}-featured.jpg">
-    <script type="application/ld+json">
-{{
-  "@context": "https://schema.org",
-  "@type": "BlogPosting",
-  "headline": "{h1_title}",
-  "description": "{subtitle if subtitle else h1_title}",
-  "image": "https://forbidden-yoga.com/blog-thumbnails/{slug}.png",
-  "author": {{
-    "@type": "Person",
-    "name": "Michael Perin Wogenburg"
-  }},
-  "publisher": {{
-    "@type": "Organization",
-    "name": "Forbidden Yoga"
-  }}
-}}
-    </script>
-    <link rel="icon" type="image/png" href="/favicon.png">
-</head>
-<body>
-    <article class="post-container">
-        <a href="/#blog-section" class="top-back-link">← Back to all posts</a>
-        <h1 class="post-title">{h1_title}</h1>
-        <h3 class="post-subtitle">{subtitle}</h3>
-        <div class="post-meta">
-            <time>{date}</time>
-        </div>
-        <div class="post-content">
-{post_content}
-        </div>
-        <a href="/#blog-section" class="back-link">← Back to all posts</a>
-    </article>
-    <footer class="footer">
-        <div class="footer-email">love<span style="display:none">nospam</span>@<span style="display:none">antispam</span>forbidden-yoga.com</div>
-        <div class="footer-links">
-            <a href="/privacy.html">Privacy Policy</a>
-            <span>•</span>
-            <a href="/terms.html">Terms & Conditions</a>
-        </div>
-        <div class="footer-copyright">Spiritual Art Performance Project</div>
-    </footer>
-    <script src="/keyword-navigation.js"></script>
-</body>
-</html>
-'''
-
-    # Write standardized HTML
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(standard_html)
-
-    print(f"  ✅ Standardized")
-    return True
-
-def main():
-    posts_dir = Path('/Volumes/LaCie/CLAUDE/posts')
+        return None
+
+    # Keep the post's own SEO metadata where it has it
+    listing = site.posts_data_entry(slug) or {}
+    listing_date = listing.get('date', '')
+    listing_image = listing.get('image', '')
+    if listing_image.startswith('/'):
+        listing_image = f'{SITE_URL}{listing_image}'
+    keywords = [unescape(k) for k in KEYWORD_RE.findall(sections.text('keywords', ''))]
+    schema_image = meta.jsonld.get('image') if isinstance(meta.jsonld, dict) else None
+    return {
+        'slug': slug,
+        'title': unescape(h1_title),
+        'subtitle': unescape(subtitle),
+        'description': meta.meta_name.get('description') or listing.get('description', ''),
+        'date_iso': (meta.meta_property.get('article:published_time')
+                     or (listing_date if listing_date[:4].isdigit() else '')),
+        'date_display': unescape(date),
+        'content': post_content,
+        'og_image': meta.og('image') or listing_image,
+        'schema_image': schema_image if isinstance(schema_image, str) else f'{SITE_URL}/blog-thumbnails/{slug}.png',
+        'keywords': keywords or (site.keyword_entry(slug) or {}).get('keywords', []),
+    }
+
+def standardize_all(posts_dir, force=False, dry_run=False):
+    """Re-render the posts in posts_dir whose inputs changed since the last run"""
+    posts_dir = Path(posts_dir)
 
     # Get all posts (skip resource forks)
     post_files = sorted([p for p in posts_dir.glob('*.html') if not p.name.startswith('._')])
 
     print(f"Standardizing {len(post_files)} posts\n")
 
-    success = 0
+    step = BuildStep('standardize-posts', [__file__], depends=('template', 'keywords', 'posts_data'))
+
+    dirty = []
+    clean = 0
     for post_file in post_files:
-        if standardize_post(post_file):
-            success += 1
+        html = post_file.read_text(encoding='utf-8')
+        reasons, inputs = step.check(post_file, html)
+        if force and not reasons:
+            reasons = ['forced']
+        if not reasons:
+            clean += 1
+        elif dry_run:
+            print(f"• {post_file.name}: {', '.join(reasons)}")
+        else:
+            post = standardize_post(post_file, html, step.site)
+            if post:
+                dirty.append((post_file, inputs, post))
+            else:
+                step.record(post_file, inputs, html)  # nothing to standardize until it changes
+
+    if dry_run:
+        print(f"\n{len(post_files) - clean} dirty, {clean} clean")
+        return
+
+    # Render and write every dirty post in one call
+    written, unchanged = write_posts([post for _, _, post in dirty], posts_dir)
+    for post_file, inputs, _ in dirty:
+        step.record(post_file, inputs, post_file.read_text(encoding='utf-8'))
+    step.save()
+
+    print(f"\n✅ Standardized {len(dirty)}/{len(post_files) - clean} changed posts "
+          f"({len(written)} rewritten, {len(unchanged)} already standard, {clean} clean)")
 
-    print(f"\n✅ Standardized {success}/{len(post_files)} posts")
+def main():
+    standardize_all('/Volumes/LaCie/CLAUDE/posts', force='--force' in sys.argv, dry_run='--dirty' in sys.argv)
 
 if __name__ == '__main__':
     main()
@@ -1,25 +1,14 @@
 #!/usr/bin/env python3
 import os
 import re
+import sys
+
+from build_manifest import BuildStep
 
 # Directory containing blog posts
 posts_dir = 'posts'
 
-# Get all HTML files
-html_files = [f for f in os.listdir(posts_dir) if f.endswith('.html')]
-
-print(f'Updating font weight in {len(html_files)} blog posts...\n')
-
-for filename in html_files:
-    filepath = os.path.join(posts_dir, filename)
-
-    try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-    except Exception as e:
-        print(f'✗ Error reading {filename}: {e}')
-        continue
-
+def update_fonts(content, path=None):
     # Replace font-weight: 100 with font-weight: 400 in body style
     content = re.sub(
         r'(body\s*\{[^}]*font-family:\s*[^;]+;\s*)font-weight:\s*100;',
@@ -33,9 +22,20 @@ for filename in html_files:
         'family=Roboto:wght@400'
     )
 
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
+    return content
+
+def main():
+    # Get all HTML files
+    html_files = [f for f in os.listdir(posts_dir) if f.endswith('.html')]
+
+    print(f'Updating font weight in {len(html_files)} blog posts...\n')
+
+    # Only posts changed since the last run (or run with a changed script) are rewritten
+    step = BuildStep('update-blog-fonts', [__file__])
+    step.run([os.path.join(posts_dir, f) for f in sorted(html_files)], update_fonts,
+             force='--force' in sys.argv, dry_run='--dirty' in sys.argv)
 
-    print(f'✓ Updated {filename}')
+    print(f'\n✅ Blog posts use Roboto normal weight (400)')
 
-print(f'\n✅ Successfully updated {len(html_files)} blog posts to use Roboto normal weight (400)')
+if __name__ == '__main__':
+    main()
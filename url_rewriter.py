@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Single-pass URL rewriting for post HTML
+- URLRewriter rewrites every mapped URL in one scan of the document with a
+  scanner compiled once at import (srcset attributes and http(s) URLs), and
+  a dict lookup per URL, instead of one str.replace() pass per image
+- srcset attributes are parsed into candidates (Substack fetch URLs contain
+  commas, so splitting on ',' breaks them) and each candidate URL is mapped
+  on its own, keeping its width/density descriptor
+- With key=substack_image_key, every size variant of a Substack image in a
+  srcset maps to the local copy of that image
+
+Usage:
+    from url_rewriter import URLRewriter
+    html = URLRewriter(image_map).rewrite(html)
+"""
+
+import re
+from urllib.parse import unquote
+
+SUBSTACK_FETCH_RE = re.compile(r'^https?://substackcdn\.com/image/fetch/[^/]*/(.+)$')
+SCAN_RE = re.compile(r'(?P<attr>srcset\s*=\s*)(?P<quote>["\'])(?P<srcset>.*?)(?P=quote)'
+                     r'|(?P<url>https?://[^\s"\'<>]+)', re.DOTALL)
+URL_TOKEN_RE = re.compile(r'https?://[^\s"\'<>]+')
+URL_START_RE = re.compile(r'https?://')
+
+def parse_srcset(value):
+    """List of (url, descriptor) candidates, parsed as the HTML spec does
+
+    A URL runs to the next whitespace; commas at its end close the
+    candidate, commas inside it (w_424,c_limit,...) are part of the URL.
+    """
+    candidates = []
+    pos, end = 0, len(value)
+    while pos < end:
+        while pos < end and (value[pos].isspace() or value[pos] == ','):
+            pos += 1
+        start = pos
+        while pos < end and not value[pos].isspace():
+            pos += 1
+        url = value[start:pos]
+        if not url:
+            break
+        descriptor = ''
+        if url.endswith(','):
+            url = url.rstrip(',')
+        else:
+            # Descriptors run to the next comma outside parentheses
+            start, depth = pos, 0
+            while pos < end and (value[pos] != ',' or depth):
+                if value[pos] == '(':
+                    depth += 1
+                elif value[pos] == ')':
+                    depth = max(0, depth - 1)
+                pos += 1
+            descriptor = ' '.join(value[start:pos].split())
+        if url:
+            candidates.append((url, descriptor))
+    return candidates
+
+def format_srcset(candidates):
+    return ', '.join(f"{url} {descriptor}" if descriptor else url for url, descriptor in candidates)
+
+def substack_image_key(url):
+    """Original image URL behind a substackcdn.com fetch URL (any size/format variant)"""
+    match = SUBSTACK_FETCH_RE.match(url)
+    return unquote(match.group(1)) if match else url
+
+class URLRewriter:
+    """Rewrites every mapped URL in a document in a single pass"""
+
+    def __init__(self, mapping, key=None):
+        self.mapping = {old: new for old, new in mapping.items() if old and old != new}
+        self.key = key
+        self.by_key = {}
+        if key:
+            for old, new in self.mapping.items():
+                self.by_key.setdefault(key(old), new)
+        urls = [old for old in self.mapping if URL_TOKEN_RE.fullmatch(old)]
+        # Longest first, so a URL wins over any mapped URL that is its prefix
+        self.url_lengths = sorted({len(old) for old in urls}, reverse=True)
+        # Mapped strings the scanner never sees as a whole URL (relative paths etc.)
+        self.other = sorted(set(self.mapping) - set(urls), key=len, reverse=True)
+
+    def _inside(self, token):
+        """Replace mapped URLs embedded in a longer token (url(...), ?query tails)"""
+        out = []
+        pos = 0
+        for start in URL_START_RE.finditer(token):
+            start = start.start()
+            if start < pos:
+                continue
+            for length in self.url_lengths:
+                old = token[start:start + length]
+                if old in self.mapping:
+                    out.append(token[pos:start])
+                    out.append(self.mapping[old])
+                    pos = start + length
+                    break
+        if not out:
+            return token
+        out.append(token[pos:])
+        return ''.join(out)
+
+    def lookup(self, url):
+        """New URL for one URL: exact match, same image by key, or embedded matches"""
+        if url in self.mapping:
+            return self.mapping[url]
+        if self.key and self.key(url) in self.by_key:
+            return self.by_key[self.key(url)]
+        return self._inside(url)
+
+    def rewrite_srcset(self, value):
+        """Map each srcset candidate; variants that collapse onto one URL are kept once"""
+        candidates = []
+        seen = set()
+        for url, descriptor in parse_srcset(value):
+            url = self.lookup(url)
+            if url not in seen:
+                seen.add(url)
+                candidates.append((url, descriptor))
+        return format_srcset(candidates)
+
+    def _replace(self, match):
+        url = match.group('url')
+        if url is not None:
+            return self.mapping[url] if url in self.mapping else self._inside(url)
+        srcset = match.group('srcset')
+        rewritten = self.rewrite_srcset(srcset)
+        if rewritten == format_srcset(parse_srcset(srcset)):
+            return match.group(0)  # nothing mapped: keep the attribute as written
+        quote = match.group('quote')
+        return f"{match.group('attr')}{quote}{rewritten}{quote}"
+
+    def rewrite(self, text):
+        if not self.mapping:
+            return text
+        text = SCAN_RE.sub(self._replace, text)
+        for old in self.other:
+            text = text.replace(old, self.mapping[old])
+        return text
+
+def rewrite_urls(text, mapping, key=None):
+    """One-off rewrite of text with an original -> new URL mapping"""
+    return URLRewriter(mapping, key=key).rewrite(text)
@@ -6,19 +6,15 @@ Verify all blog posts have proper content and images.
 import re
 from pathlib import Path
 
-def count_text_content(html):
-    """Count actual text content (not just images)."""
-    content_match = re.search(
-        r'<div class="post-content">(.*?)</div>\s*<a [^>]*class="back-link"',
-        html,
-        re.DOTALL
-    )
+from batch_runner import find_posts, run_batch
+from post_sections import PostSections
 
-    if not content_match:
+def count_text_content(sections):
+    """Count actual text content (not just images)."""
+    content = sections.text('content')
+    if content is None:
         return 0
 
-    content = content_match.group(1)
-
     # Extract all paragraph text (excluding image-only paragraphs)
     paragraphs = re.findall(r'<p>(.*?)</p>', content, flags=re.DOTALL)
 
@@ -34,29 +30,20 @@ def count_text_content(html):
 
     return text_paras
 
-def count_images(html):
+def count_images(sections):
     """Count images in post content."""
-    content_match = re.search(
-        r'<div class="post-content">(.*?)</div>\s*<a [^>]*class="back-link"',
-        html,
-        re.DOTALL
-    )
-
-    if not content_match:
+    content = sections.text('content')
+    if content is None:
         return 0
 
-    content = content_match.group(1)
     images = re.findall(r'<img[^>]+src="([^"]+)"', content)
 
     return len(images)
 
-def get_title_subtitle(html):
+def get_title_subtitle(sections):
     """Extract title and subtitle."""
-    title_match = re.search(r'<h1[^>]*class="post-title"[^>]*>(.*?)</h1>', html)
-    title = title_match.group(1).strip() if title_match else "[NO TITLE]"
-
-    subtitle_match = re.search(r'<h3[^>]*class="post-subtitle"[^>]*>(.*?)</h3>', html)
-    subtitle = subtitle_match.group(1).strip() if subtitle_match else "[NO SUBTITLE]"
+    title = sections.text('post_title', "[NO TITLE]").strip()
+    subtitle = sections.text('subtitle', "[NO SUBTITLE]").strip()
 
     return title, subtitle
 
@@ -68,9 +55,11 @@ def check_post(filepath):
     except UnicodeDecodeError:
         return None
 
-    title, subtitle = get_title_subtitle(html)
-    text_paras = count_text_content(html)
-    images = count_images(html)
+    # Locate the sections once; every check reads from the index
+    sections = PostSections(html)
+    title, subtitle = get_title_subtitle(sections)
+    text_paras = count_text_content(sections)
+    images = count_images(sections)
 
     return {
         'title': title,
@@ -83,7 +72,7 @@ def main():
     posts_dir = Path('/Volumes/LaCie/CLAUDE/posts')
 
     # Get all posts (skip resource forks)
-    post_files = sorted([p for p in posts_dir.glob('*.html') if not p.name.startswith('._')])
+    post_files = find_posts(posts_dir)
 
     print(f"Verifying {len(post_files)} posts\n")
     print(f"{'Post':<50} {'Paras':<8} {'Images':<8} {'Status'}")
@@ -91,8 +80,7 @@ def main():
 
     issues = []
 
-    for post_file in post_files:
-        result = check_post(post_file)
+    for post_file, result in run_batch(check_post, post_files):
 
         if result is None:
             print(f"{post_file.name:<50} {'ERROR':<8} {'ERROR':<8} Encoding error")